@@ -0,0 +1,240 @@
+"""
+Headless HTTP API for prompt lookup and generation.
+
+Serves the same library and generation flow as the Streamlit app without
+paying for a script rerun per request:
+
+    GET  /health
+    GET  /prompts?offset=0&limit=100      stream prompts as a JSON array
+    GET  /search?q=...&limit=20           BM25-ranked prompts
+    GET  /categories                      list categories
+    GET  /categories/<name>               stream prompts in a category
+    POST /generate                        {"topic", "prompt_name", "model",
+                                           "num_prompts", "max_tokens",
+                                           "creativity", "hedge"}
+                                           settings limited as in the UI
+                                           (main.GENERATION_LIMITS)
+
+Usage: python api_server.py [--host 127.0.0.1] [--port 8000]
+"""
+
+import argparse
+import json
+import logging
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from main import GENERATION_LIMITS, generate_prompts, safe_load_data, search_prompts
+from utils import AVAILABLE_MODELS
+
+# Rows serialized per chunk when streaming large result sets.
+STREAM_BATCH_ROWS = 1000
+
+
+class PromptAPIHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive between requests by default.
+    protocol_version = "HTTP/1.1"
+    server_version = "PromptAPI/1.0"
+    # Buffer each response and flush it once; with small unbuffered writes on a
+    # kept-alive socket, Nagle plus delayed ACKs add ~40 ms per request.
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+    # --- Routing ---
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == "/health":
+                self.send_json({"status": "ok"})
+            elif url.path == "/prompts":
+                self.list_prompts(query)
+            elif url.path == "/search":
+                self.search(query)
+            elif url.path == "/categories":
+                data = safe_load_data()
+                self.send_json(sorted(data["Categories"].dropna().unique().tolist()))
+            elif url.path.startswith("/categories/"):
+                self.prompts_in_category(unquote(url.path[len("/categories/") :]))
+            else:
+                self.send_error_json(HTTPStatus.NOT_FOUND, "Unknown endpoint.")
+        except ValueError as e:
+            self.send_error_json(HTTPStatus.BAD_REQUEST, str(e))
+        except Exception as e:
+            logging.error(f"API request failed: {e}")
+            self.send_error_json(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        try:
+            body = self.read_json()
+            if url.path == "/generate":
+                self.generate(body)
+            else:
+                self.send_error_json(HTTPStatus.NOT_FOUND, "Unknown endpoint.")
+        except ValueError as e:
+            self.send_error_json(HTTPStatus.BAD_REQUEST, str(e))
+        except Exception as e:
+            logging.error(f"API request failed: {e}")
+            self.send_error_json(HTTPStatus.BAD_GATEWAY, str(e))
+
+    # --- Endpoints ---
+    def list_prompts(self, query):
+        offset = query_count(query, "offset", 0)
+        limit = query_count(query, "limit", 0) or None
+        data = safe_load_data()
+        end = None if limit is None else offset + limit
+        self.stream_frame(data.iloc[offset:end])
+
+    def search(self, query):
+        if not query.get("q"):
+            raise ValueError("Missing search query 'q'.")
+        data = safe_load_data()
+        self.stream_frame(
+            search_prompts(data, query["q"], limit=query_count(query, "limit", 20))
+        )
+
+    def prompts_in_category(self, category):
+        data = safe_load_data()
+        self.stream_frame(data[data["Categories"] == category])
+
+    def generate(self, body):
+        model = body.get("model", next(iter(AVAILABLE_MODELS)))
+        if model not in AVAILABLE_MODELS:
+            raise ValueError(f"Unknown model: {model}")
+        for key in ("topic", "prompt_name"):
+            if not body.get(key):
+                raise ValueError(f"Missing field '{key}'.")
+        generated = generate_prompts(
+            body["topic"],
+            body["prompt_name"],
+            model,
+            bounded(body, "num_prompts", int, 5),
+            bounded(body, "max_tokens", int, 500),
+            bounded(body, "creativity", float, 0.7),
+            hedge=flag(body, "hedge"),
+        )
+        self.send_json({"prompts": generated})
+
+    # --- Helpers ---
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON body: {e}")
+        if not isinstance(body, dict):
+            raise ValueError("JSON body must be an object.")
+        return body
+
+    def send_json(self, payload, status=HTTPStatus.OK):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        self.send_json({"error": message}, status=status)
+
+    def stream_frame(self, frame):
+        """
+        Send ``frame`` as a JSON array using chunked transfer encoding, so large
+        result sets are serialized batch by batch instead of all at once.
+        """
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            self.write_chunk(b"[")
+            for start in range(0, len(frame), STREAM_BATCH_ROWS):
+                batch = frame.iloc[start : start + STREAM_BATCH_ROWS]
+                records = batch.to_json(orient="records", force_ascii=False)[1:-1]
+                self.write_chunk((("," if start else "") + records).encode())
+            self.write_chunk(b"]")
+        except Exception as e:
+            # The status line is already sent, so no error response can
+            # follow: end the chunked body (its JSON is left incomplete) and
+            # drop the connection.
+            logging.error(f"Streaming response failed: {e}")
+            self.close_connection = True
+        try:
+            self.wfile.write(b"0\r\n\r\n")
+        except OSError:
+            self.close_connection = True
+
+    def write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+
+
+def bounded(body, name, cast, default):
+    """
+    Read setting ``name`` from a request body, checked against
+    GENERATION_LIMITS.
+    """
+    low, high = GENERATION_LIMITS[name]
+    raw = body.get(name, default)
+    # bool is an int subclass: don't let ``true`` pass as 1.
+    if isinstance(raw, bool):
+        raise ValueError(f"'{name}' must be a number.")
+    try:
+        value = cast(raw)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be a number.")
+    if not low <= value <= high:
+        raise ValueError(f"'{name}' must be between {low} and {high}.")
+    return value
+
+
+def flag(body, name):
+    """
+    Read an optional JSON boolean from a request body.
+    """
+    value = body.get(name, False)
+    if not isinstance(value, bool):
+        raise ValueError(f"'{name}' must be true or false.")
+    return value
+
+
+def query_count(query, name, default):
+    """
+    Read a non-negative integer query parameter.
+    """
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer.")
+    if value < 0:
+        raise ValueError(f"'{name}' must not be negative.")
+    return value
+
+
+def make_server(host="127.0.0.1", port=8000):
+    return ThreadingHTTPServer((host, port), PromptAPIHandler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port)
+    print(f"Serving prompt API on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
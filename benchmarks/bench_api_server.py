@@ -0,0 +1,91 @@
+"""
+Throughput of the headless prompt API against a local stub backend.
+
+Each client thread keeps one HTTP/1.1 connection open and issues requests
+back to back, so the numbers include keep-alive reuse but no reconnects.
+
+Usage: python benchmarks/bench_api_server.py [rows] [clients] [requests_per_client]
+"""
+
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stub_backend import start_stub_backend  # noqa: E402
+
+
+def run_clients(address, method, path, body, clients, per_client):
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        connection = http.client.HTTPConnection(*address)
+        local = []
+        for _ in range(per_client):
+            started = time.perf_counter()
+            connection.request(method, path, body=body)
+            response = connection.getresponse()
+            response.read()
+            local.append(time.perf_counter() - started)
+            assert response.status == 200, response.status
+        connection.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[len(latencies) // 2] * 1000
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    per_client = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+    stub, url = start_stub_backend()
+    os.environ["OPENROUTER_API_URL"] = url
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+
+    from bench_memory import make_library
+
+    import main
+    from api_server import make_server
+
+    main.save_data_to_parquet(make_library(rows).drop(columns="Letter"))
+    server = make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    generate = json.dumps({"topic": "SEO", "prompt_name": "Campaign"})
+    cases = [
+        ("GET", "/categories/Category%201", None),
+        ("GET", "/search?q=word1+word2", None),
+        ("GET", "/prompts?limit=100", None),
+        ("POST", "/generate", generate),
+    ]
+    print(f"{rows} rows, {clients} clients x {per_client} requests")
+    for method, path, body in cases:
+        throughput, median = run_clients(
+            server.server_address, method, path, body, clients, per_client
+        )
+        print(f"{method:<5}{path:<28}{throughput:8.0f} req/s   p50 {median:6.1f} ms")
+
+    server.shutdown()
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
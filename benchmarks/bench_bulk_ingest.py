@@ -0,0 +1,56 @@
+"""
+Measure bulk ingestion throughput for a zip of many CSV files as the
+number of worker processes grows.
+
+Usage: python benchmarks/bench_bulk_ingest.py [files] [rows_per_file]
+"""
+
+import io
+import os
+import random
+import sys
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest import parse_uploads  # noqa: E402
+
+WORDS = [f"word{i}" for i in range(5000)]
+
+
+def make_archive(files, rows, seed=0):
+    rng = random.Random(seed)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for i in range(files):
+            lines = ["Letter,Prompt Name,Category,Prompt Text"]
+            for _ in range(rows):
+                name = " ".join(rng.choices(WORDS, k=3))
+                text = " ".join(rng.choices(WORDS, k=40))
+                lines.append(f"{name[0].upper()},{name},Category {i % 20},{text}")
+            archive.writestr(f"prompts_{i}.csv", "\n".join(lines))
+    return buffer.getvalue()
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    archive = make_archive(files, rows)
+    print(f"{files} files x {rows} rows, {len(archive) / 1e6:.1f} MB zipped")
+
+    worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    baseline = None
+    for workers in worker_counts:
+        started = time.perf_counter()
+        merged, summary = parse_uploads([("bench.zip", archive)], max_workers=workers)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        print(
+            f"workers={workers:<3} {elapsed:6.2f}s  "
+            f"{len(merged) / elapsed:10.0f} rows/s  speedup {baseline / elapsed:4.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Full render vs incremental rebuild of a large HTML catalog.
+
+Usage: python benchmarks/bench_catalog_build.py [rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_memory import make_library  # noqa: E402
+
+from build_catalog import CatalogBuilder  # noqa: E402
+from utils import compact_frame, generate_html_content  # noqa: E402
+
+
+def timed(label, build, builder=None):
+    started = time.perf_counter()
+    result = build()
+    line = f"{label:<34}{(time.perf_counter() - started) * 1000:10.1f} ms"
+    if builder is not None:
+        line += f"  (fragments {builder.stats['seconds'] * 1000:.1f} ms)"
+    print(line)
+    return result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    data = compact_frame(make_library(rows))
+    print(f"{rows} rows")
+
+    full = timed(
+        "generate_html_content", lambda: generate_html_content(data, False, "", "T")
+    )
+    with tempfile.TemporaryDirectory() as cache_dir:
+        output = os.path.join(cache_dir, "catalog.html")
+        builder = CatalogBuilder(cache_dir)
+
+        def write(frame):
+            return lambda: builder.write(output, frame, False, "T")
+
+        timed("builder, cold cache", write(data), builder)
+        timed("builder, nothing changed", write(data), builder)
+
+        edited = data.copy()
+        edited["PromptText"] = edited["PromptText"].astype(object)
+        edited.loc[rows // 2, "PromptText"] = "An edited prompt."
+        # Loaded libraries are compact; keep the edited copy in the same form.
+        edited = compact_frame(edited)
+        timed("builder, one prompt edited", write(edited), builder)
+        print(f"sections re-rendered: {builder.stats['rendered']}")
+
+        with open(output, encoding="utf-8") as f:
+            assert f.read() == generate_html_content(edited, False, "", "T")
+        assert full != generate_html_content(edited, False, "", "T")
+
+        # Every row after the new one gets a new id; only its section re-renders.
+        added = pd.concat([edited.iloc[[0]], edited], ignore_index=True)
+        timed("builder, one prompt added", write(added), builder)
+        print(f"sections re-rendered: {builder.stats['rendered']}")
+        with open(output, encoding="utf-8") as f:
+            assert f.read() == generate_html_content(added, False, "", "T")
+
+
+if __name__ == "__main__":
+    main()
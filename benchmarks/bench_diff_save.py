@@ -0,0 +1,57 @@
+"""
+Admin save time for a one-cell edit: rewriting the whole library versus
+appending a row-level patch, and the first read after the patch (which
+replays it and republishes the snapshot).
+
+Usage: python benchmarks/bench_diff_save.py [rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    import main as app
+    from bench_memory import make_library
+    from changes import ChangeSet
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app.DATA_FILE = os.path.join(tmp, "prompt_data.parquet")
+        app.SEARCH_INDEX_FILE = os.path.join(tmp, "prompt_data.search.pkl")
+        app.TFIDF_MATRIX_FILE = os.path.join(tmp, "prompt_data.tfidf.npz")
+        app.save_data_to_parquet(make_library(rows).drop(columns="Letter"))
+        version, data = app.load_versioned_library()
+
+        edited = data.copy()
+        edited.loc[rows // 2, "PromptText"] = "Edited text"
+        _, full_ms = timed(lambda: app.save_data_to_parquet(edited))
+
+        version, data = app.load_versioned_library()
+        changes = ChangeSet(edited={rows // 2: {"PromptText": "Edited again"}})
+        _, patch_ms = timed(
+            lambda: app.save_changes(changes, expected_version=version, base=data)
+        )
+        _, replay_ms = timed(app.safe_load_data)
+        _, cached_ms = timed(app.safe_load_data)
+
+    print(f"{rows} rows, one edited cell")
+    print(f"  full rewrite save:        {full_ms:9.1f} ms")
+    print(f"  row-level patch save:     {patch_ms:9.1f} ms")
+    print(f"  first read (replay):      {replay_ms:9.1f} ms")
+    print(f"  later reads (snapshot):   {cached_ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Tokens spent filling short generations with follow-ups versus regenerating
+the whole batch, against a stub backend that truncates its replies.
+
+Each reply has only ``yield`` of the requested prompts valid (the rest is cut
+off mid-object), billed as if every requested prompt had been written.
+Regenerating is modelled as what a user does today: resubmit the full batch
+until one reply is complete, up to the same number of rounds.
+
+Usage: python benchmarks/bench_gap_fill.py [batches] [num_prompts]
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_backend import start_stub_backend  # noqa: E402
+
+import main as app  # noqa: E402
+
+MODEL = "Ministral 8B"
+TOKENS_PER_PROMPT = 60
+_counter = iter(range(10**9))
+
+
+def truncating_reply(payload):
+    content = payload["messages"][0]["content"]
+    asked = int(re.search(r"Generate (\d+)", content).group(1))
+    valid = sum(random.random() < 0.6 for _ in range(asked))
+    prompts = [
+        {
+            "Letter": "S",
+            "PromptName": f"Stub Prompt {next(_counter)}",
+            "Categories": "Stub",
+            "PromptText": "Stub prompt text.",
+        }
+        for _ in range(valid)
+    ]
+    text = json.dumps(prompts)
+    if valid < asked:
+        text = text[:-1] + ', {"Letter": "S", "PromptName": "Cut'
+    return {
+        "choices": [{"message": {"content": text}}],
+        "usage": {
+            "prompt_tokens": len(content) // 4,
+            "completion_tokens": TOKENS_PER_PROMPT * asked,
+        },
+    }
+
+
+def main():
+    batches = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    num_prompts = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    random.seed(0)
+    server, app.API_URL = start_stub_backend(0.02, reply=truncating_reply)
+
+    totals = {"received": 0, "requests": 0, "tokens": 0}
+    started = time.perf_counter()
+    for i in range(batches):
+        generated, usage = app.generate_prompt_batch(
+            f"topic {i}", "Stub", MODEL, num_prompts, 2000, 0.7
+        )
+        totals["received"] += usage["received"]
+        totals["requests"] += usage["requests"]
+        totals["tokens"] += usage["full_tokens"] + usage["follow_up_tokens"]
+    gap_fill_seconds = time.perf_counter() - started
+
+    regen = {"received": 0, "requests": 0, "tokens": 0}
+    started = time.perf_counter()
+    for i in range(batches):
+        best = []
+        for attempt in range(1 + app.FOLLOW_UP_ROUNDS):
+            generated, usage = app.generate_prompt_batch(
+                f"regen {i} {attempt}",
+                "Stub",
+                MODEL,
+                num_prompts,
+                2000,
+                0.7,
+                follow_up_rounds=0,
+            )
+            regen["requests"] += 1
+            regen["tokens"] += usage["full_tokens"]
+            best = max(best, generated, key=len)
+            if len(best) >= num_prompts:
+                break
+        regen["received"] += len(best)
+    regen_seconds = time.perf_counter() - started
+    server.shutdown()
+
+    wanted = batches * num_prompts
+    print(f"{batches} batches of {num_prompts} prompts, 60% valid per reply")
+    for label, result, seconds in [
+        ("gap-filling follow-ups", totals, gap_fill_seconds),
+        ("full regeneration", regen, regen_seconds),
+    ]:
+        print(
+            f"  {label:<24}{result['received']:5d}/{wanted} prompts  "
+            f"{result['requests']:4d} requests  {result['tokens']:8d} tokens  "
+            f"{seconds:6.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Hot-path cost and log volume of the logging setup under concurrent load.
+
+Client threads log the same validation error parse_api_response emits for
+each invalid object, back to back. Compares the old synchronous basicConfig
+file handler with the queue-based, rate-limited JSON pipeline.
+
+Usage: python benchmarks/bench_logging.py [threads] [calls_per_thread]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import log_setup  # noqa: E402
+
+
+def log_invalid_object(name):
+    logging.error(f"Validation error: 'PromptText' is a required property ({name})")
+
+
+def load(threads, calls):
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        local = []
+        for _ in range(calls):
+            started = time.perf_counter()
+            log_invalid_object("P1")
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=client) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - started, np.array(latencies) * 1e6
+
+
+def log_size(path):
+    return sum(
+        os.path.getsize(os.path.join(path, name))
+        for name in os.listdir(path)
+        if name.startswith("app.log")
+    )
+
+
+def report(label, seconds, latencies, size):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(
+        f"{label:<20}wall {seconds:6.2f} s  p50 {p50:6.1f} us  p99 {p99:7.1f} us  "
+        f"log {size / 1024:9.1f} KB"
+    )
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    root = logging.getLogger()
+    log_setup.shutdown_logging()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "app.log")
+        handler = logging.FileHandler(path)
+        handler.setFormatter(logging.Formatter("%(asctime)s:%(levelname)s:%(message)s"))
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG)
+        seconds, latencies = load(threads, calls)
+        root.removeHandler(handler)
+        handler.close()
+        report("sync basicConfig", seconds, latencies, log_size(tmp))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_setup.configure_logging(os.path.join(tmp, "app.log"))
+        seconds, latencies = load(threads, calls)
+        stats = log_setup.log_stats()
+        log_setup.shutdown_logging()
+        report("queue + rate limit", seconds, latencies, log_size(tmp))
+        print(
+            f"  {stats['rate_limited']} records rate-limited, "
+            f"{stats['queue_full']} dropped on a full queue"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compare memory use of the prompt library in its compact columnar layout
+against the plain object-dtype DataFrame and list-of-dicts layouts.
+
+Usage: python benchmarks/bench_memory.py [rows]
+"""
+
+import os
+import random
+import sys
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import AVAILABLE_MODELS, compact_frame, iter_records  # noqa: E402
+
+CATEGORIES = [f"Category {i}" for i in range(200)]
+WORDS = [f"word{i}" for i in range(5000)]
+
+
+def make_library(rows, seed=0):
+    rng = random.Random(seed)
+    models = list(AVAILABLE_MODELS)
+    return pd.DataFrame(
+        {
+            "Letter": [rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rows)],
+            "Categories": [rng.choice(CATEGORIES) for _ in range(rows)],
+            "PromptName": [" ".join(rng.choices(WORDS, k=3)) for _ in range(rows)],
+            "PromptText": [" ".join(rng.choices(WORDS, k=60)) for _ in range(rows)],
+            "Model": [rng.choice(models) for _ in range(rows)],
+        }
+    ).astype(object)
+
+
+def traced_size(build):
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    scale = 100_000 / rows
+    baseline = make_library(rows)
+
+    compact = compact_frame(baseline)
+    _, dict_bytes = traced_size(lambda: baseline.to_dict(orient="records"))
+    _, record_bytes = traced_size(lambda: iter_records(compact))
+
+    print(f"rows: {rows}")
+    print(f"{'layout':<28}{'MB per 100k prompts':>22}")
+    layouts = [
+        ("object DataFrame", baseline.memory_usage(deep=True).sum()),
+        ("compact DataFrame", compact.memory_usage(deep=True).sum()),
+        ("list of dicts (extra)", dict_bytes),
+        ("PromptRecord list (extra)", record_bytes),
+    ]
+    for name, size in layouts:
+        print(f"{name:<28}{size * scale / 1e6:>22.1f}")
+
+    print("\nper column (MB per 100k prompts):")
+    object_usage = baseline.memory_usage(deep=True, index=False)
+    compact_usage = compact.memory_usage(deep=True, index=False)
+    for col in baseline.columns:
+        print(
+            f"  {col:<14}{object_usage[col] * scale / 1e6:>10.1f}"
+            f"{compact_usage[col] * scale / 1e6:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Serial vs process-pool rendering of a large HTML catalog, through
+generate_html_content and a cold-cache CatalogBuilder.
+
+Usage: python benchmarks/bench_parallel_render.py [rows] [workers ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_memory import make_library  # noqa: E402
+
+from build_catalog import CatalogBuilder  # noqa: E402
+from utils import compact_frame, generate_html_content  # noqa: E402
+
+
+def timed(label, render):
+    started = time.perf_counter()
+    result = render()
+    print(f"{label:<24}{(time.perf_counter() - started) * 1000:10.1f} ms")
+    return result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    worker_counts = [int(arg) for arg in sys.argv[2:]] or [2, 4, 8]
+    data = compact_frame(make_library(rows))
+    print(f"{rows} rows, {os.cpu_count()} CPUs")
+
+    serial = timed("serial", lambda: generate_html_content(data, False, "", "T"))
+    for workers in worker_counts:
+        parallel = timed(
+            f"{workers} workers",
+            lambda: generate_html_content(data, False, "", "T", workers=workers),
+        )
+        assert parallel == serial, "parallel output differs from serial output"
+
+    for workers in [1, *worker_counts]:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            builder = CatalogBuilder(cache_dir, workers=workers)
+            built = timed(
+                f"builder, {workers} workers",
+                lambda: builder.build(data, False, "T"),
+            )
+        assert built == serial, "builder output differs from serial output"
+
+
+if __name__ == "__main__":
+    main()
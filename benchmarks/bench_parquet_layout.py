@@ -0,0 +1,136 @@
+"""
+Load time and peak memory of the Parquet data file: the old default layout
+versus zstd, category-sorted row groups with column pruning and filters.
+
+Each read runs in a fresh subprocess, with the peak RSS counter (VmHWM)
+reset just before it, so the peak is attributable to that read (Linux only).
+
+The last section measures the app's real read path: unfiltered reads come
+from the memory-mapped snapshot, filtered ones from Parquet. "warm" is a
+second read in the same process, which is what most reruns do.
+
+Usage: python benchmarks/bench_parquet_layout.py [rows]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCENARIOS = {
+    "full read": {},
+    "catalog columns": {"columns": ["Categories", "PromptName"]},
+    "one prompt's text": {"columns": ["PromptText"], "filters": "selected"},
+}
+
+
+def measure(path, scenario, selected, mode):
+    import pandas as pd  # noqa: F401
+
+    import main as app
+    from utils import compact_frame
+
+    app.DATA_FILE = path
+    if mode == "parquet":
+        app.load_shared_snapshot = lambda: None
+    options = dict(SCENARIOS[scenario])
+    if options.get("filters"):
+        options["filters"] = [
+            ("Categories", "==", selected[0]),
+            ("PromptName", "==", selected[1]),
+        ]
+    compact_frame(pd.DataFrame({"a": ["x"]}))  # warm imports before measuring
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+    baseline = memory_kb("VmRSS")
+    started = time.perf_counter()
+    data = app.safe_load_data(**options)
+    seconds = time.perf_counter() - started
+    peak = memory_kb("VmHWM") - baseline
+    started = time.perf_counter()
+    app.safe_load_data(**options)
+    warm = time.perf_counter() - started
+    print(
+        json.dumps(
+            {
+                "seconds": seconds,
+                "warm": warm,
+                "peak_mb": peak / 1024,
+                "rows": len(data),
+            }
+        )
+    )
+
+
+def memory_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1])
+
+
+def main():
+    if sys.argv[1:2] == ["--measure"]:
+        measure(sys.argv[2], sys.argv[3], json.loads(sys.argv[4]), sys.argv[5])
+        return
+
+    import pandas as pd
+    from bench_memory import make_library
+
+    import main as app
+    from utils import PROMPT_SCHEMA, compact_frame
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    library = compact_frame(make_library(rows)[PROMPT_SCHEMA])
+    selected = library[["Categories", "PromptName"]].iloc[rows // 2].tolist()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path = os.path.join(tmp, "old.parquet")
+        library.to_parquet(old_path, index=False)
+        new_path = os.path.join(tmp, "new.parquet")
+        app.write_library(app.sort_for_storage(library), new_path)
+
+        app.DATA_FILE = new_path
+        app.snapshot.publish_snapshot(
+            compact_frame(pd.read_parquet(new_path)),
+            new_path,
+            source_stamp=app.data_file_stamp(),
+        )
+
+        print(f"{rows} rows")
+        for label, path, mode in [
+            ("default layout", old_path, "parquet"),
+            ("tuned layout", new_path, "parquet"),
+            ("app read path", new_path, "snapshot"),
+        ]:
+            size_mb = os.path.getsize(path) / 2**20
+            print(f"{label} ({size_mb:.1f} MB on disk)")
+            for scenario in SCENARIOS:
+                output = subprocess.run(
+                    [
+                        sys.executable,
+                        __file__,
+                        "--measure",
+                        path,
+                        scenario,
+                        json.dumps(selected),
+                        mode,
+                    ],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(
+                    f"  {scenario:<20}{result['seconds'] * 1000:9.1f} ms"
+                    f"{result['peak_mb']:9.1f} MB peak"
+                    f"{result['warm'] * 1000:9.1f} ms warm  {result['rows']} rows"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Upstream calls made by a burst of identical generation requests.
+
+Usage: python benchmarks/bench_single_flight.py [clients] [backend_delay_seconds]
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_backend import start_stub_backend  # noqa: E402
+
+import inflight  # noqa: E402
+import main as app  # noqa: E402
+
+
+def burst(clients, payload):
+    barrier = threading.Barrier(clients)
+
+    def client():
+        barrier.wait()
+        app.call_ai_api(payload)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    server, app.API_URL = start_stub_backend(delay)
+    payload = app.generate_api_payload("Generate 5 prompts", "stub", 500, 0.7)
+
+    seconds = burst(clients, payload)
+    stats = inflight.GENERATION_CALLS.stats()
+    print(
+        f"{clients} identical requests in {seconds * 1000:.0f} ms: "
+        f"{server.requests} upstream calls, {stats['coalesced']} coalesced"
+    )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
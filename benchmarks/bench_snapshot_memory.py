@@ -0,0 +1,84 @@
+"""
+Compare per-process memory of workers that load the library from Parquet
+against workers that memory-map the shared Arrow snapshot.
+
+RSS counts shared page-cache pages in every process; PSS splits them between
+the processes mapping them, so it shows what each worker really costs.
+
+Usage: python benchmarks/bench_snapshot_memory.py [rows] [workers]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+import snapshot  # noqa: E402
+from bench_memory import make_library  # noqa: E402
+from utils import compact_frame  # noqa: E402
+
+
+def memory_kb():
+    usage = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                usage[key] = int(rest.split()[0])
+    return usage
+
+
+def worker(mode, base_path, ready, done, results):
+    before = memory_kb()
+    if mode == "parquet":
+        data = compact_frame(pd.read_parquet(base_path))
+    else:
+        _, data = snapshot.load_snapshot(base_path)
+    # Touch every string so lazily mapped pages are actually faulted in.
+    total = int(data["PromptText"].str.len().sum())
+    ready.put(total)
+    done.wait()
+    after = memory_kb()
+    results.put({key: after[key] - before[key] for key in after})
+
+
+def measure(mode, base_path, workers):
+    ctx = multiprocessing.get_context("spawn")
+    ready, results, done = ctx.Queue(), ctx.Queue(), ctx.Event()
+    procs = [
+        ctx.Process(target=worker, args=(mode, base_path, ready, done, results))
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    for _ in procs:
+        ready.get()
+    # Sample while all workers hold the data so shared pages are split evenly.
+    done.set()
+    samples = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    return {key: sum(s[key] for s in samples) / workers / 1024 for key in samples[0]}
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = os.path.join(tmp, "prompt_data.parquet")
+        data = compact_frame(make_library(rows).drop(columns="Letter"))
+        data.to_parquet(base_path, index=False)
+        snapshot.publish_snapshot(data, base_path)
+
+        print(f"{rows} rows, {workers} workers (MB per worker)")
+        for mode in ("parquet", "snapshot"):
+            usage = measure(mode, base_path, workers)
+            print(f"{mode:<10} RSS {usage['Rss']:8.1f}   PSS {usage['Pss']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
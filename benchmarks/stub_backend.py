@@ -0,0 +1,80 @@
+"""
+Local stand-in for the chat completions API used by benchmarks.
+
+Replies to every POST with a canned completion containing ``num_prompts``
+valid prompt objects after an optional delay, or with whatever a custom
+``reply`` callable returns.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def completion(num_prompts=5, model="stub"):
+    prompts = [
+        {
+            "Letter": "S",
+            "PromptName": f"Stub Prompt {i}",
+            "Categories": "Stub",
+            "PromptText": f"Stub prompt text {i}.",
+        }
+        for i in range(num_prompts)
+    ]
+    return {
+        "model": model,
+        "choices": [{"message": {"content": json.dumps(prompts)}}],
+        "usage": {"prompt_tokens": 40, "completion_tokens": 30 * num_prompts},
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Seconds to wait before answering; override per server via ``delay``.
+    delay = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requests += 1
+        delay = self.server.delay
+        time.sleep(delay(payload) if callable(delay) else delay)
+        reply = self.server.reply or (
+            lambda payload: completion(model=payload.get("model", "stub"))
+        )
+        body = json.dumps(reply(payload)).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client aborted, e.g. a hedged request that lost the race.
+            with self.server.lock:
+                self.server.aborted += 1
+
+
+def start_stub_backend(delay=0.0, reply=None):
+    """
+    Start the stub in a background thread and return (server, url).
+
+    ``delay`` is either a number of seconds or a callable taking the request
+    payload and returning one. ``reply`` optionally maps the payload to the
+    completion to send. ``server.requests`` counts POSTs received and
+    ``server.aborted`` those whose client hung up before the reply.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.reply = reply
+    server.requests = 0
+    server.aborted = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}/v1/chat/completions"
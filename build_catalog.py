@@ -0,0 +1,434 @@
+"""
+Incremental static-site builder for HTML prompt catalogs.
+
+Renders each letter section and the categories modal as separate fragments,
+cached on disk under a content hash of their rows, and reassembles the page.
+Rebuilding after an edit only re-renders the sections whose rows changed;
+sections that merely moved are renumbered, not re-rendered.
+
+Usage:
+    python build_catalog.py prompts.csv more_prompts.json -o catalog.html
+    python build_catalog.py prompt_data.parquet --title "Prompt Library"
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from ingest import export_parser, parse_uploads
+from similarity import add_related_column
+from utils import (
+    PROMPT_SCHEMA,
+    compact_frame,
+    letter_groups,
+    merge_categories,
+    render_section_job,
+    render_page_head,
+    render_page_tail,
+)
+
+# Bump when the fragment renderers change so stale fragments are ignored.
+FRAGMENT_VERSION = "2"
+
+# Section fragments are rendered with row numbers relative to the section,
+# wrapped in this marker, and shifted to their page position at assembly.
+ID_MARK = "\0"
+FRAGMENT_NAME = re.compile(r"[0-9a-f]{64}(-\w+)?\.")
+
+DEFAULT_CACHE_DIR = ".catalog_cache"
+OPTION_1 = "Option 1: [Letter, Prompt Name, Category, Prompt Text]"
+OPTION_2 = "Option 2: [Letter, Persona Name, Category, ImageURL, Prompt Text]"
+RENDERED_FIELDS = [
+    "Letter",
+    "PromptName",
+    "PersonaName",
+    "Categories",
+    "ImageURL",
+    "PromptText",
+    "Related",
+]
+
+
+def _digest(*parts: object) -> str:
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(part if isinstance(part, bytes) else repr(part).encode())
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+def _text_columns(data: pd.DataFrame, fields: List[str]) -> List[pa.Array]:
+    """
+    Convert ``fields`` to plain Arrow large_string arrays for hashing.
+    """
+    columns = []
+    for field in fields:
+        array = pa.Array.from_pandas(data[field].astype("string[pyarrow]"))
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+        columns.append(array.cast(pa.large_string()))
+    return columns
+
+
+def _rows_digest(columns: List[pa.Array], positions: np.ndarray) -> bytes:
+    """
+    Hash the given rows straight from their Arrow buffers.
+
+    Only the exact offset and data ranges are hashed, so the result does not
+    depend on buffer padding or on rows outside ``positions``.
+    """
+    hasher = hashlib.sha256()
+    indices = pa.array(positions)
+    for column in columns:
+        array = column.take(indices)
+        offsets = np.frombuffer(array.buffers()[1], dtype=np.int64)
+        offsets = offsets[array.offset : array.offset + len(array) + 1]
+        data = array.buffers()[2]
+        hasher.update(array.is_null().to_numpy(zero_copy_only=False).tobytes())
+        hasher.update((offsets - offsets[0]).tobytes())
+        if data is not None:
+            hasher.update(memoryview(data)[offsets[0] : offsets[-1]])
+    return hasher.digest()
+
+
+def _contains_mark(column: pa.Array) -> bool:
+    """
+    Whether any value in a large_string column contains ``ID_MARK``.
+    """
+    offsets = np.frombuffer(column.buffers()[1], dtype=np.int64)
+    offsets = offsets[column.offset : column.offset + len(column) + 1]
+    data = column.buffers()[2]
+    if data is None:
+        return False
+    text = np.frombuffer(data, dtype=np.uint8)[offsets[0] : offsets[-1]]
+    return bool((text == ord(ID_MARK)).any())
+
+
+def _shift_ids(text: str, offset: Optional[int]) -> str:
+    """
+    Replace each ``ID_MARK``-wrapped row number in ``text`` with number + offset.
+
+    An offset of None means the text already holds absolute row numbers.
+    """
+    if offset is None:
+        return text
+    parts = text.split(ID_MARK)
+    parts[1::2] = [str(int(number) + offset) for number in parts[1::2]]
+    return "".join(parts)
+
+
+class FragmentCache:
+    """
+    Content-addressed store of rendered HTML fragments.
+
+    Section fragments are stored with relative row numbers and keep their
+    category map beside them, so a section can be placed at any row offset
+    and the categories modal rebuilt without re-rendering anything. A small
+    manifest maps each section key to a hash of that map.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+        try:
+            with open(self.manifest_path) as f:
+                self.manifest: Dict[str, str] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.manifest = {}
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    def html_path(self, key: str) -> str:
+        return self._path(key, ".html")
+
+    def has_html(self, key: str) -> bool:
+        return os.path.exists(self.html_path(key))
+
+    def put_html(self, key: str, html: str) -> None:
+        tmp_path = self._path(key, ".html.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp_path, self._path(key, ".html"))
+
+    def has_section(self, key: str) -> bool:
+        return key in self.manifest and os.path.exists(self._path(key, ".section"))
+
+    def put_section(self, key: str, html: str, categories: Dict) -> str:
+        categories_json = json.dumps(categories)
+        with open(self._path(key, ".json"), "w", encoding="utf-8") as f:
+            f.write(categories_json)
+        tmp_path = self._path(key, ".section.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp_path, self._path(key, ".section"))
+        self.manifest[key] = _digest(categories_json)
+        return self.manifest[key]
+
+    def get_categories(
+        self, key: str, offset: Optional[int]
+    ) -> Dict[str, List[Dict[str, str]]]:
+        with open(self._path(key, ".json"), encoding="utf-8") as f:
+            text = f.read()
+        if offset is not None:
+            # json.dumps escapes the marker, so renumber the escaped form.
+            text = _shift_ids(text.replace(json.dumps(ID_MARK)[1:-1], ID_MARK), offset)
+        return json.loads(text)
+
+    def place_section(self, key: str, offset: Optional[int]) -> str:
+        """
+        Return the key of section ``key`` renumbered to start at ``offset``.
+        """
+        placed_key = f"{key}-{offset}"
+        if not self.has_html(placed_key):
+            with open(self._path(key, ".section"), encoding="utf-8") as f:
+                self.put_html(placed_key, _shift_ids(f.read(), offset))
+        return placed_key
+
+    def prune(self, section_keys: Sequence[str], html_keys: Sequence[str]) -> int:
+        """
+        Delete manifest entries and fragment files not used by the given keys.
+        """
+        self.manifest = {key: self.manifest[key] for key in section_keys}
+        live = set(section_keys) | set(html_keys)
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if FRAGMENT_NAME.match(name) and name.split(".")[0] not in live:
+                os.remove(os.path.join(self.cache_dir, name))
+                removed += 1
+        return removed
+
+    def save_manifest(self) -> None:
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+
+class CatalogBuilder:
+    """
+    Render a prompt catalog from a DataFrame, reusing cached fragments.
+
+    Produces byte-for-byte the same page as ``generate_html_content``. Each
+    build prunes the fragments it did not use, so give every catalog its own
+    cache directory.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, workers: int = 1):
+        self.cache = FragmentCache(cache_dir)
+        self.workers = workers
+        self.stats: Dict[str, float] = {}
+
+    def assemble(
+        self,
+        data: pd.DataFrame,
+        has_image_url: bool,
+        header_title: str,
+        include_related: bool = False,
+    ) -> List[str]:
+        """
+        Render any missing fragments and return the page as an ordered list
+        of fragment file paths. Fragments the page no longer uses are pruned.
+        """
+        started = time.perf_counter()
+        data = data.reset_index(drop=True)
+        fields = [col for col in RENDERED_FIELDS if col in data.columns]
+        columns = _text_columns(data, fields)
+        flags = (FRAGMENT_VERSION, has_image_url, include_related, tuple(fields))
+        # Text containing the marker itself would be renumbered too, so such
+        # libraries fall back to sections keyed on their absolute position.
+        relative = not any(_contains_mark(column) for column in columns)
+
+        letters, groups = letter_groups(data)
+
+        head_key = _digest(
+            FRAGMENT_VERSION, "head", header_title, has_image_url, letters
+        )
+        if not self.cache.has_html(head_key):
+            self.cache.put_html(
+                head_key, render_page_head(header_title, has_image_url, letters)
+            )
+        parts = [head_key]
+
+        sections = []
+        missing: Dict[str, Tuple] = {}
+        entry_id = 1
+        for letter in letters:
+            positions = groups[letter]
+            start = 0 if relative else entry_id
+            key = _digest(flags, letter, start, _rows_digest(columns, positions))
+            if not self.cache.has_section(key):
+                missing[key] = (
+                    letter,
+                    data.iloc[positions],
+                    has_image_url,
+                    include_related,
+                    start,
+                    ID_MARK if relative else "",
+                )
+            sections.append((key, entry_id if relative else None))
+            entry_id += len(positions)
+
+        if self.workers > 1 and len(missing) > 1:
+            workers = min(self.workers, len(missing))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rendered = pool.map(render_section_job, missing.values())
+                for key, (html, categories) in zip(missing, rendered):
+                    self.cache.put_section(key, html, categories)
+        else:
+            for key, job in missing.items():
+                self.cache.put_section(key, *render_section_job(job))
+        parts.extend(self.cache.place_section(key, offset) for key, offset in sections)
+
+        tail_key = _digest(
+            FRAGMENT_VERSION,
+            "tail",
+            [(self.cache.manifest[key], offset) for key, offset in sections],
+        )
+        if not self.cache.has_html(tail_key):
+            categories_dict: Dict[str, List[Dict[str, str]]] = {}
+            for key, offset in sections:
+                merge_categories(
+                    categories_dict, self.cache.get_categories(key, offset)
+                )
+            self.cache.put_html(tail_key, render_page_tail(categories_dict))
+        parts.append(tail_key)
+
+        pruned = self.cache.prune([key for key, _ in sections], parts)
+        self.cache.save_manifest()
+        self.stats = {
+            "sections": len(letters),
+            "rendered": len(missing),
+            "pruned": pruned,
+            "seconds": time.perf_counter() - started,
+        }
+        return [self.cache.html_path(key) for key in parts]
+
+    def build(self, data: pd.DataFrame, *args: Any, **kwargs: Any) -> str:
+        """
+        Return the assembled page as a string.
+        """
+        parts = []
+        for path in self.assemble(data, *args, **kwargs):
+            with open(path, encoding="utf-8") as f:
+                parts.append(f.read())
+        return "".join(parts)
+
+    def write(self, output: str, data: pd.DataFrame, *args: Any, **kwargs: Any):
+        """
+        Assemble the page straight into ``output`` by copying fragment bytes.
+
+        The output is left alone when it is the file this cache last wrote
+        from the same fragments.
+        """
+        paths = self.assemble(data, *args, **kwargs)
+        record_path = os.path.join(self.cache.cache_dir, "output.json")
+        try:
+            with open(record_path) as f:
+                record = json.load(f)
+            stat = os.stat(output)
+            if record == [paths, stat.st_size, stat.st_mtime_ns]:
+                return
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+        tmp_path = f"{output}.tmp"
+        with open(tmp_path, "wb") as dst:
+            for path in paths:
+                with open(path, "rb") as src:
+                    shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, output)
+        stat = os.stat(output)
+        with open(record_path, "w") as f:
+            json.dump([paths, stat.st_size, stat.st_mtime_ns], f)
+
+
+def load_catalog_data(paths: Sequence[str], upload_option: str) -> pd.DataFrame:
+    """
+    Load catalog rows from CSV/JSON/zip uploads or a stored library file.
+    """
+    frames = []
+    uploads = []
+    for path in paths:
+        if path.endswith(".parquet"):
+            library = pd.read_parquet(path)[PROMPT_SCHEMA]
+            letters = library["PromptName"].str[:1].str.upper()
+            frames.append(compact_frame(library.assign(Letter=letters)))
+        else:
+            with open(path, "rb") as f:
+                uploads.append((os.path.basename(path), f.read()))
+
+    if uploads:
+        merged, summary = parse_uploads(
+            uploads,
+            parser=export_parser,
+            upload_option=upload_option,
+            has_image_url=upload_option == OPTION_2,
+        )
+        failed = summary[summary["Status"] == "error"]
+        for _, row in failed.iterrows():
+            print(f"skipped {row['File']}: {row['Error']}")
+        frames.append(merged)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("inputs", nargs="+", help="CSV, JSON, zip or Parquet files")
+    parser.add_argument("-o", "--output", default="catalog.html")
+    parser.add_argument("--title", help="Page title (defaults to the first file name)")
+    parser.add_argument(
+        "--personas",
+        action="store_true",
+        help="Inputs use the persona layout (Persona Name, ImageURL)",
+    )
+    parser.add_argument(
+        "--related", action="store_true", help="Add a Related Prompts column"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help="Fragments are cached in a subdirectory named after the output",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Render changed sections in this many processes",
+    )
+    args = parser.parse_args()
+
+    upload_option = OPTION_2 if args.personas else OPTION_1
+    data = load_catalog_data(args.inputs, upload_option)
+    if data.empty:
+        parser.error("no valid prompts found in the inputs")
+    if args.related:
+        name_key = "PersonaName" if args.personas else "PromptName"
+        data = add_related_column(data, name_key=name_key)
+
+    file_name = os.path.splitext(os.path.basename(args.inputs[0]))[0]
+    title = args.title or file_name.replace("_", " ").title()
+    output_name = os.path.splitext(os.path.basename(args.output))[0]
+    cache_dir = os.path.join(args.cache_dir, output_name)
+    builder = CatalogBuilder(cache_dir, workers=args.workers)
+    builder.write(args.output, data, args.personas, title, args.related)
+    print(
+        f"wrote {args.output}: {len(data)} prompts, "
+        f"{builder.stats['rendered']}/{builder.stats['sections']} sections rendered "
+        f"in {builder.stats['seconds'] * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
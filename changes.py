@@ -0,0 +1,298 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils import compact_frame, editable_frame
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only.
+    fcntl = None
+
+
+class VersionConflict(ValueError):
+    """
+    Raised when a save was based on a library version that is no longer
+    current.
+    """
+
+    def __init__(self, expected: int, current: int):
+        super().__init__(
+            f"The library changed since it was loaded (version {expected}, now "
+            f"{current}). Reload and re-apply your edits."
+        )
+        self.expected = expected
+        self.current = current
+
+
+class ChangeSet:
+    """
+    Row-level patch: cell edits and deletions by row position, plus new rows.
+
+    Positions refer to the library as it was at the version the change set
+    was made against. Applied in order: edits, deletions, additions.
+    """
+
+    def __init__(
+        self,
+        edited: Optional[Dict[int, Dict[str, Any]]] = None,
+        added: Optional[List[Dict[str, Any]]] = None,
+        deleted: Optional[List[int]] = None,
+    ):
+        self.edited = {int(pos): dict(row) for pos, row in (edited or {}).items()}
+        self.added = [dict(row) for row in (added or [])]
+        self.deleted = sorted({int(pos) for pos in (deleted or [])})
+
+    @classmethod
+    def from_editor(cls, state: Dict[str, Any]) -> "ChangeSet":
+        """
+        Build a change set from ``st.data_editor`` widget state.
+        """
+        return cls(
+            edited=state.get("edited_rows"),
+            added=state.get("added_rows"),
+            deleted=state.get("deleted_rows"),
+        )
+
+    @classmethod
+    def additions(cls, data: pd.DataFrame) -> "ChangeSet":
+        """
+        Build a change set that appends every row of ``data``.
+        """
+        rows = data.astype(object).where(data.notna(), None)
+        return cls(added=rows.to_dict(orient="records"))
+
+    @classmethod
+    def from_dict(cls, entry: Dict[str, Any]) -> "ChangeSet":
+        return cls(entry.get("edited"), entry.get("added"), entry.get("deleted"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "edited": {str(pos): row for pos, row in self.edited.items()},
+            "added": self.added,
+            "deleted": self.deleted,
+        }
+
+    def __len__(self) -> int:
+        return len(self.edited) + len(self.added) + len(self.deleted)
+
+    def __repr__(self) -> str:
+        return (
+            f"ChangeSet({len(self.edited)} edited, {len(self.added)} added, "
+            f"{len(self.deleted)} deleted)"
+        )
+
+    def validate(self, data: pd.DataFrame) -> None:
+        """
+        Check that every position and column exists in ``data``.
+        """
+        columns = set(data.columns)
+        positions = list(self.edited) + self.deleted
+        if positions and (min(positions) < 0 or max(positions) >= len(data)):
+            raise ValueError("Change set refers to rows that do not exist.")
+        unknown = {
+            col for row in [*self.edited.values(), *self.added] for col in row
+        } - columns
+        if unknown:
+            raise ValueError(f"Unknown columns in change set: {sorted(unknown)}")
+
+    def apply(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Return ``data`` with this change set applied.
+        """
+        if not len(self):
+            return data
+        self.validate(data)
+        data = editable_frame(data.reset_index(drop=True))
+
+        cells: Dict[str, Dict[int, Any]] = {}
+        for pos, row in self.edited.items():
+            for col, value in row.items():
+                cells.setdefault(col, {})[pos] = value
+        for col, values in cells.items():
+            column = data[col].copy()
+            column.iloc[list(values)] = list(values.values())
+            data[col] = column
+
+        if self.deleted:
+            keep = np.ones(len(data), dtype=bool)
+            keep[self.deleted] = False
+            data = data[keep]
+        if self.added:
+            added = pd.DataFrame.from_records(self.added, columns=data.columns)
+            data = pd.concat([data, editable_frame(added)], ignore_index=True)
+        return compact_frame(data.reset_index(drop=True))
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+# One re-entrant lock per log, so a holder can call other locked operations.
+_LOCKS: Dict[str, List[Any]] = {}
+_LOCKS_GUARD = threading.Lock()
+
+
+class PatchLog:
+    """
+    Append-only log of change sets kept beside a base data file, with a
+    version number that increases on every save.
+
+    The version and patch count live in ``{base}.version``, together with the
+    ledger of imported uploads so both are committed by the same atomic
+    replace; patches are JSON lines in ``{base}.patches.jsonl``. Writers hold
+    an exclusive lock on ``{base}.lock`` (flock across processes, an RLock
+    within one).
+    """
+
+    def __init__(self, base_path: str):
+        self.base_path = base_path
+        self.patch_path = f"{base_path}.patches.jsonl"
+        self.version_path = f"{base_path}.version"
+        self.lock_path = f"{base_path}.lock"
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        with _LOCKS_GUARD:
+            entry = _LOCKS.setdefault(self.lock_path, [threading.RLock(), 0, None])
+        with entry[0]:
+            entry[1] += 1
+            try:
+                if entry[1] == 1 and fcntl is not None:
+                    entry[2] = open(self.lock_path, "a")
+                    fcntl.flock(entry[2], fcntl.LOCK_EX)
+                yield
+            finally:
+                entry[1] -= 1
+                if entry[1] == 0 and entry[2] is not None:
+                    entry[2].close()  # closing releases the flock
+                    entry[2] = None
+
+    def state(self) -> Dict[str, Any]:
+        """
+        Return {"version", "patches"} and, once anything was imported,
+        "imports"; an untracked library is version 0.
+        """
+        try:
+            with open(self.version_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"version": 0, "patches": 0}
+
+    def version(self) -> int:
+        return self.state()["version"]
+
+    def imports(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the import ledger: {upload key: entry} for every committed
+        upload.
+        """
+        return self.state().get("imports", {})
+
+    def _write_state(
+        self,
+        state: Dict[str, Any],
+        version: int,
+        patches: int,
+        imports: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        new_state: Dict[str, Any] = {"version": version, "patches": patches}
+        ledger = {**state.get("imports", {})}
+        for key, entry in (imports or {}).items():
+            ledger[key] = {**entry, "version": version}
+        if ledger:
+            new_state["imports"] = ledger
+        tmp_path = f"{self.version_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(new_state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.version_path)
+
+    def append(
+        self,
+        changes: ChangeSet,
+        expected_version: Optional[int],
+        imports: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> int:
+        """
+        Append ``changes`` if the library is still at ``expected_version``
+        (None skips the check, e.g. for pure additions) and return the new
+        version. Cost depends only on the size of the change set.
+
+        ``imports`` ledger entries are committed together with the change
+        set: if the save is interrupted, neither counts.
+        """
+        with self.lock():
+            state = self.state()
+            if expected_version is not None and expected_version != state["version"]:
+                raise VersionConflict(expected_version, state["version"])
+            version = state["version"] + 1
+            entry = {"version": version, **changes.to_dict()}
+            with open(self.patch_path, "a+", encoding="utf-8") as f:
+                # Start on a fresh line if a crashed save left a torn one.
+                torn = f.tell() > 0 and not _ends_with_newline(self.patch_path)
+                f.write(("\n" if torn else "") + json.dumps(entry, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._write_state(state, version, state["patches"] + 1, imports)
+            return version
+
+    def read(self) -> List[ChangeSet]:
+        """
+        Return the pending change sets, oldest first.
+        """
+        state = self.state()
+        if not state["patches"]:
+            return []
+        first = state["version"] - state["patches"] + 1
+        by_version: Dict[int, ChangeSet] = {}
+        with open(self.patch_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn write from a crashed save
+                # Lines outside the committed range are leftovers from a save
+                # that crashed before updating the version file; a later
+                # line with the same version supersedes them.
+                if first <= entry["version"] <= state["version"]:
+                    by_version[entry["version"]] = ChangeSet.from_dict(entry)
+        return [by_version[v] for v in sorted(by_version)]
+
+    def recover(self, base_version: int) -> None:
+        """
+        Finish a rewrite of the base file that crashed before ``reset``: a
+        base written as a newer version than the log's already contains every
+        pending patch, so they are dropped. Call while holding the lock.
+        """
+        state = self.state()
+        if base_version > state["version"]:
+            self._write_state(state, base_version, 0)
+            if os.path.exists(self.patch_path):
+                os.remove(self.patch_path)
+
+    def reset(
+        self,
+        expected_version: Optional[int] = None,
+        imports: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> int:
+        """
+        Record that the base file was rewritten with every change applied:
+        bump the version and clear the patches, keeping the import ledger.
+        Call while holding the lock.
+        """
+        state = self.state()
+        if expected_version is not None and expected_version != state["version"]:
+            raise VersionConflict(expected_version, state["version"])
+        self._write_state(state, state["version"] + 1, 0, imports)
+        if os.path.exists(self.patch_path):
+            os.remove(self.patch_path)
+        return state["version"] + 1
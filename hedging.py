@@ -0,0 +1,199 @@
+import logging
+import socket
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils import AVAILABLE_MODELS, HEDGE_POLICIES
+
+# Recent latencies kept per model, and how many are needed before the learned
+# percentile replaces the policy's initial delay.
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 20
+
+# An attempt gets the model name and its own session, and returns a parsed,
+# valid result or raises.
+Attempt = Callable[[str, requests.Session], Any]
+
+
+class LatencyTracker:
+    """
+    Thread-safe sliding window of recent upstream latencies per model id.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=window)
+        )
+
+    def record(self, model_id: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[model_id].append(seconds)
+
+    def percentile(self, model_id: str, q: float) -> Optional[float]:
+        """
+        Return the ``q``-th percentile latency, or None with too few samples.
+        """
+        with self._lock:
+            samples = list(self._samples.get(model_id, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return float(np.percentile(samples, q))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+
+class _TrackingAdapter(HTTPAdapter):
+    """
+    Adapter that reports every connection it opens to its session.
+    """
+
+    def __init__(self, session: "CancellableSession"):
+        super().__init__()
+        self.session = session
+
+    def get_connection_with_tls_context(self, *args, **kwargs):
+        pool = super().get_connection_with_tls_context(*args, **kwargs)
+        if not getattr(pool, "_tracked", False):
+            new_conn = pool._new_conn
+
+            def tracked_new_conn():
+                conn = new_conn()
+                connect = conn.connect
+
+                def tracked_connect():
+                    connect()
+                    self.session._track(conn)
+
+                conn.connect = tracked_connect
+                return conn
+
+            pool._new_conn = tracked_new_conn
+            pool._tracked = True
+        return pool
+
+
+class CancellableSession(requests.Session):
+    """
+    Session whose in-flight requests can be aborted from another thread:
+    ``cancel`` shuts down their sockets, so a blocked read fails at once.
+    ``close`` alone would leave a request that is already running alone.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._connections: list = []
+        self.cancelled = False
+        for prefix in ("http://", "https://"):
+            self.mount(prefix, _TrackingAdapter(self))
+
+    def _track(self, conn) -> None:
+        with self._lock:
+            self._connections.append(conn)
+            cancelled = self.cancelled
+        if cancelled:
+            _abort(conn)
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            connections = list(self._connections)
+        for conn in connections:
+            _abort(conn)
+
+
+def _abort(conn) -> None:
+    sock = getattr(conn, "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # already closed
+
+
+# Shared by every session in the server process.
+LATENCIES = LatencyTracker()
+HEDGE_STATS = {"requests": 0, "hedged": 0, "backup_wins": 0}
+_STATS_LOCK = threading.Lock()
+
+
+def _count(key: str) -> None:
+    with _STATS_LOCK:
+        HEDGE_STATS[key] += 1
+
+
+def hedge_delay(model: str) -> Optional[float]:
+    """
+    Seconds to wait for ``model`` before hedging, or None if it has no policy.
+    """
+    policy = HEDGE_POLICIES.get(model)
+    if policy is None:
+        return None
+    learned = LATENCIES.percentile(AVAILABLE_MODELS[model]["id"], policy["percentile"])
+    return policy["initial_delay"] if learned is None else learned
+
+
+def hedged_call(model: str, attempt: Attempt) -> Any:
+    """
+    Run ``attempt`` for ``model``. If it hasn't succeeded within the model's
+    hedge delay, or fails first, the same attempt is also started for the
+    policy's backup model. The first successful result wins and the other
+    attempt's request is aborted by shutting down its socket.
+    """
+    delay = hedge_delay(model)
+    if delay is None:
+        with requests.Session() as session:
+            return attempt(model, session)
+
+    backup = HEDGE_POLICIES[model]["backup"]
+    sessions = {model: CancellableSession(), backup: CancellableSession()}
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hedge")
+    futures = {pool.submit(attempt, model, sessions[model]): model}
+    _count("requests")
+    try:
+        done, _ = wait(futures, timeout=delay)
+        if not done or next(iter(done)).exception() is not None:
+            logging.info(f"Hedging {model} with {backup} after {delay:.3f}s.")
+            futures[pool.submit(attempt, backup, sessions[backup])] = backup
+            _count("hedged")
+
+        errors = {}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if futures[future] == backup:
+                        _count("backup_wins")
+                    return future.result()
+                errors[futures[future]] = future.exception()
+        raise errors.get(model) or errors[backup]
+    finally:
+        # Abort the losing request rather than let it run to completion.
+        for session in sessions.values():
+            session.cancel()
+            session.close()
+        pool.shutdown(wait=False)
+
+
+def timed_post(
+    session: Any, url: str, payload: Dict[str, Any], **kwargs: Any
+) -> requests.Response:
+    """
+    POST ``payload`` and record the latency of successful responses.
+    """
+    started = time.perf_counter()
+    response = session.post(url, json=payload, **kwargs)
+    response.raise_for_status()
+    LATENCIES.record(payload["model"], time.perf_counter() - started)
+    return response
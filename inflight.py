@@ -0,0 +1,95 @@
+import copy
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict
+
+
+def payload_key(payload: Dict[str, Any]) -> str:
+    """
+    Hash a request payload canonically, so key order and whitespace don't
+    matter.
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Registry of in-flight calls: concurrent callers with the same key share
+    one execution of ``fn`` and all receive its result or exception.
+
+    Only calls that overlap in time are coalesced; nothing is cached once the
+    leading call returns.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # Followers get their own copy so nobody mutates a shared result.
+            return copy.deepcopy(call.result)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                waiters = call.waiters
+            try:
+                if waiters and call.error is None:
+                    # Snapshot before the leader gets the result back and can
+                    # mutate it; followers copy from the snapshot.
+                    call.result = copy.deepcopy(result)
+            except BaseException as e:
+                call.error = e
+            finally:
+                call.done.set()
+        return result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+
+# Upstream generation calls, shared by every session in the server process.
+GENERATION_CALLS = SingleFlight()
@@ -0,0 +1,345 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from utils import (
+    AVAILABLE_MODELS,
+    PROMPT_SCHEMA,
+    column_mapping_for,
+    compact_frame,
+    process_csv,
+    process_json,
+)
+
+# A stage takes the current batch plus the run options and returns the next batch.
+Stage = Callable[[Any, Dict[str, Any]], Any]
+
+UPLOAD_FORMATS = {
+    "CSV": "csv",
+    "text/csv": "csv",
+    "application/vnd.ms-excel": "csv",
+    "JSON": "json",
+    "application/json": "json",
+}
+
+DEFAULT_UPLOAD_OPTION = "Option 1: [Letter, Prompt Name, Category, Prompt Text]"
+
+
+def detect_format(upload_format: Optional[str], name: Optional[str] = None) -> str:
+    """
+    Resolve an upload option, MIME type or file name to "csv" or "json".
+    """
+    if upload_format in UPLOAD_FORMATS:
+        return UPLOAD_FORMATS[upload_format]
+    if name and name.lower().endswith((".csv", ".json")):
+        return name.lower().rsplit(".", 1)[1]
+    raise ValueError("Unsupported upload option.")
+
+
+# --- Default stages ---
+def read_stage(source: Any, options: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Read a CSV or JSON upload into a raw DataFrame.
+    """
+    file_format = detect_format(options.get("format"), options.get("name"))
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    if file_format == "csv":
+        return pd.read_csv(source)
+    records = json.loads(source.read())
+    if not isinstance(records, list):
+        raise ValueError("JSON uploads must contain a list of prompt objects.")
+    return pd.DataFrame.from_records(records)
+
+
+def map_columns_stage(batch: pd.DataFrame, options: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Rename upload headers to library column names.
+    """
+    return batch.rename(columns=column_mapping_for(options["upload_option"]))
+
+
+def normalize_stage(batch: pd.DataFrame, options: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Trim text, tidy category lists and turn blank cells into missing values.
+    """
+    text_columns = [
+        col for col in batch.columns if col in set(PROMPT_SCHEMA) | {"Letter"}
+    ]
+    batch = batch.astype({col: "string[pyarrow]" for col in text_columns})
+    for col in text_columns:
+        batch[col] = batch[col].str.strip().replace("", pd.NA)
+    if "Categories" in batch.columns:
+        batch["Categories"] = batch["Categories"].str.replace(
+            r"\s*,\s*", ", ", regex=True
+        )
+    return batch
+
+
+def validate_stage(batch: pd.DataFrame, options: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Reject batches that lack required columns or values.
+    """
+    required_columns = [
+        col
+        for col in column_mapping_for(options["upload_option"]).values()
+        if col in PROMPT_SCHEMA
+    ]
+    missing_columns = [col for col in required_columns if col not in batch.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns after renaming: {missing_columns}")
+
+    missing = batch[required_columns].isna()
+    if missing.to_numpy().any():
+        counts = missing.sum()
+        details = ", ".join(f"{col}: {n}" for col, n in counts.items() if n)
+        raise ValueError(f"Missing values in required columns ({details}).")
+    return batch
+
+
+def enrich_stage(batch: pd.DataFrame, options: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Fill in the model and shape the batch to exactly PROMPT_SCHEMA.
+    """
+    model = options.get("model") or next(iter(AVAILABLE_MODELS))
+    if "Model" in batch.columns:
+        batch = batch.assign(Model=batch["Model"].fillna(model))
+    else:
+        batch = batch.assign(Model=model)
+    return compact_frame(batch[PROMPT_SCHEMA].reset_index(drop=True))
+
+
+def persist_stage(batch: pd.DataFrame, options: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Default persist stage: hand the batch back without storing it.
+    """
+    return batch
+
+
+class IngestionPipeline:
+    """
+    Staged ingestion: read -> map_columns -> normalize -> validate -> enrich ->
+    persist. Every stage works on a whole DataFrame batch and can be swapped
+    out by name; each run records per-stage wall time in ``timings``.
+    """
+
+    STAGE_NAMES = ("read", "map_columns", "normalize", "validate", "enrich", "persist")
+    DEFAULT_STAGES: Dict[str, Stage] = {
+        "read": read_stage,
+        "map_columns": map_columns_stage,
+        "normalize": normalize_stage,
+        "validate": validate_stage,
+        "enrich": enrich_stage,
+        "persist": persist_stage,
+    }
+
+    def __init__(self, **stages: Stage):
+        unknown = set(stages) - set(self.STAGE_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown ingestion stages: {sorted(unknown)}")
+        self.stages = {**self.DEFAULT_STAGES, **stages}
+        self.timings: Dict[str, float] = {}
+
+    def with_stage(self, name: str, stage: Stage) -> "IngestionPipeline":
+        return IngestionPipeline(**{**self.stages, name: stage})
+
+    def run(self, source: Any, start: str = "read", **options: Any) -> Any:
+        """
+        Run ``source`` through the pipeline from stage ``start`` onwards.
+        """
+        options.setdefault("upload_option", DEFAULT_UPLOAD_OPTION)
+        self.timings = {}
+        batch = source
+        for name in self.STAGE_NAMES[self.STAGE_NAMES.index(start) :]:
+            started = time.perf_counter()
+            batch = self.stages[name](batch, options)
+            self.timings[name] = time.perf_counter() - started
+        logging.info(
+            "Ingestion timings: %s",
+            ", ".join(
+                f"{name}={secs * 1000:.1f}ms" for name, secs in self.timings.items()
+            ),
+        )
+        return batch
+
+
+# --- Bulk ingestion ---
+Upload = Tuple[str, bytes]
+Parser = Callable[[str, bytes, Dict[str, Any]], pd.DataFrame]
+
+
+def expand_uploads(uploads: Iterable[Upload]) -> List[Upload]:
+    """
+    Flatten zip archives into their CSV/JSON members.
+    """
+    members = []
+    for name, data in uploads:
+        if not name.lower().endswith(".zip"):
+            members.append((name, data))
+            continue
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            for info in archive.infolist():
+                member = info.filename
+                if info.is_dir() or member.startswith("__MACOSX/"):
+                    continue
+                if member.lower().endswith((".csv", ".json")):
+                    members.append((f"{name}/{member}", archive.read(info)))
+    return members
+
+
+def pipeline_parser(name: str, data: bytes, options: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Parse one upload into library rows (PROMPT_SCHEMA) without persisting it.
+    """
+    return IngestionPipeline().run(data, name=name, **options)
+
+
+def export_parser(name: str, data: bytes, options: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Parse one upload with process_csv/process_json, keeping every export column.
+    """
+    upload_option = options.get("upload_option", DEFAULT_UPLOAD_OPTION)
+    has_image_url = options.get("has_image_url", False)
+    if detect_format(None, name) == "csv":
+        return process_csv(pd.read_csv(io.BytesIO(data)), has_image_url, upload_option)
+    return process_json(json.loads(data), has_image_url, upload_option)
+
+
+def _parse_member(job: Tuple[Parser, str, bytes, Dict[str, Any]]):
+    parser, name, data, options = job
+    started = time.perf_counter()
+    try:
+        frame, error = parser(name, data, options), None
+    except Exception as e:
+        frame, error = None, str(e)
+    return name, frame, error, time.perf_counter() - started
+
+
+def parse_uploads(
+    uploads: Iterable[Upload],
+    parser: Parser = pipeline_parser,
+    max_workers: Optional[int] = None,
+    **options: Any,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Parse and validate many uploads in a process pool.
+
+    Returns the merged rows of every file that parsed cleanly and a per-file
+    summary with row counts, timings and error messages.
+    """
+    jobs = [(parser, name, data, options) for name, data in expand_uploads(uploads)]
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Small chunks keep every worker busy for a handful of files;
+            # larger ones cut IPC overhead when there are thousands.
+            chunksize = max(1, len(jobs) // (workers * 4))
+            results = list(pool.map(_parse_member, jobs, chunksize=chunksize))
+    else:
+        results = [_parse_member(job) for job in jobs]
+
+    frames, summary = [], []
+    for name, frame, error, seconds in results:
+        if error is None:
+            frames.append(frame)
+        else:
+            logging.error("Failed to ingest %s: %s", name, error)
+        summary.append(
+            {
+                "File": name,
+                "Status": "error" if error else "ok",
+                "Rows": 0 if frame is None else len(frame),
+                "Seconds": round(seconds, 3),
+                "Error": error or "",
+            }
+        )
+
+    merged = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    columns = ["File", "Status", "Rows", "Seconds", "Error"]
+    return compact_frame(merged), pd.DataFrame(summary, columns=columns)
+
+
+def upload_key(data: bytes) -> str:
+    """
+    Content hash identifying an upload in the import ledger.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def ledger_entries(
+    uploads: List[Upload], keys: List[str], summary: pd.DataFrame
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Build import ledger entries for the uploads that produced rows.
+    """
+    imported_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    entries = {}
+    for (name, _), key in zip(uploads, keys):
+        files = summary[
+            (summary["File"] == name) | summary["File"].str.startswith(f"{name}/")
+        ]
+        rows = int(files.loc[files["Status"] == "ok", "Rows"].sum())
+        if rows:
+            entries[key] = {
+                "name": name,
+                "rows": rows,
+                "errors": int((files["Status"] == "error").sum()),
+                "imported_at": imported_at,
+            }
+    return entries
+
+
+def ingest_uploads(
+    uploads: Iterable[Upload],
+    persist: Stage,
+    max_workers: Optional[int] = None,
+    imported: Optional[Dict[str, Dict[str, Any]]] = None,
+    **options: Any,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Parse uploads in parallel, then persist every valid row in one write.
+
+    Uploads whose content hash is in the ``imported`` ledger, or repeats a
+    file earlier in the batch, are skipped. The persist stage receives ledger
+    entries for the rest in ``options["imports"]``, to record them in the
+    same write as their rows.
+    """
+    imported = imported or {}
+    fresh, keys, skipped = [], [], []
+    for name, data in uploads:
+        key = upload_key(data)
+        entry = imported.get(key)
+        if entry is None and key not in keys:
+            fresh.append((name, data))
+            keys.append(key)
+            continue
+        skipped.append(
+            {
+                "File": name,
+                "Status": "skipped",
+                "Rows": entry["rows"] if entry else 0,
+                "Seconds": 0.0,
+                "Error": (
+                    f"already imported {entry['imported_at']}"
+                    if entry
+                    else "duplicate of another file in this upload"
+                ),
+            }
+        )
+
+    merged, summary = parse_uploads(fresh, max_workers=max_workers, **options)
+    if not merged.empty:
+        options["imports"] = ledger_entries(fresh, keys, summary)
+        persist(merged, options)
+    if skipped:
+        summary = pd.concat([summary, pd.DataFrame(skipped)], ignore_index=True)
+    return merged, summary
@@ -0,0 +1,242 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+# Records waiting for the listener thread. When the queue is full new records
+# are dropped and counted rather than blocking the caller.
+QUEUE_SIZE = 10_000
+
+# Per call site: let ``burst`` records through per ``period`` seconds, then
+# keep one in ``sample_every`` until the window resets.
+RATE_LIMIT_BURST = 20
+RATE_LIMIT_PERIOD = 60.0
+RATE_LIMIT_SAMPLE_EVERY = 100
+
+# Standard LogRecord attributes; anything else was passed via ``extra``.
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as single-line JSON objects.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "where": f"{record.module}:{record.lineno}",
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Rate-limit records per call site (file and line), so a hot error path
+    can't flood the log. Records that pass after some were dropped carry a
+    ``suppressed`` count.
+    """
+
+    def __init__(
+        self,
+        burst: int = RATE_LIMIT_BURST,
+        period: float = RATE_LIMIT_PERIOD,
+        sample_every: int = RATE_LIMIT_SAMPLE_EVERY,
+        min_level: int = logging.DEBUG,
+    ):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self.sample_every = sample_every
+        self.min_level = min_level
+        self._lock = threading.Lock()
+        # call site -> [window start, seen in window, dropped since last pass]
+        self._sites: Dict[Tuple[str, int], list] = {}
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level:
+            return True
+        key = (record.pathname, record.lineno)
+        now = record.created
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.period:
+                suppressed = site[2] if site else 0
+                site = self._sites[key] = [now, 0, 0]
+            else:
+                suppressed = site[2]
+            site[1] += 1
+            seen = site[1]
+            if seen > self.burst and (seen - self.burst) % self.sample_every:
+                site[2] += 1
+                self.dropped += 1
+                return False
+            site[2] = 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that drops records when the queue is full instead of
+    reporting an error for each one.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_LISTENER: Optional[logging.handlers.QueueListener] = None
+
+
+def file_handler(
+    filename: str,
+    max_bytes: int = 10 * 2**20,
+    backup_count: int = 5,
+    when: Optional[str] = None,
+) -> logging.Handler:
+    """
+    Return a JSON-lines file handler that rotates by size, or by time when
+    ``when`` is given (e.g. "midnight", "H").
+    """
+    if when:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            filename, when=when, backupCount=backup_count, encoding="utf-8"
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def configure_logging(
+    filename: str = "app.log",
+    level: Union[int, str] = logging.INFO,
+    rate_limit: bool = True,
+    **rotation,
+) -> NonBlockingQueueHandler:
+    """
+    Route the root logger through a bounded queue to a background listener
+    that writes rotating JSON lines to ``filename``.
+
+    Safe to call on every Streamlit rerun: only the first call installs the
+    pipeline, later calls return the existing queue handler.
+    """
+    global _LISTENER
+    root = logging.getLogger()
+    for handler in root.handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            return handler
+
+    log_queue: queue.Queue = queue.Queue(QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    if rate_limit:
+        queue_handler.addFilter(RateLimitFilter(min_level=logging.WARNING))
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _LISTENER = logging.handlers.QueueListener(
+        log_queue, file_handler(filename, **rotation), respect_handler_level=True
+    )
+    _LISTENER.start()
+    atexit.register(shutdown_logging)
+    return queue_handler
+
+
+def shutdown_logging() -> None:
+    """
+    Flush queued records and stop the listener thread.
+    """
+    global _LISTENER
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, NonBlockingQueueHandler):
+            root.removeHandler(handler)
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        for handler in _LISTENER.handlers:
+            handler.close()
+        _LISTENER = None
+
+
+def _log_directly_after_fork() -> None:
+    """
+    In a forked child (e.g. a ProcessPoolExecutor worker) the queue is copied
+    but the listener thread is not, and the queue's lock may have been held
+    mid-fork. Swap the queue handler for direct appends to the same files.
+    """
+    global _LISTENER
+    listener, _LISTENER = _LISTENER, None
+    if listener is None:
+        return
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if not isinstance(handler, NonBlockingQueueHandler):
+            continue
+        root.removeHandler(handler)
+        for target in listener.handlers:
+            # Rotation stays with the parent; a watched handler reopens the
+            # file after the parent rotates it.
+            direct = logging.handlers.WatchedFileHandler(
+                target.baseFilename, encoding="utf-8"
+            )
+            direct.setFormatter(target.formatter)
+            direct.setLevel(target.level)
+            for limiter in handler.filters:
+                if isinstance(limiter, RateLimitFilter):
+                    direct.addFilter(
+                        RateLimitFilter(
+                            limiter.burst,
+                            limiter.period,
+                            limiter.sample_every,
+                            limiter.min_level,
+                        )
+                    )
+            root.addHandler(direct)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_log_directly_after_fork)
+
+
+def log_stats() -> Dict[str, int]:
+    """
+    Return how many records were rate-limited or dropped on a full queue.
+    """
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            limited = sum(
+                f.dropped for f in handler.filters if isinstance(f, RateLimitFilter)
+            )
+            return {
+                "queued": handler.queue.qsize(),
+                "rate_limited": limited,
+                "queue_full": handler.dropped,
+            }
+    return {"queued": 0, "rate_limited": 0, "queue_full": 0}
@@ -2,56 +2,428 @@ import json
 import logging
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import requests
 import streamlit as st
 from jsonschema import ValidationError, validate
 
-from utils import AVAILABLE_MODELS, process_csv, process_json
+import hedging
+import inflight
+import profiling
+import search
+import similarity
+import snapshot
+import templates
+from changes import ChangeSet, PatchLog, VersionConflict
+from ingest import IngestionPipeline, ingest_uploads
+from log_setup import configure_logging
+from utils import (
+    AVAILABLE_MODELS,
+    HEDGE_POLICIES,
+    PROMPT_SCHEMA,
+    compact_frame,
+    editable_frame,
+    row_fingerprints,
+)
 
 # --- Logging Configuration ---
-logging.basicConfig(
-    filename="app.log",
-    level=logging.DEBUG,
-    format="%(asctime)s:%(levelname)s:%(message)s",
-)
+configure_logging("app.log", level=os.getenv("LOG_LEVEL", "INFO"))
 
 # --- Constants ---
 DATA_FILE = "prompt_data.parquet"
+SEARCH_INDEX_FILE = "prompt_data.search.pkl"
+TFIDF_MATRIX_FILE = "prompt_data.tfidf.npz"
 ADMIN_PASSWORD = "admin123"
+API_URL = os.getenv(
+    "OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions"
+)
 
-PROMPT_SCHEMA = ["Categories", "PromptName", "PromptText", "Model"]
 DEFAULT_COLUMNS = pd.Index(PROMPT_SCHEMA, dtype="object")
+# Columns the user page needs for every row; PromptText is fetched per prompt.
+CATALOG_COLUMNS = ["Categories", "PromptName"]
+# Rows are stored sorted by category in row groups of this size, so the
+# per-group min/max statistics let category filters skip most of the file.
+ROW_GROUP_ROWS = 64 * 1024
+DICTIONARY_COLUMNS = ["Categories", "Model"]
+# Admin saves append row-level patches; once this many are pending, the next
+# save folds them into a rewrite of the data file.
+COMPACT_AFTER = 100
+# Parquet metadata key holding the library version a data file was written as.
+BASE_VERSION_KEY = b"library_version"
+GENERATION_TEMPLATE = templates.PromptTemplate(
+    "Generate {{num_prompts}} prompts about '{{topic}}' based on '{{prompt_name}}'."
+)
+# When a response has fewer valid prompts than asked for, only the missing
+# ones are requested again, in requests of up to FOLLOW_UP_CHUNK prompts run
+# FOLLOW_UP_WORKERS at a time, for at most FOLLOW_UP_ROUNDS rounds.
+FOLLOW_UP_TEMPLATE = templates.PromptTemplate(
+    "Generate {{num_prompts}} more prompts about '{{topic}}' based on "
+    "'{{prompt_name}}'. Do not repeat these prompt names: {{accepted}}."
+)
+FOLLOW_UP_ROUNDS = 2
+FOLLOW_UP_CHUNK = 5
+FOLLOW_UP_WORKERS = 4
+# Allowed generation settings, shared by the UI widgets and the HTTP API.
+GENERATION_LIMITS = {
+    "num_prompts": (1, 20),
+    "max_tokens": (50, 1000),
+    "creativity": (0.0, 1.0),
+}
 
 
 # --- Utility Functions ---
-def safe_load_data():
+def safe_load_data(columns=None, filters=None):
     """
     Safely load prompt data from Parquet or return an empty DataFrame.
+
+    ``columns`` prunes the read to those columns and ``filters`` (pyarrow
+    DNF filters, e.g. [("Categories", "==", "Writing")]) selects rows,
+    skipping row groups whose statistics rule them out.
+
+    Unfiltered reads come from the memory-mapped snapshot when it is current
+    (zero-copy, ~1 ms warm for 1M rows). Filtered reads go to Parquet, where
+    row-group pruning beats scanning the snapshot (~100 ms vs ~130-250 ms and
+    a tenth of the memory), unless patches are pending and only the snapshot
+    or a replay has them.
     """
+    expected = columns or PROMPT_SCHEMA
+    pushdown = (
+        filters and os.path.exists(DATA_FILE) and not patch_log().state()["patches"]
+    )
+    data = None if pushdown else load_shared_snapshot()
+    if data is not None:
+        if filters:
+            data = data[filter_mask(data, filters)].reset_index(drop=True)
+        return data[expected] if columns else data
     try:
+        if os.path.exists(DATA_FILE) and patch_log().state()["patches"]:
+            data = load_patched_library()
+            if filters:
+                data = data[filter_mask(data, filters)].reset_index(drop=True)
+            return data[expected] if columns else data
         if os.path.exists(DATA_FILE):
-            data = pd.read_parquet(DATA_FILE)
-            if list(data.columns) != PROMPT_SCHEMA:
+            data = pd.read_parquet(
+                DATA_FILE,
+                columns=columns,
+                filters=filters,
+                # Decode straight to categoricals instead of millions of
+                # strings, except where a dictionary type would stop filters
+                # from using row-group statistics.
+                read_dictionary=[
+                    col
+                    for col in DICTIONARY_COLUMNS
+                    if col in expected and not any(col == f[0] for f in filters or ())
+                ],
+            )
+            if list(data.columns) != expected:
                 raise ValueError("Schema mismatch detected.")
-            return data
-        return pd.DataFrame([], columns=DEFAULT_COLUMNS)
+            return compact_frame(data)
+        return empty_library()[expected]
     except Exception as e:
         logging.error(f"Error loading data: {e}")
-        return pd.DataFrame([], columns=DEFAULT_COLUMNS)
+        return empty_library()[expected]
+
+
+def filter_mask(data, filters):
+    """
+    Evaluate conjunctive ("column", "==" | "in", value) filters in memory.
+    """
+    mask = np.ones(len(data), dtype=bool)
+    for column, op, value in filters:
+        if op == "==":
+            mask &= (data[column] == value).to_numpy(dtype=bool, na_value=False)
+        elif op == "in":
+            mask &= data[column].isin(value).to_numpy(dtype=bool, na_value=False)
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+    return mask
+
+
+def load_prompt_text(category, prompt_name):
+    """
+    Fetch the PromptText of the first prompt with this category and name.
+    """
+    rows = safe_load_data(
+        columns=["PromptText"],
+        filters=[("Categories", "==", category), ("PromptName", "==", prompt_name)],
+    )
+    if rows.empty or pd.isna(rows["PromptText"].iloc[0]):
+        return None
+    return rows["PromptText"].iloc[0]
+
+
+def full_library(data):
+    """
+    Return ``data`` if it has every library column, else load the library.
+    """
+    if set(PROMPT_SCHEMA) <= set(data.columns):
+        return data
+    return safe_load_data()
+
+
+def load_shared_snapshot():
+    """
+    Return the memory-mapped snapshot of the current data file, or None.
+    """
+    stamp = data_file_stamp()
+    if stamp is None:
+        return None
+    try:
+        loaded = snapshot.load_snapshot(DATA_FILE, source_stamp=stamp)
+    except Exception as e:
+        logging.error(f"Error loading snapshot: {e}")
+        return None
+    if loaded is None or list(loaded[1].columns) != PROMPT_SCHEMA:
+        return None
+    return loaded[1]
+
+
+def patch_log():
+    return PatchLog(DATA_FILE)
 
 
-def save_data_to_parquet(data):
+def library_version():
+    return patch_log().version()
+
+
+def load_patched_library():
     """
-    Save data to a Parquet file.
+    Read the data file, replay the pending patches and publish the result as
+    the shared snapshot.
     """
+    log = patch_log()
+    with log.lock():
+        log.recover(base_file_version())
+        data = compact_frame(pd.read_parquet(DATA_FILE))
+        if list(data.columns) != PROMPT_SCHEMA:
+            raise ValueError("Schema mismatch detected.")
+        for changes in log.read():
+            data = changes.apply(data)
+        stamp = data_file_stamp()
+    try:
+        snapshot.publish_snapshot(data, DATA_FILE, source_stamp=stamp)
+    except Exception as e:
+        logging.error(f"Failed to publish snapshot: {e}")
+    return data
+
+
+def load_versioned_library():
+    """
+    Return (version, data) for a consistent view of the library.
+    """
+    while True:
+        version = library_version()
+        data = safe_load_data()
+        if library_version() == version:
+            return version, data
+
+
+def empty_library():
+    return compact_frame(pd.DataFrame([], columns=DEFAULT_COLUMNS))
+
+
+def save_data_to_parquet(data, expected_version=None, imports=None):
+    """
+    Save data to a Parquet file and publish a shared snapshot of it.
+
+    Replaces the whole library and clears pending patches. With
+    ``expected_version``, raises VersionConflict if the library changed.
+    ``imports`` are upload ledger entries to record with this save.
+    """
+    data = sort_for_storage(compact_frame(data))
+    log = patch_log()
+    with log.lock():
+        log.recover(base_file_version())
+        current = log.version()
+        if expected_version is not None and expected_version != current:
+            raise VersionConflict(expected_version, current)
+        try:
+            # Write beside the target and swap it in so readers never see a
+            # half-written file and a failed save leaves the old data intact.
+            # The file records the version it becomes, so a crash before the
+            # log is reset can't replay patches the file already contains.
+            tmp_file = f"{DATA_FILE}.tmp"
+            write_library(data, tmp_file, version=current + 1)
+            os.replace(tmp_file, DATA_FILE)
+            version = log.reset(imports=imports)
+            logging.info(f"Data successfully saved to Parquet (version {version}).")
+        except Exception as e:
+            logging.error(f"Failed to save data: {e}")
+            raise
+        stamp = data_file_stamp()
     try:
-        data.to_parquet(DATA_FILE, index=False)
-        logging.info("Data successfully saved to Parquet.")
+        snapshot.publish_snapshot(data, DATA_FILE, source_stamp=stamp)
     except Exception as e:
-        logging.error(f"Failed to save data: {e}")
-        raise
+        logging.error(f"Failed to publish snapshot: {e}")
+    try:
+        update_search_index(data)
+    except Exception as e:
+        logging.error(f"Failed to update search index: {e}")
+    try:
+        update_related_matrix(data)
+    except Exception as e:
+        logging.error(f"Failed to update TF-IDF matrix: {e}")
+    return version
+
+
+def save_changes(changes, expected_version=None, base=None, imports=None):
+    """
+    Append a row-level change set to the library and return the new version.
+
+    Edits and deletions address rows by position, so they need the
+    ``expected_version`` they were made against; ``base`` (the library at
+    that version) is used to validate them. Cost depends on the size of the
+    change set, not the library, except when the patch log is compacted.
+
+    ``imports`` ({upload key: entry}) are recorded in the import ledger by
+    the same commit, and uploads already in the ledger are refused.
+    """
+    if (changes.edited or changes.deleted) and expected_version is None:
+        raise ValueError("Edits and deletions need the version they were made on.")
+    if base is not None:
+        changes.validate(base)
+    log = patch_log()
+    with log.lock():
+        duplicates = set(imports or ()) & set(log.imports())
+        if duplicates:
+            names = sorted(log.imports()[key]["name"] for key in duplicates)
+            raise ValueError(f"Already imported: {', '.join(names)}")
+        if not os.path.exists(DATA_FILE):
+            return save_data_to_parquet(
+                changes.apply(empty_library()), expected_version, imports
+            )
+        log.recover(base_file_version())
+        version = log.append(changes, expected_version, imports)
+        logging.info(f"Saved {changes} as library version {version}.")
+        if log.state()["patches"] >= COMPACT_AFTER:
+            version = compact_library()
+    return version
+
+
+def compact_library():
+    """
+    Rewrite the data file with every pending patch applied.
+    """
+    log = patch_log()
+    with log.lock():
+        return save_data_to_parquet(load_patched_library())
+
+
+def write_library(data, path, version=None):
+    """
+    Write ``data`` as zstd-compressed Parquet with column statistics,
+    recording the library ``version`` it is the base of.
+
+    Category columns are written as plain strings: Parquet still
+    dictionary-encodes them, but row-group statistics are only used to skip
+    groups for filters on non-dictionary Arrow columns.
+    """
+    table = pa.Table.from_pandas(editable_frame(data), preserve_index=False)
+    if version is not None:
+        table = table.replace_schema_metadata(
+            {**table.schema.metadata, BASE_VERSION_KEY: str(version).encode()}
+        )
+    pq.write_table(
+        table,
+        path,
+        compression="zstd",
+        row_group_size=ROW_GROUP_ROWS,
+        write_statistics=True,
+    )
+
+
+def base_file_version():
+    """
+    Return the library version recorded in the data file (0 if none).
+    """
+    try:
+        metadata = pq.read_schema(DATA_FILE).metadata or {}
+    except FileNotFoundError:
+        return 0
+    return int(metadata.get(BASE_VERSION_KEY, 0))
+
+
+def sort_for_storage(data):
+    """
+    Order rows by category (stable) so each category spans few row groups.
+    """
+    if data.empty:
+        return data
+    order = np.argsort(data["Categories"].astype(str).to_numpy(), kind="stable")
+    return data.iloc[order].reset_index(drop=True)
+
+
+def data_file_stamp():
+    """
+    Return (mtime, size, version) of the library, or None if there is no
+    data file. The version changes on every save, including patches.
+    """
+    try:
+        stat = os.stat(DATA_FILE)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, library_version()
+
+
+def update_search_index(data):
+    """
+    Incrementally re-index changed prompts and persist the index.
+    """
+    index = search.load_index(SEARCH_INDEX_FILE)
+    added, removed = index.update(data)
+    index.source_stamp = data_file_stamp()
+    search.save_index(index, SEARCH_INDEX_FILE)
+    logging.info(f"Search index updated: {added} added, {removed} removed.")
+    return index
+
+
+def search_prompts(data, query, limit=20):
+    """
+    Rank prompts in ``data`` against ``query`` with BM25.
+    """
+    index = search.load_index(SEARCH_INDEX_FILE)
+    if index.source_stamp is None or index.source_stamp != data_file_stamp():
+        index = update_search_index(full_library(data))
+    hits = index.search(query, limit=limit)
+    results = data.iloc[[position for position, _ in hits]].copy()
+    results["Score"] = [round(score, 3) for _, score in hits]
+    return results
+
+
+def update_related_matrix(data):
+    """
+    Append new prompts to the TF-IDF matrix and persist it.
+    """
+    matrix = similarity.load_matrix(TFIDF_MATRIX_FILE)
+    added, removed = matrix.update(data)
+    matrix.source_stamp = data_file_stamp()
+    similarity.save_matrix(matrix, TFIDF_MATRIX_FILE)
+    logging.info(f"TF-IDF matrix updated: {added} added, {removed} removed.")
+    return matrix
+
+
+def related_prompts(data, position, k=5, text=None):
+    """
+    Return the ``k`` prompts most similar to the row at ``position``.
+
+    Pass the row's ``text`` when ``data`` was loaded without PromptText.
+    """
+    matrix = similarity.load_matrix(TFIDF_MATRIX_FILE)
+    if matrix.source_stamp is None or matrix.source_stamp != data_file_stamp():
+        matrix = update_related_matrix(full_library(data))
+    if text is None:
+        query, query_position = data, position
+    else:
+        query, query_position = pd.DataFrame({"PromptText": [text]}), 0
+    neighbours = matrix.most_similar([query_position], query, k=k)[0]
+    results = data.iloc[[pos for pos, _ in neighbours]].copy()
+    results["Similarity"] = [round(score, 3) for _, score in neighbours]
+    return results
 
 
 # Define the expected schema for a valid prompt response
@@ -81,7 +453,7 @@ def parse_api_response(response_text):
                     validate(instance=obj, schema=RESPONSE_SCHEMA)
                     parsed_data.append(obj)
                 except ValidationError as e:
-                    logging.error(f"Validation error: {e}")
+                    logging.error(f"Validation error: {e.message}")
         return parsed_data
     except json.JSONDecodeError:
         # Fallback: Extract potential JSON objects using regex
@@ -92,23 +464,28 @@ def parse_api_response(response_text):
                 validate(instance=obj_parsed, schema=RESPONSE_SCHEMA)
                 parsed_data.append(obj_parsed)
             except (json.JSONDecodeError, ValidationError) as e:
-                logging.error(f"Skipping invalid object: {e}")
+                logging.error(f"Skipping invalid object: {getattr(e, 'message', e)}")
     return parsed_data
 
 
-def upload_and_process_file(uploaded_file, upload_option):
-    if upload_option == "CSV":
-        df = pd.read_csv(uploaded_file)
-        processed_data = process_csv(df, has_image_url=False, upload_option="Option 1")
-    elif upload_option == "JSON":
-        data_json = json.loads(uploaded_file.read())
-        processed_data = process_json(
-            data_json, has_image_url=False, upload_option="Option 1"
-        )
-    else:
-        raise ValueError("Unsupported upload option.")
+def upload_and_process_file(uploaded_file, upload_option, pipeline=None):
+    """
+    Run an upload through the ingestion pipeline and return the new rows.
+    """
+    pipeline = pipeline or IngestionPipeline()
+    return pipeline.run(
+        uploaded_file, format=upload_option, name=getattr(uploaded_file, "name", None)
+    )
+
 
-    return pd.DataFrame(processed_data)  # Ensure return type is DataFrame
+def append_to_library(new_data, options=None):
+    """
+    Persist stage: append a validated batch to the stored library and record
+    its uploads in the import ledger.
+    """
+    imports = (options or {}).get("imports")
+    save_changes(ChangeSet.additions(new_data[PROMPT_SCHEMA]), imports=imports)
+    return new_data
 
 
 def generate_api_payload(prompt, model_id, max_tokens, creativity):
@@ -120,18 +497,209 @@ def generate_api_payload(prompt, model_id, max_tokens, creativity):
     }
 
 
-def call_ai_api(payload):
+def generate_api_payloads(prompts, model_id, max_tokens, creativity):
+    """
+    Build one API payload per rendered prompt, e.g. from ``render_batch``.
+    """
+    return [
+        generate_api_payload(prompt, model_id, max_tokens, creativity)
+        for prompt in prompts
+    ]
+
+
+def prompt_template(data, position, text=None):
+    """
+    Return the compiled template for the prompt at ``position``.
+    """
+    prompt_id = str(row_fingerprints(data.iloc[[position]], PROMPT_SCHEMA[:2])[0])
+    if text is None:
+        text = data["PromptText"].iloc[position]
+    return templates.compile_template(prompt_id, "" if pd.isna(text) else text)
+
+
+def call_ai_api(payload, key=None):
     """
     Make a call to the AI API.
+
+    Concurrent calls with the same ``key`` (by default, an identical payload)
+    share one upstream request.
     """
+    return inflight.GENERATION_CALLS.do(
+        key or inflight.payload_key(payload), lambda: post_payload(payload)
+    )
+
+
+def post_payload(payload, session=None):
     headers = {"Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY')}"}
-    response = requests.post(
-        "https://openrouter.ai/api/v1/chat/completions", json=payload, headers=headers
+    response = hedging.timed_post(
+        session or requests, API_URL, payload, headers=headers
     )
-    response.raise_for_status()
     return response.json()
 
 
+def generate_prompts(
+    topic, selected_prompt, model, num_prompts, max_tokens, creativity, hedge=False
+):
+    """
+    Ask the AI API for ``num_prompts`` prompts and return the valid ones.
+
+    With ``hedge``, a slow or failing request is raced against the model's
+    backup from HEDGE_POLICIES and the first valid result wins.
+    """
+    return generate_prompt_batch(
+        topic, selected_prompt, model, num_prompts, max_tokens, creativity, hedge
+    )[0]
+
+
+def generate_prompt_batch(
+    topic,
+    selected_prompt,
+    model,
+    num_prompts,
+    max_tokens,
+    creativity,
+    hedge=False,
+    follow_up_rounds=None,
+):
+    """
+    Generate ``num_prompts`` prompts, filling any shortfall with follow-up
+    requests for just the missing ones, and return (prompts, usage).
+
+    ``usage`` counts requests and tokens, including ``full_tokens``: what
+    the first, full-batch request cost, i.e. what regenerating would cost.
+    """
+    if follow_up_rounds is None:
+        follow_up_rounds = FOLLOW_UP_ROUNDS
+    model_id = AVAILABLE_MODELS[model]["id"]
+    prompt = GENERATION_TEMPLATE.render(
+        num_prompts=num_prompts, topic=topic, prompt_name=selected_prompt
+    )
+    payload = generate_api_payload(prompt, model_id, max_tokens, creativity)
+    generated, tokens = request_prompts(payload, model, hedge)
+    accepted, names = [], set()
+    add_unique_prompts(accepted, names, generated, limit=None)
+    usage = {
+        "requested": num_prompts,
+        "requests": 1,
+        "follow_up_rounds": 0,
+        "full_tokens": tokens,
+        "follow_up_tokens": 0,
+    }
+
+    for _ in range(follow_up_rounds):
+        missing = num_prompts - len(accepted)
+        if missing <= 0:
+            break
+        chunks = [
+            min(FOLLOW_UP_CHUNK, missing - start)
+            for start in range(0, missing, FOLLOW_UP_CHUNK)
+        ]
+        accepted_names = ", ".join(f"'{p['PromptName']}'" for p in accepted)
+        payloads = [
+            generate_api_payload(
+                FOLLOW_UP_TEMPLATE.render(
+                    num_prompts=count,
+                    topic=topic,
+                    prompt_name=selected_prompt,
+                    accepted=accepted_names or "none",
+                ),
+                model_id,
+                max_tokens,
+                creativity,
+            )
+            for count in chunks
+        ]
+        workers = min(len(payloads), FOLLOW_UP_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Equal chunks have identical payloads; the chunk number in the
+            # coalescing key stops single-flight from giving them one reply.
+            results = list(
+                pool.map(
+                    lambda job: follow_up_request(job[1], model, hedge, chunk=job[0]),
+                    enumerate(payloads),
+                )
+            )
+        usage["requests"] += len(payloads)
+        usage["follow_up_rounds"] += 1
+        for generated, tokens in results:
+            usage["follow_up_tokens"] += tokens
+            add_unique_prompts(accepted, names, generated, limit=num_prompts)
+
+    usage["received"] = len(accepted)
+    if usage["follow_up_rounds"]:
+        logging.info(
+            f"Follow-ups filled {len(accepted)}/{num_prompts} prompts with "
+            f"{usage['requests'] - 1} requests and {usage['follow_up_tokens']} "
+            f"tokens; a full regeneration costs ~{usage['full_tokens']}."
+        )
+    return accepted, usage
+
+
+def add_unique_prompts(accepted, names, generated, limit):
+    """
+    Append prompts whose name hasn't been seen, up to ``limit`` in total.
+    """
+    for prompt in generated:
+        if limit is not None and len(accepted) >= limit:
+            return
+        name = prompt["PromptName"].strip().casefold()
+        if name not in names:
+            names.add(name)
+            accepted.append(prompt)
+
+
+def request_prompts(payload, model, hedge=False, chunk=None):
+    """
+    Send one generation request and return (valid prompts, tokens used).
+
+    ``chunk`` tells apart identical follow-up requests that must not be
+    coalesced into one.
+    """
+    extra = {} if chunk is None else {"follow_up_chunk": chunk}
+    if not hedge:
+        key = inflight.payload_key({**payload, **extra}) if extra else None
+        response = call_ai_api(payload, key=key)
+        return (
+            parse_api_response(response["choices"][0]["message"]["content"]),
+            response_tokens(response),
+        )
+
+    def attempt(model_name, session):
+        model_payload = {**payload, "model": AVAILABLE_MODELS[model_name]["id"]}
+        response = post_payload(model_payload, session)
+        generated = parse_api_response(response["choices"][0]["message"]["content"])
+        if not generated:
+            raise ValueError(f"{model_name} returned no valid prompts.")
+        return generated, response_tokens(response)
+
+    return inflight.GENERATION_CALLS.do(
+        inflight.payload_key({**payload, **extra, "hedge": True}),
+        lambda: hedging.hedged_call(model, attempt),
+    )
+
+
+def follow_up_request(payload, model, hedge, chunk):
+    """
+    Like request_prompts, but a failed follow-up only costs its prompts.
+    """
+    try:
+        return request_prompts(payload, model, hedge, chunk)
+    except Exception as e:
+        logging.error(f"Follow-up generation failed: {e}")
+        return [], 0
+
+
+def response_tokens(response):
+    """
+    Total tokens billed for a completion, from its "usage" block if present.
+    """
+    usage = response.get("usage") or {}
+    return int(
+        usage.get("total_tokens")
+        or usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+    )
+
+
 # --- Admin Interface ---
 def admin_interface():
     st.title("🔒 Admin Interface")
@@ -140,64 +708,209 @@ def admin_interface():
         return
 
     st.success("Access Granted! Welcome, Admin.")
-    data = safe_load_data()
+    with profiling.phase("load"):
+        version, data = load_versioned_library()
+    if "admin_notice" in st.session_state:
+        st.success(st.session_state.pop("admin_notice"))
 
     # File Upload Section
-    uploaded_file = st.file_uploader("Upload CSV or JSON", type=["csv", "json"])
-    if uploaded_file:
+    uploaded_files = st.file_uploader(
+        "Upload CSV, JSON or ZIP files",
+        type=["csv", "json", "zip"],
+        accept_multiple_files=True,
+    )
+    if uploaded_files:
         try:
-            processed_data = upload_and_process_file(uploaded_file, uploaded_file.type)
-            new_data = pd.DataFrame(processed_data, columns=DEFAULT_COLUMNS)
-            updated_data = pd.concat([data, new_data], ignore_index=True)
-            save_data_to_parquet(updated_data)
-            st.success("Data successfully uploaded and updated.")
+            uploads = [(f.name, f.getvalue()) for f in uploaded_files]
+            # Files stay in the uploader across reruns; the ledger makes
+            # processing them again a no-op.
+            new_data, summary = ingest_uploads(
+                uploads, persist=append_to_library, imported=patch_log().imports()
+            )
+            if new_data.empty and (summary["Status"] == "skipped").all():
+                st.info("These files were already imported.")
+            else:
+                st.success(f"Uploaded {len(new_data)} prompts.")
+            st.dataframe(summary, hide_index=True)
+            if not new_data.empty:
+                st.session_state.pop("editor_base", None)
+                version, data = load_versioned_library()
         except Exception as e:
             st.error(f"Error: {e}")
 
+    imports = patch_log().imports()
+    if imports:
+        with st.expander(f"Import History ({len(imports)} files)"):
+            history = pd.DataFrame.from_dict(imports, orient="index")
+            st.dataframe(history.rename_axis("sha256").reset_index(), hide_index=True)
+
     # Data Editor Section
     if not data.empty:
         st.subheader("Manage Existing Prompts")
-        edited_data = st.data_editor(data)
-        if st.button("Save Changes"):
-            save_data_to_parquet(edited_data)
-            st.success("Changes saved successfully.")
+        library_editor(version, data)
+
+
+def library_editor(version, data):
+    """
+    Edit the library as it was when editing started and save only the
+    changed rows, refusing if another admin saved in the meantime.
+    """
+    # Pin the version the edits are made against; the widget key changes
+    # whenever the pin does, so stale edits are discarded with it.
+    if "editor_base" not in st.session_state:
+        st.session_state["editor_base"] = (version, data)
+        st.session_state["editor_generation"] = (
+            st.session_state.get("editor_generation", 0) + 1
+        )
+    base_version, base = st.session_state["editor_base"]
+    key = f"library_editor_{st.session_state['editor_generation']}"
+    if base_version != version:
+        st.warning(
+            f"The library changed since you started editing (version "
+            f"{base_version}, now {version})."
+        )
+    st.data_editor(editable_frame(base), key=key, num_rows="dynamic")
+
+    col1, col2 = st.columns(2)
+    save, reload = col1.button("Save Changes"), col2.button("Reload Library")
+    if reload:
+        del st.session_state["editor_base"]
+        st.rerun()
+    if not save:
+        return
+    changes = ChangeSet.from_editor(st.session_state[key])
+    if not len(changes):
+        st.info("No changes to save.")
+        return
+    try:
+        saved = save_changes(changes, expected_version=base_version, base=base)
+    except VersionConflict as e:
+        st.error(str(e))
+        return
+    except ValueError as e:
+        st.error(f"Error: {e}")
+        return
+    del st.session_state["editor_base"]
+    st.session_state["admin_notice"] = (
+        f"Saved {len(changes)} row changes (version {saved})."
+    )
+    st.rerun()
 
 
 # --- User Interface ---
 def user_interface():
     st.title("🧠 Custom Prompt Generator")
-    data = safe_load_data()
+    with profiling.phase("load"):
+        data = safe_load_data(columns=CATALOG_COLUMNS)
+
+    # Full-text Search
+    query = st.text_input("Search Prompts:")
+    if query:
+        with profiling.phase("filter"):
+            results = search_prompts(data, query)
+        if results.empty:
+            st.info("No prompts match your search.")
+        else:
+            st.dataframe(results, hide_index=True)
 
     # User Inputs
-    selected_category = st.selectbox(
-        "Select Category", sorted(data["Categories"].dropna().unique())
-    )
-
-    selected_prompt = st.selectbox(
-        "Select Prompt",
-        sorted(
-            pd.Series(data.loc[data["Categories"] == selected_category, "PromptName"])
-            .dropna()
-            .unique()
-        ),
-    )
+    with profiling.phase("filter"):
+        categories = sorted(data["Categories"].dropna().unique())
+    selected_category = st.selectbox("Select Category", categories)
+
+    with profiling.phase("filter"):
+        in_category = data["Categories"] == selected_category
+        prompt_names = sorted(
+            pd.Series(data.loc[in_category, "PromptName"]).dropna().unique()
+        )
+    selected_prompt = st.selectbox("Select Prompt", prompt_names)
+
+    with profiling.phase("filter"):
+        matches = np.flatnonzero(in_category & (data["PromptName"] == selected_prompt))
+    with profiling.phase("load"):
+        text = load_prompt_text(selected_category, selected_prompt)
+    with profiling.phase("filter"):
+        related = None
+        if len(matches) and text is not None:
+            related = related_prompts(data, matches[0], text=text)
+    if related is not None and not related.empty:
+        with st.expander("Related Prompts"):
+            st.dataframe(
+                related[["PromptName", "Categories", "Similarity"]],
+                hide_index=True,
+            )
 
     topic = st.text_input("Enter Topic:")
     model = st.selectbox("Select AI Model", AVAILABLE_MODELS.keys())
-    num_prompts = st.number_input("Number of Prompts", 1, 20, 5)
-    max_tokens = st.slider("Max Tokens", 50, 1000, 500, step=50)
-    creativity = st.slider("Creativity", 0.0, 1.0, 0.7, step=0.1)
+    num_prompts = st.number_input(
+        "Number of Prompts", *GENERATION_LIMITS["num_prompts"], 5
+    )
+    max_tokens = st.slider("Max Tokens", *GENERATION_LIMITS["max_tokens"], 500, step=50)
+    creativity = st.slider(
+        "Creativity", *GENERATION_LIMITS["creativity"], 0.7, step=0.1
+    )
+    hedge = False
+    if model in HEDGE_POLICIES:
+        hedge = st.checkbox(
+            f"Fall back to {HEDGE_POLICIES[model]['backup']} if slow", value=True
+        )
+
+    # Prompt Templates
+    with profiling.phase("filter"):
+        template = None
+        if len(matches) and text is not None:
+            template = prompt_template(data, matches[0], text)
+    if template is not None and not template.is_static:
+        with st.expander("Prompt Template"):
+            values = {name: st.text_input(name) for name in template.variables}
+            if all(values.values()):
+                st.code(template.render(values), language=None)
+
+            variable_file = st.file_uploader("Variable sets (CSV)", type=["csv"])
+            if variable_file:
+                try:
+                    rendered = template.render_batch(pd.read_csv(variable_file))
+                    payloads = generate_api_payloads(
+                        rendered,
+                        AVAILABLE_MODELS[model]["id"],
+                        max_tokens,
+                        creativity,
+                    )
+                    st.success(f"Rendered {len(payloads)} prompts.")
+                    st.download_button(
+                        "Download API Payloads",
+                        "\n".join(json.dumps(payload) for payload in payloads),
+                        file_name="payloads.jsonl",
+                    )
+                except Exception as e:
+                    st.error(f"Error: {e}")
 
     # Generate Prompts
     if st.button("Generate Prompts"):
         try:
-            prompt = f"Generate {num_prompts} prompts about '{topic}' based on '{selected_prompt}'."
-            payload = generate_api_payload(
-                prompt, AVAILABLE_MODELS[model]["id"], max_tokens, creativity
-            )
-            response = call_ai_api(payload)
-            generated = parse_api_response(response["choices"][0]["message"]["content"])
+            with profiling.phase("api"):
+                generated, usage = generate_prompt_batch(
+                    topic,
+                    selected_prompt,
+                    model,
+                    num_prompts,
+                    max_tokens,
+                    creativity,
+                    hedge=hedge,
+                )
             st.write(pd.DataFrame(generated))
+            if usage["received"] < num_prompts:
+                st.warning(
+                    f"Only {usage['received']} of {num_prompts} prompts were "
+                    f"valid after {usage['follow_up_rounds']} follow-up rounds."
+                )
+            if usage["follow_up_rounds"]:
+                st.caption(
+                    f"Missing prompts were requested again in "
+                    f"{usage['requests'] - 1} follow-up requests using "
+                    f"{usage['follow_up_tokens']} tokens; regenerating the whole "
+                    f"batch would have used about {usage['full_tokens']}."
+                )
         except Exception as e:
             st.error(f"Error: {e}")
 
@@ -206,10 +919,11 @@ def user_interface():
 def main():
     st.set_page_config(page_title="Custom Prompt Generator", page_icon="🧠")
     page = st.sidebar.selectbox("Navigation", ["User Interface", "Admin Interface"])
-    if page == "User Interface":
-        user_interface()
-    else:
-        admin_interface()
+    with profiling.rerun(page):
+        if page == "User Interface":
+            user_interface()
+        else:
+            admin_interface()
 
 
 if __name__ == "__main__":
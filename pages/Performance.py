@@ -0,0 +1,98 @@
+# pages/Performance.py
+
+import streamlit as st
+
+import profiling
+from log_setup import log_stats
+from main import ADMIN_PASSWORD, safe_load_data
+
+
+def rerun_timings():
+    st.subheader("Rerun Timings")
+    enabled = st.toggle("Record phase timings", value=profiling.is_enabled())
+    profiling.set_enabled(enabled)
+    if not enabled:
+        st.caption("Instrumentation is off and costs nothing.")
+        return
+
+    reruns = profiling.recent_reruns()
+    if reruns.empty:
+        st.info("No reruns recorded yet. Use the app, then come back.")
+        return
+    timing_columns = [col for col in reruns.columns if col.endswith("_ms")]
+    st.dataframe(
+        reruns[timing_columns]
+        .describe(percentiles=[0.5, 0.95])
+        .loc[["mean", "50%", "95%", "max"]]
+    )
+    st.dataframe(reruns, hide_index=True)
+    if st.button("Clear Timings"):
+        profiling.clear_reruns()
+        st.rerun()
+
+
+def profiler():
+    st.subheader("Profiler")
+    mode = st.radio("Profiler", ["cprofile", "sampling"], horizontal=True)
+    reruns = st.number_input("Profile the next N reruns", 1, 100, 5)
+    if st.button("Start Profiling"):
+        profiling.set_enabled(True)
+        profiling.request_profile(mode, reruns)
+
+    status = profiling.profile_status()
+    if status["mode"] is None:
+        return
+    st.caption(
+        f"{status['mode']}: {status['profiled']} reruns profiled, "
+        f"{status['remaining']} to go."
+    )
+    if status["mode"] == "cprofile" and status["profiled"]:
+        st.code(profiling.cprofile_report(), language=None)
+        st.download_button(
+            "Download Stats (.prof)", profiling.cprofile_dump(), "reruns.prof"
+        )
+    elif status["mode"] == "sampling" and status["samples"]:
+        st.dataframe(profiling.sampling_report(), hide_index=True)
+        st.download_button(
+            "Download Collapsed Stacks",
+            profiling.sampling_dump(),
+            "reruns.collapsed.txt",
+        )
+
+
+def memory():
+    st.subheader("Memory")
+    tracing = st.toggle("Trace allocations (tracemalloc)")
+    if tracing:
+        profiling.start_tracemalloc()
+        compare = st.checkbox("Show growth since the previous snapshot")
+        if st.button("Take Snapshot"):
+            st.dataframe(profiling.top_allocators(compare=compare), hide_index=True)
+    else:
+        profiling.stop_tracemalloc()
+
+    data = safe_load_data()
+    usage = profiling.frame_memory(data)
+    st.caption(f"Prompt library: {len(data)} rows, {usage['mb'].sum():.2f} MB")
+    st.dataframe(usage, hide_index=True)
+
+
+def main():
+    st.title("⏱️ Performance")
+    if st.text_input("Enter Admin Password:", type="password") != ADMIN_PASSWORD:
+        st.error("Incorrect Password. Access Denied.")
+        return
+
+    rerun_timings()
+    profiler()
+    memory()
+
+    stats = log_stats()
+    st.caption(
+        f"Logging: {stats['queued']} records queued, {stats['rate_limited']} "
+        f"rate-limited, {stats['queue_full']} dropped on a full queue."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
 # pages/Prompt_Data_Uploader.py
 
 import streamlit as st
-import pandas as pd
-import json
 import base64
 import os
-from utils import process_csv, process_json, generate_html_content
+from ingest import export_parser, parse_uploads
+from similarity import add_related_column
+from utils import generate_html_content
 
 def main():
     st.title("📥 Prompt Data Uploader")
@@ -20,29 +20,55 @@ def main():
 
     has_image_url = upload_option == "Option 2: [Letter, Persona Name, Category, ImageURL, Prompt Text]"
 
-    uploaded_file = st.file_uploader("Upload your CSV or JSON file", type=["csv", "json"])
+    include_related = st.checkbox("Add a Related Prompts column")
+    workers = st.number_input(
+        "Render processes",
+        min_value=1,
+        max_value=os.cpu_count() or 1,
+        value=1,
+        help="Render letter sections of large catalogs in parallel processes.",
+    )
+
+    uploaded_files = st.file_uploader(
+        "Upload your CSV, JSON or ZIP files",
+        type=["csv", "json", "zip"],
+        accept_multiple_files=True,
+    )
 
-    if uploaded_file is not None:
+    if uploaded_files:
         # Extract the file name without extension for the header title
-        file_name = uploaded_file.name
+        file_name = uploaded_files[0].name
         header_title = os.path.splitext(file_name)[0].replace('_', ' ').title()
 
         try:
-            if uploaded_file.type == "application/json":
-                data = json.load(uploaded_file)
-                data = process_json(data, has_image_url, upload_option)
-                st.write("Processed JSON Data:")
-                st.write(pd.DataFrame(data))  # Debugging statement
-            else:
-                df = pd.read_csv(uploaded_file)
-                st.write("Uploaded CSV Data:")
-                st.write(df)  # Debugging statement
-                data = process_csv(df, has_image_url, upload_option)
-                st.write("Processed CSV Data:")
-                st.write(pd.DataFrame(data))  # Debugging statement
+            uploads = [(f.name, f.getvalue()) for f in uploaded_files]
+            data, summary = parse_uploads(
+                uploads,
+                parser=export_parser,
+                has_image_url=has_image_url,
+                upload_option=upload_option,
+            )
+            st.write("Files Processed:")
+            st.dataframe(summary, hide_index=True)
+            if data.empty:
+                st.error("No valid prompts found in the uploaded files.")
+                return
+            st.write("Processed Data:")
+            st.write(data)  # Debugging statement
+
+            if include_related:
+                name_key = "PersonaName" if has_image_url else "PromptName"
+                data = add_related_column(data, name_key=name_key)
 
             # Generate HTML content
-            html_content = generate_html_content(data, has_image_url, theme="light", header_title=header_title)
+            html_content = generate_html_content(
+                data,
+                has_image_url,
+                theme="light",
+                header_title=header_title,
+                include_related=include_related,
+                workers=int(workers),
+            )
 
             # Provide download link for the generated HTML
             b64 = base64.b64encode(html_content.encode()).decode()
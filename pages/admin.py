@@ -1,24 +1,74 @@
+import os
 import streamlit as st
 import pandas as pd
+from changes import ChangeSet, PatchLog, VersionConflict
 from utils import AVAILABLE_MODELS
 
+DATA_FILE = 'prompt_data.pkl'
+# Pending patches are folded into a rewrite of the pickle after this many.
+COMPACT_AFTER = 100
+
 def load_data():
-    try:
-        with open('prompt_data.pkl', 'rb') as f:
-            data = pd.read_pickle(f)
-        return data
-    except FileNotFoundError:
-        return pd.DataFrame(columns=["Categories", "PromptName", "PromptText", "Model"])
-
-def save_data(data):
-    data.to_pickle('prompt_data.pkl')
+    """
+    Return (version, data): the pickled library with pending patches applied.
+    """
+    log = PatchLog(DATA_FILE)
+    with log.lock():
+        try:
+            with open(DATA_FILE, 'rb') as f:
+                data = pd.read_pickle(f).reset_index(drop=True)
+        except FileNotFoundError:
+            data = pd.DataFrame(columns=["Categories", "PromptName", "PromptText", "Model"])
+        # The pickle records the version it was written as; see save_data.
+        log.recover(data.attrs.get("library_version", 0))
+        version = log.version()
+        for changes in log.read():
+            data = changes.apply(data)
+    return version, data
+
+def save_data(changes, version):
+    """
+    Append only the changed rows. Returns False, after showing an error, if
+    another admin saved since ``version`` was loaded.
+    """
+    log = PatchLog(DATA_FILE)
+    with log.lock():
+        try:
+            log.append(changes, expected_version=version)
+        except VersionConflict as e:
+            st.error(str(e))
+            return False
+        # The next rerun loads, and pins, the version just written.
+        st.session_state.pop("admin_base", None)
+        if not os.path.exists(DATA_FILE) or log.state()["patches"] >= COMPACT_AFTER:
+            _, data = load_data()
+            # Swap in a complete file, tagged with the version it becomes so
+            # a crash before the reset doesn't replay the patches it holds.
+            data.attrs["library_version"] = log.version() + 1
+            tmp_file = f"{DATA_FILE}.tmp"
+            data.to_pickle(tmp_file)
+            os.replace(tmp_file, DATA_FILE)
+            log.reset()
     st.success("Data saved successfully!")
+    return True
 
 def admin_interface():
     st.title("🔐 Admin Interface")
 
-    # Load existing data
-    data = load_data()
+    # Load existing data. A form submit is itself a rerun, so pin the version
+    # the forms were built from and save against that, not a fresh load.
+    if "admin_base" not in st.session_state:
+        st.session_state["admin_base"] = load_data()
+    version, data = st.session_state["admin_base"]
+    current_version = PatchLog(DATA_FILE).version()
+    if current_version != version:
+        st.warning(
+            f"The prompts changed since this page was loaded (version "
+            f"{version}, now {current_version}). Reload before editing."
+        )
+    if st.button("Reload Prompts"):
+        del st.session_state["admin_base"]
+        st.rerun()
 
     # Display existing prompts
     st.subheader("Existing Prompts")
@@ -43,12 +93,10 @@ def admin_interface():
                     "PromptText": prompt_text,
                     "Model": model
                 }
-                if isinstance(data, pd.DataFrame):
-                    data = pd.concat([data, pd.DataFrame([new_row])], ignore_index=True)
-                else:
-                    data = pd.DataFrame([new_row])
-                save_data(data)
-                st.success("New prompt added successfully!")
+                changes = ChangeSet(added=[new_row])
+                if save_data(changes, version):
+                    data = changes.apply(data)
+                    st.success("New prompt added successfully!")
             else:
                 st.error("Please fill in all fields.")
 
@@ -65,18 +113,26 @@ def admin_interface():
             edit_model = st.selectbox("AI Model", list(AVAILABLE_MODELS.keys()), index=list(AVAILABLE_MODELS.keys()).index(data.loc[edit_index, 'Model']))
 
             if st.form_submit_button("Update Prompt"):
-                data.loc[edit_index] = [edit_categories, edit_prompt_name, edit_prompt_text, edit_model]
-                save_data(data)
-                st.success("Prompt updated successfully!")
+                changes = ChangeSet(edited={edit_index: {
+                    "Categories": edit_categories,
+                    "PromptName": edit_prompt_name,
+                    "PromptText": edit_prompt_text,
+                    "Model": edit_model
+                }})
+                if save_data(changes, version):
+                    data = changes.apply(data)
+                    st.success("Prompt updated successfully!")
 
     # Delete prompts
     if isinstance(data, pd.DataFrame) and not data.empty:
         st.subheader("Delete Prompts")
         prompt_to_delete = st.selectbox("Select a prompt to delete", data['PromptName'])
         if st.button("Delete Prompt"):
-            data = data[data['PromptName'] != prompt_to_delete]
-            save_data(data)
-            st.success(f"Prompt '{prompt_to_delete}' deleted successfully!")
+            matches = (data['PromptName'] == prompt_to_delete).to_numpy()
+            changes = ChangeSet(deleted=matches.nonzero()[0].tolist())
+            if save_data(changes, version):
+                data = changes.apply(data)
+                st.success(f"Prompt '{prompt_to_delete}' deleted successfully!")
 
     # Manage categories
     st.subheader("Manage Categories")
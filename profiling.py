@@ -0,0 +1,343 @@
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, Deque, Dict, List, Optional
+
+import pandas as pd
+
+PHASES = ("load", "filter", "render", "api")
+RECENT_RERUNS = 100
+SAMPLE_INTERVAL = 0.005
+
+# Everything is off by default: while disabled, rerun() and phase() hand back
+# this shared no-op context manager, so instrumented code pays one attribute
+# lookup. State lives here so it survives Streamlit re-executing the script.
+_NULL = nullcontext()
+
+# Only one cProfile profiler may be active per process (enabling a second one
+# raises from Python 3.12), so concurrent reruns that can't take this lock run
+# with timing only.
+_CPROFILE_LOCK = threading.Lock()
+
+
+class _State:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.enabled = False
+        self.reruns: Deque[Dict[str, Any]] = deque(maxlen=RECENT_RERUNS)
+        # Profiling requested for the next N reruns.
+        self.profile_mode: Optional[str] = None
+        self.profile_remaining = 0
+        self.profiled = 0
+        self.profiles: List[cProfile.Profile] = []
+        self.samples: Counter = Counter()
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        # Phase timings of the rerun running on each script thread.
+        self.active: Dict[int, Dict[str, float]] = {}
+
+
+STATE = _State()
+
+
+def set_enabled(enabled: bool) -> None:
+    STATE.enabled = enabled
+
+
+def is_enabled() -> bool:
+    return STATE.enabled
+
+
+# --- Phase timing ---
+def rerun(page: str):
+    """
+    Time one script run of ``page``. Time not spent in an explicit phase is
+    attributed to "render".
+    """
+    if not STATE.enabled:
+        return _NULL
+    return _timed_rerun(page)
+
+
+def phase(name: str):
+    """
+    Attribute the enclosed block's wall time to phase ``name``.
+    """
+    if not STATE.enabled:
+        return _NULL
+    return _timed_phase(name)
+
+
+@contextmanager
+def _timed_rerun(page: str):
+    thread_id = threading.get_ident()
+    timings = STATE.active[thread_id] = dict.fromkeys(PHASES, 0.0)
+    profiler = _start_profiler(thread_id)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        total = time.perf_counter() - started
+        _stop_profiler(profiler)
+        del STATE.active[thread_id]
+        timings["render"] += total - sum(timings.values())
+        record = {"page": page, "started": time.time(), "total": total}
+        record.update(timings)
+        with STATE.lock:
+            STATE.reruns.append(record)
+
+
+@contextmanager
+def _timed_phase(name: str):
+    timings = STATE.active.get(threading.get_ident())
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[name] += time.perf_counter() - started
+
+
+def recent_reruns() -> pd.DataFrame:
+    """
+    Return the recorded reruns, newest first, with timings in milliseconds.
+    """
+    with STATE.lock:
+        records = list(STATE.reruns)
+    columns = ["page", "started", "total", *PHASES]
+    frame = pd.DataFrame.from_records(records[::-1], columns=columns)
+    frame["started"] = pd.to_datetime(frame["started"], unit="s")
+    ms_columns = ["total", *PHASES]
+    frame[ms_columns] = (frame[ms_columns] * 1000).round(1)
+    return frame.rename(columns={col: f"{col}_ms" for col in ms_columns})
+
+
+def clear_reruns() -> None:
+    with STATE.lock:
+        STATE.reruns.clear()
+
+
+# --- Profiling the next N reruns ---
+def request_profile(mode: str, reruns: int) -> None:
+    """
+    Profile the next ``reruns`` reruns with "cprofile" or "sampling",
+    discarding any earlier results.
+    """
+    if mode not in ("cprofile", "sampling"):
+        raise ValueError(f"Unknown profiling mode: {mode}")
+    with STATE.lock:
+        STATE.profile_mode = mode
+        STATE.profile_remaining = reruns
+        STATE.profiled = 0
+        STATE.profiles = []
+        STATE.samples = Counter()
+
+
+def profile_status() -> Dict[str, Any]:
+    with STATE.lock:
+        return {
+            "mode": STATE.profile_mode,
+            "remaining": STATE.profile_remaining,
+            "profiled": STATE.profiled,
+            "samples": sum(STATE.samples.values()),
+        }
+
+
+def _start_profiler(thread_id: int):
+    with STATE.lock:
+        if STATE.profile_remaining <= 0:
+            return None
+        mode = STATE.profile_mode
+        if mode == "cprofile" and not _CPROFILE_LOCK.acquire(blocking=False):
+            return None
+        STATE.profile_remaining -= 1
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another tool's profiler is already active.
+            _CPROFILE_LOCK.release()
+            with STATE.lock:
+                STATE.profile_remaining += 1
+            return None
+        return profiler
+    sampler = SamplingProfiler(thread_id)
+    sampler.start()
+    return sampler
+
+
+def _stop_profiler(profiler) -> None:
+    if profiler is None:
+        return
+    with STATE.lock:
+        STATE.profiled += 1
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        _CPROFILE_LOCK.release()
+        with STATE.lock:
+            STATE.profiles.append(profiler)
+    else:
+        profiler.stop()
+        with STATE.lock:
+            STATE.samples.update(profiler.counts)
+
+
+def cprofile_stats() -> Optional[pstats.Stats]:
+    with STATE.lock:
+        profiles = list(STATE.profiles)
+    if not profiles:
+        return None
+    stats = pstats.Stats(profiles[0])
+    for profile in profiles[1:]:
+        stats.add(profile)
+    return stats
+
+
+def cprofile_report(limit: int = 30, sort: str = "cumulative") -> str:
+    stats = cprofile_stats()
+    if stats is None:
+        return ""
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def cprofile_dump() -> bytes:
+    """
+    Return the merged stats in the .prof format read by pstats and snakeviz.
+    """
+    stats = cprofile_stats()
+    return marshal.dumps(stats.stats) if stats else b""
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack every ``interval`` seconds from a
+    background thread, counting identical stacks.
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                    f":{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+
+def sampling_report(limit: int = 30) -> pd.DataFrame:
+    """
+    Return the functions seen most often, with self and total sample counts.
+    """
+    with STATE.lock:
+        samples = Counter(STATE.samples)
+    own, total = Counter(), Counter()
+    for stack, count in samples.items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        for function in set(frames):
+            total[function] += count
+    frame = pd.DataFrame(
+        {"function": list(total), "total": list(total.values())}
+    ).assign(own=lambda df: df["function"].map(own).fillna(0).astype(int))
+    return frame.sort_values("total", ascending=False).head(limit)
+
+
+def sampling_dump() -> str:
+    """
+    Return the samples as collapsed stacks, the input format of flamegraph.pl
+    and speedscope.
+    """
+    with STATE.lock:
+        samples = Counter(STATE.samples)
+    return "\n".join(f"{stack} {count}" for stack, count in samples.most_common())
+
+
+# --- Memory ---
+def start_tracemalloc(frames: int = 1) -> None:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracemalloc() -> None:
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    STATE.snapshot = None
+
+
+def top_allocators(limit: int = 20, compare: bool = False) -> pd.DataFrame:
+    """
+    Take a tracemalloc snapshot and return the top allocation sites, or the
+    biggest growth since the previous snapshot with ``compare``.
+    """
+    if not tracemalloc.is_tracing():
+        raise ValueError("tracemalloc is not running.")
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)]
+    )
+    previous, STATE.snapshot = STATE.snapshot, snapshot
+    columns = ["location", "size_kb", "count"]
+    if compare and previous is not None:
+        columns.insert(2, "size_diff_kb")
+        rows = [
+            {
+                "location": str(stat.traceback),
+                "size_kb": round(stat.size / 1024, 1),
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count": stat.count,
+            }
+            for stat in snapshot.compare_to(previous, "lineno")[:limit]
+        ]
+    else:
+        rows = [
+            {
+                "location": str(stat.traceback),
+                "size_kb": round(stat.size / 1024, 1),
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:limit]
+        ]
+    return pd.DataFrame(rows, columns=columns)
+
+
+def frame_memory(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return the deep memory usage and dtype of every column of ``data``.
+    """
+    usage = data.memory_usage(deep=True, index=False)
+    return pd.DataFrame(
+        {
+            "column": usage.index,
+            "dtype": [str(data[col].dtype) for col in usage.index],
+            "bytes": usage.to_numpy(),
+        }
+    ).assign(mb=lambda df: (df["bytes"] / 2**20).round(2))
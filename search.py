@@ -0,0 +1,262 @@
+import logging
+import math
+import os
+import pickle
+import re
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils import row_fingerprints
+
+SEARCH_FIELDS = ["PromptName", "Categories", "PromptText"]
+
+# Matches in names and categories count more than matches in the body text.
+FIELD_WEIGHTS = {"PromptName": 3.0, "Categories": 2.0, "PromptText": 1.0}
+
+TOKEN_PATTERN = re.compile(r"[0-9a-z]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or that the this to with".split()
+)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into lowercase alphanumeric tokens, dropping stopwords.
+    """
+    if not isinstance(text, str):
+        return []
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS
+    ]
+
+
+class SearchIndex:
+    """
+    Inverted index over the prompt library with BM25 ranking.
+
+    Documents are keyed by a content fingerprint of their searchable fields,
+    so re-sorting or appending to the library only re-tokenizes rows whose
+    content actually changed. Removed documents leave unused ids behind until
+    they outnumber live ones, when ids are renumbered.
+
+    One instance is shared by every Streamlit session in the process, so
+    updates and searches hold a lock.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.source_stamp: Optional[Tuple[int, ...]] = None
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._doc_terms: Dict[int, List[str]] = {}
+        self._doc_lengths: List[float] = []
+        self._doc_ids: Dict[int, int] = {}
+        self._positions: Dict[int, int] = {}
+        self._doc_keys: List[int] = []
+        self._total_length = 0.0
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._length_array: Optional[np.ndarray] = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_arrays"] = {}
+        state["_length_array"] = None
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    # --- Index maintenance ---
+    def update(self, data: pd.DataFrame) -> Tuple[int, int]:
+        """
+        Bring the index in line with ``data``, returning (added, removed) counts.
+        """
+        with self._lock:
+            return self._update(data)
+
+    def _update(self, data: pd.DataFrame) -> Tuple[int, int]:
+        if data.empty:
+            fingerprints = np.empty(0, dtype=np.uint64)
+        else:
+            fingerprints = row_fingerprints(data, SEARCH_FIELDS)
+        # Iterate in reverse so duplicate rows resolve to their first position.
+        positions = {
+            int(key): pos for pos, key in reversed(list(enumerate(fingerprints)))
+        }
+
+        removed = [key for key in self._doc_ids if key not in positions]
+        for key in removed:
+            self._remove_document(key)
+
+        new_keys = [key for key in positions if key not in self._doc_ids]
+        if new_keys:
+            rows = data[SEARCH_FIELDS].iloc[[positions[key] for key in new_keys]]
+            columns = [rows[field].tolist() for field in SEARCH_FIELDS]
+            for key, *values in zip(new_keys, *columns):
+                self._add_document(key, dict(zip(SEARCH_FIELDS, values)))
+
+        if len(self._doc_keys) - len(self._doc_ids) > len(self._doc_keys) // 2:
+            self._compact()
+        self._positions = positions
+        self._length_array = None
+        return len(new_keys), len(removed)
+
+    def _add_document(self, key: int, fields: Dict[str, Optional[str]]) -> None:
+        doc_id = len(self._doc_keys)
+        frequencies: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields.get(field)):
+                frequencies[token] = frequencies.get(token, 0.0) + weight
+
+        for token, frequency in frequencies.items():
+            self._postings.setdefault(token, {})[doc_id] = frequency
+            self._arrays.pop(token, None)
+
+        length = sum(frequencies.values())
+        self._doc_keys.append(key)
+        self._doc_lengths.append(length)
+        self._doc_terms[doc_id] = list(frequencies)
+        self._doc_ids[key] = doc_id
+        self._total_length += length
+
+    def _remove_document(self, key: int) -> None:
+        doc_id = self._doc_ids.pop(key)
+        for token in self._doc_terms.pop(doc_id):
+            postings = self._postings[token]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[token]
+            self._arrays.pop(token, None)
+        self._total_length -= self._doc_lengths[doc_id]
+
+    def _compact(self) -> None:
+        """
+        Renumber live documents 0..n-1, dropping the ids of removed ones.
+        """
+        new_ids = {old: new for new, old in enumerate(sorted(self._doc_ids.values()))}
+        self._postings = {
+            token: {new_ids[doc_id]: freq for doc_id, freq in postings.items()}
+            for token, postings in self._postings.items()
+        }
+        self._doc_terms = {
+            new_ids[old]: terms for old, terms in self._doc_terms.items()
+        }
+        self._doc_lengths = [self._doc_lengths[old] for old in new_ids]
+        self._doc_keys = [self._doc_keys[old] for old in new_ids]
+        self._doc_ids = {key: new_ids[old] for key, old in self._doc_ids.items()}
+        self._arrays = {}
+
+    # --- Querying ---
+    def _term_arrays(self, token: str) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._arrays.get(token)
+        if arrays is None:
+            postings = self._postings[token]
+            arrays = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float64, count=len(postings)),
+            )
+            self._arrays[token] = arrays
+        return arrays
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[int, float]]:
+        """
+        Return up to ``limit`` (row position, score) pairs, best match first.
+        """
+        with self._lock:
+            return self._search(query, limit)
+
+    def _search(self, query: str, limit: int) -> List[Tuple[int, float]]:
+        tokens = [
+            token for token in dict.fromkeys(tokenize(query)) if token in self._postings
+        ]
+        if not tokens or not self._doc_ids:
+            return []
+
+        if self._length_array is None:
+            self._length_array = np.asarray(self._doc_lengths, dtype=np.float64)
+        num_docs = len(self._doc_ids)
+        avg_length = self._total_length / num_docs or 1.0
+
+        doc_ids, contributions = [], []
+        for token in tokens:
+            ids, frequencies = self._term_arrays(token)
+            idf = math.log(1.0 + (num_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = self.k1 * (
+                1.0 - self.b + self.b * self._length_array[ids] / avg_length
+            )
+            doc_ids.append(ids)
+            contributions.append(
+                idf * frequencies * (self.k1 + 1.0) / (frequencies + norm)
+            )
+
+        ids = np.concatenate(doc_ids)
+        scores = np.bincount(ids, weights=np.concatenate(contributions))
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            top = np.argpartition(scores[candidates], -limit)[-limit:]
+            candidates = candidates[top]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [
+            (self._positions[self._doc_keys[doc_id]], float(scores[doc_id]))
+            for doc_id in ranked
+        ]
+
+    # --- Persistence ---
+    def save(self, path: str) -> None:
+        # A unique name beside ``path``, so concurrent writers never share one.
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f"{os.path.basename(path)}.",
+            suffix=".tmp",
+            dir=os.path.dirname(path),
+        )
+        with self._lock, os.fdopen(fd, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SearchIndex":
+        with open(path, "rb") as f:
+            index = pickle.load(f)
+        if not isinstance(index, cls):
+            raise ValueError(f"{path} does not contain a search index.")
+        return index
+
+
+# Indexes are kept per process and reused across Streamlit reruns.
+_INDEX_CACHE: Dict[str, Tuple[int, SearchIndex]] = {}
+
+
+def load_index(path: str) -> SearchIndex:
+    """
+    Load the persisted index at ``path``, or return an empty one.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return SearchIndex()
+
+    cached = _INDEX_CACHE.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        index = SearchIndex.load(path)
+    except Exception as e:
+        logging.error(f"Discarding unreadable search index: {e}")
+        return SearchIndex()
+    _INDEX_CACHE[path] = (mtime, index)
+    return index
+
+
+def save_index(index: SearchIndex, path: str) -> None:
+    index.save(path)
+    _INDEX_CACHE[path] = (os.stat(path).st_mtime_ns, index)
@@ -0,0 +1,339 @@
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from search import tokenize
+from utils import row_fingerprints
+
+SIMILARITY_FIELDS = ["PromptText"]
+
+# Upper bound on the scratch score buffer (queries x rows) used per batch.
+BATCH_CELLS = 4_000_000
+
+
+def sublinear_tf(counts: np.ndarray) -> np.ndarray:
+    return 1.0 + np.log(counts.astype(np.float64))
+
+
+class TfidfMatrix:
+    """
+    Sparse TF-IDF matrix over ``PromptText`` for cosine-similarity lookups.
+
+    Raw term counts are stored in CSR form (``indptr``/``indices``/``counts``)
+    and weighted lazily, so appending prompts only tokenizes the new rows and
+    document frequencies stay exact without re-reading the library. Rows are
+    keyed by a content fingerprint; removed rows are masked until the next
+    compaction.
+
+    One instance is shared by every Streamlit session in the process, so
+    updates, queries and saves hold a lock.
+    """
+
+    def __init__(self):
+        self.source_stamp: Optional[Tuple[int, ...]] = None
+        self.vocabulary: Dict[str, int] = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.empty(0, dtype=np.int32)
+        self.counts = np.empty(0, dtype=np.float32)
+        self.doc_freq = np.empty(0, dtype=np.int64)
+        self.row_keys = np.empty(0, dtype=np.uint64)
+        self.alive = np.empty(0, dtype=bool)
+        self._rows: Dict[int, int] = {}
+        self._positions: Dict[int, int] = {}
+        self._columns: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # --- Matrix maintenance ---
+    def update(self, data: pd.DataFrame) -> Tuple[int, int]:
+        """
+        Bring the matrix in line with ``data``, returning (added, removed) counts.
+        """
+        with self._lock:
+            return self._update(data)
+
+    def _update(self, data: pd.DataFrame) -> Tuple[int, int]:
+        if data.empty:
+            fingerprints = np.empty(0, dtype=np.uint64)
+        else:
+            fingerprints = row_fingerprints(data, SIMILARITY_FIELDS)
+        positions = {
+            int(key): pos for pos, key in reversed(list(enumerate(fingerprints)))
+        }
+
+        removed = [key for key in self._rows if key not in positions]
+        for key in removed:
+            self._remove_row(key)
+
+        new_keys = [key for key in positions if key not in self._rows]
+        if new_keys:
+            texts = data["PromptText"].iloc[[positions[key] for key in new_keys]]
+            self._append_rows(new_keys, texts.tolist())
+
+        if (~self.alive).sum() > len(self.alive) // 2:
+            self._compact()
+        self._positions = positions
+        self._columns = None
+        return len(new_keys), len(removed)
+
+    def _append_rows(self, keys: List[int], texts: List[Any]) -> None:
+        indices, counts, lengths = [], [], []
+        for text in texts:
+            row: Dict[int, int] = {}
+            for token in tokenize(text):
+                term = self.vocabulary.setdefault(token, len(self.vocabulary))
+                row[term] = row.get(term, 0) + 1
+            indices.extend(row)
+            counts.extend(row.values())
+            lengths.append(len(row))
+
+        new_indices = np.asarray(indices, dtype=np.int32)
+        self.indptr = np.concatenate(
+            [self.indptr, self.indptr[-1] + np.cumsum(lengths, dtype=np.int64)]
+        )
+        self.indices = np.concatenate([self.indices, new_indices])
+        self.counts = np.concatenate([self.counts, np.asarray(counts, np.float32)])
+        self.doc_freq = np.concatenate(
+            [
+                self.doc_freq,
+                np.zeros(len(self.vocabulary) - len(self.doc_freq), dtype=np.int64),
+            ]
+        )
+        self.doc_freq += np.bincount(new_indices, minlength=len(self.vocabulary))
+
+        first_row = len(self.row_keys)
+        self.row_keys = np.concatenate(
+            [self.row_keys, np.asarray(keys, dtype=np.uint64)]
+        )
+        self.alive = np.concatenate([self.alive, np.ones(len(keys), dtype=bool)])
+        for offset, key in enumerate(keys):
+            self._rows[key] = first_row + offset
+
+    def _remove_row(self, key: int) -> None:
+        row = self._rows.pop(key)
+        self.alive[row] = False
+        terms = self.indices[self.indptr[row] : self.indptr[row + 1]]
+        self.doc_freq[terms] -= 1
+
+    def _compact(self) -> None:
+        lengths = np.diff(self.indptr)
+        keep_nnz = np.repeat(self.alive, lengths)
+        self.indices = self.indices[keep_nnz]
+        self.counts = self.counts[keep_nnz]
+        self.indptr = np.concatenate([[0], np.cumsum(lengths[self.alive])])
+        self.row_keys = self.row_keys[self.alive]
+        self.alive = np.ones(len(self.row_keys), dtype=bool)
+        self._rows = {int(key): row for row, key in enumerate(self.row_keys)}
+
+    # --- Weighting ---
+    def _weighted_columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return the L2-normalized TF-IDF matrix transposed to CSC form.
+        """
+        if self._columns is not None:
+            return self._columns
+
+        num_rows = len(self.row_keys)
+        row_ids = np.repeat(np.arange(num_rows, dtype=np.int64), np.diff(self.indptr))
+        live = self.alive[row_ids]
+        row_ids, terms = row_ids[live], self.indices[live]
+
+        num_docs = max(len(self._rows), 1)
+        self._idf = np.log((1.0 + num_docs) / (1.0 + self.doc_freq)) + 1.0
+        weights = sublinear_tf(self.counts[live]) * self._idf[terms]
+        self._norms = np.sqrt(
+            np.bincount(row_ids, weights=weights**2, minlength=num_rows)
+        )
+        weights /= self._norms[row_ids]
+
+        order = np.argsort(terms, kind="stable")
+        col_indptr = np.concatenate(
+            [[0], np.cumsum(np.bincount(terms, minlength=len(self.vocabulary)))]
+        )
+        self._columns = (col_indptr, row_ids[order], weights[order])
+        return self._columns
+
+    def _row_vector(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        segment = slice(self.indptr[row], self.indptr[row + 1])
+        terms = self.indices[segment]
+        weights = sublinear_tf(self.counts[segment]) * self._idf[terms]
+        return terms, weights / self._norms[row]
+
+    # --- Querying ---
+    def most_similar(
+        self, positions: Sequence[int], data: pd.DataFrame, k: int = 5
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Return the top-``k`` (row position, cosine score) pairs for each of the
+        given row positions in ``data``, excluding the prompt itself.
+        """
+        with self._lock:
+            return self._most_similar(positions, data, k)
+
+    def _most_similar(
+        self, positions: Sequence[int], data: pd.DataFrame, k: int
+    ) -> List[List[Tuple[int, float]]]:
+        if not len(positions):
+            return []
+        keys = row_fingerprints(data.iloc[list(positions)], SIMILARITY_FIELDS)
+        rows = [self._rows.get(int(key), -1) for key in keys]
+
+        col_indptr, col_rows, col_weights = self._weighted_columns()
+        num_rows = len(self.row_keys)
+        batch_size = max(1, BATCH_CELLS // max(num_rows, 1))
+        results: List[List[Tuple[int, float]]] = []
+
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start : start + batch_size]
+            flat_rows, flat_scores = [], []
+            for slot, row in enumerate(batch):
+                if row < 0:
+                    continue
+                terms, query_weights = self._row_vector(row)
+                starts, ends = col_indptr[terms], col_indptr[terms + 1]
+                lengths = ends - starts
+                offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+                postings = np.arange(lengths.sum()) + offsets
+                flat_rows.append(col_rows[postings] + slot * num_rows)
+                flat_scores.append(
+                    col_weights[postings] * np.repeat(query_weights, lengths)
+                )
+
+            scores = np.zeros(len(batch) * num_rows)
+            if flat_rows:
+                scores = np.bincount(
+                    np.concatenate(flat_rows),
+                    weights=np.concatenate(flat_scores),
+                    minlength=len(batch) * num_rows,
+                )
+            scores = scores.reshape(len(batch), num_rows)
+
+            for slot, row in enumerate(batch):
+                results.append(self._top_k(scores[slot], row, k))
+        return results
+
+    def _top_k(self, scores: np.ndarray, row: int, k: int) -> List[Tuple[int, float]]:
+        if row < 0:
+            return []
+        scores[row] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [
+            (self._positions[int(self.row_keys[r])], float(scores[r])) for r in ranked
+        ]
+
+    # --- Persistence ---
+    def save(self, path: str) -> None:
+        with self._lock:
+            vocabulary = np.empty(len(self.vocabulary), dtype=object)
+            for token, term in self.vocabulary.items():
+                vocabulary[term] = token
+            # A unique name beside ``path``, so concurrent writers never share one.
+            fd, tmp_path = tempfile.mkstemp(
+                prefix=f"{os.path.basename(path)}.",
+                suffix=".tmp",
+                dir=os.path.dirname(path),
+            )
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    vocabulary=vocabulary.astype(str),
+                    indptr=self.indptr,
+                    indices=self.indices,
+                    counts=self.counts,
+                    doc_freq=self.doc_freq,
+                    row_keys=self.row_keys,
+                    alive=self.alive,
+                    position_keys=np.fromiter(self._positions.keys(), dtype=np.uint64),
+                    position_rows=np.fromiter(self._positions.values(), dtype=np.int64),
+                    source_stamp=np.asarray(
+                        self.source_stamp or (-1, -1), dtype=np.int64
+                    ),
+                )
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "TfidfMatrix":
+        matrix = cls()
+        with np.load(path, allow_pickle=False) as arrays:
+            matrix.vocabulary = {
+                token: term for term, token in enumerate(arrays["vocabulary"].tolist())
+            }
+            for name in (
+                "indptr",
+                "indices",
+                "counts",
+                "doc_freq",
+                "row_keys",
+                "alive",
+            ):
+                setattr(matrix, name, arrays[name])
+            matrix._positions = dict(
+                zip(arrays["position_keys"].tolist(), arrays["position_rows"].tolist())
+            )
+            stamp = tuple(arrays["source_stamp"].tolist())
+        matrix.source_stamp = None if stamp == (-1, -1) else stamp
+        matrix._rows = {
+            int(key): row
+            for row, key in enumerate(matrix.row_keys)
+            if matrix.alive[row]
+        }
+        return matrix
+
+
+# Matrices are kept per process and reused across Streamlit reruns.
+_MATRIX_CACHE: Dict[str, Tuple[int, TfidfMatrix]] = {}
+
+
+def load_matrix(path: str) -> TfidfMatrix:
+    """
+    Load the persisted matrix at ``path``, or return an empty one.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return TfidfMatrix()
+
+    cached = _MATRIX_CACHE.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        matrix = TfidfMatrix.load(path)
+    except Exception as e:
+        logging.error(f"Discarding unreadable TF-IDF matrix: {e}")
+        return TfidfMatrix()
+    _MATRIX_CACHE[path] = (mtime, matrix)
+    return matrix
+
+
+def save_matrix(matrix: TfidfMatrix, path: str) -> None:
+    matrix.save(path)
+    _MATRIX_CACHE[path] = (os.stat(path).st_mtime_ns, matrix)
+
+
+def add_related_column(
+    data: pd.DataFrame, name_key: str = "PromptName", k: int = 3
+) -> pd.DataFrame:
+    """
+    Add a comma-separated ``Related`` column naming each row's ``k`` most
+    similar rows by ``PromptText``.
+    """
+    if data.empty:
+        return data
+    data = data.reset_index(drop=True)
+    matrix = TfidfMatrix()
+    matrix.update(data)
+    neighbours = matrix.most_similar(range(len(data)), data, k=k)
+    names = data[name_key].tolist()
+    return data.assign(
+        Related=[", ".join(names[pos] for pos, _ in related) for related in neighbours]
+    )
@@ -0,0 +1,155 @@
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only.
+    fcntl = None
+
+# Old snapshot files kept around for readers that still have them mapped.
+KEEP_VERSIONS = 2
+
+STRING_TYPES = {
+    pa.string(): pd.StringDtype("pyarrow"),
+    pa.large_string(): pd.StringDtype("pyarrow"),
+}
+
+
+def pointer_path(base_path: str) -> str:
+    return f"{base_path}.snapshot"
+
+
+def snapshot_path(base_path: str, version: int) -> str:
+    return f"{base_path}.v{version}.arrow"
+
+
+def read_pointer(base_path: str) -> Optional[Dict]:
+    """
+    Return the current snapshot pointer ({"version", "source_stamp"}), if any.
+    """
+    try:
+        with open(pointer_path(base_path)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def current_version(base_path: str) -> int:
+    pointer = read_pointer(base_path)
+    return pointer["version"] if pointer else 0
+
+
+_PUBLISH_LOCKS: Dict[str, threading.Lock] = {}
+_PUBLISH_LOCKS_GUARD = threading.Lock()
+
+
+@contextmanager
+def _publish_lock(base_path: str) -> Iterator[None]:
+    """
+    Serialize publishers of one data file's snapshots, across threads and
+    processes.
+    """
+    with _PUBLISH_LOCKS_GUARD:
+        lock = _PUBLISH_LOCKS.setdefault(base_path, threading.Lock())
+    with lock, open(f"{pointer_path(base_path)}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield  # closing the file releases the flock
+
+
+def _temp_path(path: str) -> str:
+    # A unique name beside ``path``, so concurrent writers never share one.
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=os.path.dirname(path)
+    )
+    os.close(fd)
+    return tmp_path
+
+
+def publish_snapshot(
+    data: pd.DataFrame, base_path: str, source_stamp: Optional[Tuple[int, ...]] = None
+) -> int:
+    """
+    Write ``data`` as a new immutable Arrow IPC snapshot and make it current.
+
+    The snapshot file is fully written before the pointer file is swapped in
+    with ``os.replace``, so readers see either the old or the new version.
+    Publishers of the same file take turns, so each gets its own version.
+    """
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    with _publish_lock(base_path):
+        version = current_version(base_path) + 1
+        path = snapshot_path(base_path, version)
+
+        tmp_path = _temp_path(path)
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+        tmp_pointer = _temp_path(pointer_path(base_path))
+        with open(tmp_pointer, "w") as f:
+            json.dump({"version": version, "source_stamp": source_stamp}, f)
+        os.replace(tmp_pointer, pointer_path(base_path))
+
+        _remove_old_snapshots(base_path, version)
+    logging.info(f"Published snapshot version {version}.")
+    return version
+
+
+def _remove_old_snapshots(base_path: str, version: int) -> None:
+    # Unlinking is safe for processes that still map an old file: the pages
+    # stay valid until they unmap it.
+    for path in glob.glob(f"{glob.escape(base_path)}.v*.arrow"):
+        try:
+            old_version = int(path[len(base_path) + 2 : -len(".arrow")])
+        except ValueError:
+            continue
+        if old_version <= version - KEEP_VERSIONS:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# One mapped snapshot per data file, shared across Streamlit reruns.
+_SNAPSHOT_CACHE: Dict[str, Tuple[int, pa.Table, pd.DataFrame]] = {}
+
+
+def load_snapshot(
+    base_path: str, source_stamp: Optional[Tuple[int, ...]] = None
+) -> Optional[Tuple[int, pd.DataFrame]]:
+    """
+    Memory-map the current snapshot and return (version, DataFrame).
+
+    String columns stay backed by the mapped Arrow buffers, so every process
+    reading the same version shares one copy in the page cache. Returns None
+    when there is no snapshot or it was not built from ``source_stamp``.
+    """
+    pointer = read_pointer(base_path)
+    if pointer is None:
+        return None
+    if source_stamp is not None and tuple(pointer["source_stamp"] or ()) != tuple(
+        source_stamp
+    ):
+        return None
+
+    version = pointer["version"]
+    cached = _SNAPSHOT_CACHE.get(base_path)
+    if cached and cached[0] == version:
+        return version, cached[2].copy(deep=False)
+
+    source = pa.memory_map(snapshot_path(base_path, version), "r")
+    table = pa.ipc.open_file(source).read_all()
+    frame = table.to_pandas(types_mapper=STRING_TYPES.get)
+    _SNAPSHOT_CACHE[base_path] = (version, table, frame)
+    return version, frame.copy(deep=False)
@@ -0,0 +1,117 @@
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Placeholders look like {{ topic }}; single braces stay literal so stored
+# prompts can still contain JSON or code samples.
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+
+class PromptTemplate:
+    """
+    A prompt text compiled into alternating literal and placeholder parts.
+
+    ``literals`` always has one more entry than ``fields``: the text is
+    literals[0] + fields[0] + literals[1] + ... + literals[-1].
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.literals: List[str] = []
+        self.fields: List[str] = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.literals.append(source[position : match.start()])
+            self.fields.append(match.group(1))
+            position = match.end()
+        self.literals.append(source[position:])
+        self.variables: List[str] = list(dict.fromkeys(self.fields))
+
+    def __repr__(self) -> str:
+        return f"PromptTemplate({self.source!r})"
+
+    @property
+    def is_static(self) -> bool:
+        return not self.fields
+
+    def render(self, values: Mapping[str, Any] = None, **kwargs: Any) -> str:
+        """
+        Fill in the placeholders from ``values`` and keyword arguments.
+        """
+        values = {**(values or {}), **kwargs}
+        missing = [name for name in self.variables if values.get(name) is None]
+        if missing:
+            raise ValueError(f"Missing template variables: {missing}")
+        parts = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            parts.append(str(values[field]))
+            parts.append(literal)
+        return "".join(parts)
+
+    def render_batch(
+        self, variables: Union[pd.DataFrame, Iterable[Mapping[str, Any]]]
+    ) -> pd.Series:
+        """
+        Render the template once per row of ``variables`` in a single
+        vectorized Arrow pass. Extra columns are ignored.
+        """
+        if not isinstance(variables, pd.DataFrame):
+            variables = pd.DataFrame.from_records(list(variables))
+        missing_columns = [
+            name for name in self.variables if name not in variables.columns
+        ]
+        if missing_columns:
+            raise ValueError(f"Missing template variables: {missing_columns}")
+        if self.is_static or variables.empty:
+            return pd.Series(
+                [self.source] * len(variables),
+                index=variables.index,
+                dtype="string[pyarrow]",
+            )
+
+        columns: Dict[str, pa.Array] = {}
+        null_counts = {}
+        for name in self.variables:
+            column = variables[name]
+            if column.dtype.kind in "fc":
+                # Keep whole floats as "5" rather than "5.0", like str(int).
+                column = column.astype(object).map(_format_number, na_action="ignore")
+            array = pa.array(column.astype("string[pyarrow]"))
+            columns[name] = array.cast(pa.large_string())
+            null_counts[name] = columns[name].null_count
+        if any(null_counts.values()):
+            details = ", ".join(f"{name}: {n}" for name, n in null_counts.items() if n)
+            raise ValueError(f"Missing values for template variables ({details}).")
+
+        literals = [pa.scalar(literal, pa.large_string()) for literal in self.literals]
+        parts: List[Any] = [literals[0]]
+        for field, literal in zip(self.fields, literals[1:]):
+            parts.append(columns[field])
+            parts.append(literal)
+        separator = pa.scalar("", pa.large_string())
+        rendered = pc.binary_join_element_wise(*parts, separator)
+        return pd.Series(
+            pd.array(rendered, dtype="string[pyarrow]"), index=variables.index
+        )
+
+
+def _format_number(value: Any) -> str:
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+# Compiled templates keyed by prompt ID, shared across Streamlit reruns.
+_TEMPLATE_CACHE: Dict[str, PromptTemplate] = {}
+
+
+def compile_template(prompt_id: str, text: str) -> PromptTemplate:
+    """
+    Return the compiled template for ``prompt_id``, recompiling only when its
+    text has changed since it was cached.
+    """
+    template = _TEMPLATE_CACHE.get(prompt_id)
+    if template is None or template.source != text:
+        template = _TEMPLATE_CACHE[prompt_id] = PromptTemplate(text)
+    return template
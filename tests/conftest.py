@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+from utils import compact_frame
+
+
+@pytest.fixture
+def make_library():
+    """
+    Factory for small compact libraries, one prompt per name. Texts and
+    categories default to placeholders derived from the name.
+    """
+
+    def make(names, texts=None, categories=None):
+        return compact_frame(
+            pd.DataFrame(
+                {
+                    "Categories": categories or ["Cat"] * len(names),
+                    "PromptName": names,
+                    "PromptText": texts or [f"Text for {name}" for name in names],
+                    "Model": ["Ministral 8B"] * len(names),
+                }
+            )
+        )
+
+    return make
+
+
+@pytest.fixture
+def library_files(tmp_path, monkeypatch):
+    """
+    Point main's library, search index and TF-IDF matrix files into
+    ``tmp_path`` and return the library path.
+    """
+    import main
+
+    base = str(tmp_path / "prompt_data.parquet")
+    monkeypatch.setattr(main, "DATA_FILE", base)
+    monkeypatch.setattr(main, "SEARCH_INDEX_FILE", f"{base}.search.pkl")
+    monkeypatch.setattr(main, "TFIDF_MATRIX_FILE", f"{base}.tfidf.npz")
+    return base
@@ -0,0 +1,119 @@
+import http.client
+import json
+import threading
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from api_server import make_server
+
+
+@pytest.fixture
+def library(make_library):
+    return make_library(
+        ["Campaign", "Refactor", "Launch"],
+        texts=["Plan a campaign.", "Refactor code.", "Launch post."],
+        categories=["Marketing", "Coding", "Marketing"],
+    )
+
+
+@pytest.fixture
+def client(library):
+    server = make_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    with patch("api_server.safe_load_data", return_value=library):
+        connection = http.client.HTTPConnection(*server.server_address)
+        yield connection
+        connection.close()
+    server.shutdown()
+    server.server_close()
+
+
+def request(client, method, path, body=None):
+    client.request(method, path, body=None if body is None else json.dumps(body))
+    response = client.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_list_prompts_streams_all_rows_over_one_connection(client):
+    status, prompts = request(client, "GET", "/prompts")
+    assert status == 200
+    assert [p["PromptName"] for p in prompts] == ["Campaign", "Refactor", "Launch"]
+
+    status, page = request(client, "GET", "/prompts?offset=1&limit=1")
+    assert [p["PromptName"] for p in page] == ["Refactor"]
+
+
+def test_get_by_category(client):
+    status, categories = request(client, "GET", "/categories")
+    assert categories == ["Coding", "Marketing"]
+
+    status, prompts = request(client, "GET", "/categories/Marketing")
+    assert [p["PromptName"] for p in prompts] == ["Campaign", "Launch"]
+
+
+def test_generate_uses_shared_generation_flow(client):
+    generated = [{"Letter": "A", "PromptName": "New"}]
+    with patch("api_server.generate_prompts", return_value=generated) as mock:
+        status, body = request(
+            client, "POST", "/generate", {"topic": "SEO", "prompt_name": "Campaign"}
+        )
+    assert status == 200
+    assert body == {"prompts": generated}
+    assert mock.call_args.args[:3] == ("SEO", "Campaign", "Ministral 8B")
+
+
+def test_bad_requests_return_json_errors(client):
+    status, body = request(client, "POST", "/generate", {"topic": "SEO"})
+    assert status == 400
+    assert "prompt_name" in body["error"]
+
+    status, body = request(client, "GET", "/missing")
+    assert status == 404
+
+    status, body = request(client, "POST", "/generate", [])
+    assert status == 400
+    assert "object" in body["error"]
+
+    for path in ["/prompts?offset=-5", "/prompts?limit=-1", "/prompts?offset=x"]:
+        status, body = request(client, "GET", path)
+        assert status == 400
+
+
+def test_generation_settings_are_bounded(client):
+    body = {"topic": "SEO", "prompt_name": "Campaign"}
+    with patch("api_server.generate_prompts") as mock:
+        for bad in [
+            {"num_prompts": 1000},
+            {"max_tokens": 0},
+            {"creativity": 5},
+            {"num_prompts": "many"},
+            {"num_prompts": True},
+            {"hedge": "false"},
+        ]:
+            status, error = request(client, "POST", "/generate", {**body, **bad})
+            assert status == 400
+            assert next(iter(bad)) in error["error"]
+    assert not mock.called
+
+
+def test_streaming_error_ends_the_chunked_body(client):
+    real_to_json = pd.DataFrame.to_json
+
+    def failing_to_json(frame, **kwargs):
+        if "Refactor" in frame["PromptName"].tolist():
+            raise RuntimeError("serialization failed")
+        return real_to_json(frame, **kwargs)
+
+    with (
+        patch("api_server.STREAM_BATCH_ROWS", 1),
+        patch.object(pd.DataFrame, "to_json", failing_to_json),
+    ):
+        client.request("GET", "/prompts")
+        response = client.getresponse()
+        body = response.read()
+    assert response.status == 200
+    assert b"HTTP/" not in body and b"error" not in body
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(body)
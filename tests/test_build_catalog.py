@@ -0,0 +1,114 @@
+import json
+import os
+
+import pandas as pd
+import build_catalog
+from build_catalog import CatalogBuilder
+from utils import compact_frame, generate_html_content
+
+
+def make_catalog():
+    return compact_frame(
+        pd.DataFrame(
+            {
+                "Letter": ["B", "A", "c", "A", ""],
+                "PromptName": ["Beta", "Alpha", "Gamma", "Apex", "Blank"],
+                "Categories": ["X, Y", "Y", "Z", "X", "Q"],
+                "PromptText": ["b\ntext", "a text", "c text", "apex", "blank"],
+            }
+        )
+    )
+
+
+def test_build_matches_generate_html_content(tmp_path):
+    data = make_catalog()
+    builder = CatalogBuilder(str(tmp_path))
+    html = builder.build(data, has_image_url=False, header_title="Catalog")
+    assert html == generate_html_content(data, False, "light", "Catalog")
+    assert builder.stats["rendered"] == 3
+
+
+def test_rebuild_only_renders_changed_sections(tmp_path):
+    data = make_catalog()
+    CatalogBuilder(str(tmp_path)).build(data, False, "Catalog")
+
+    builder = CatalogBuilder(str(tmp_path))
+    html = builder.build(data, False, "Catalog")
+    assert builder.stats["rendered"] == 0
+    assert html == generate_html_content(data, False, "light", "Catalog")
+
+    edited = data.astype(object)
+    edited.loc[0, "PromptText"] = "edited"
+    edited.loc[2, "Categories"] = "New"
+    html = builder.build(edited, False, "Catalog")
+    assert builder.stats["rendered"] == 2
+    assert html == generate_html_content(edited, False, "light", "Catalog")
+    assert '"New": [{"id": "entry-4"' in html
+
+
+def test_pooled_build_matches_serial_build(tmp_path):
+    data = make_catalog()
+    builder = CatalogBuilder(str(tmp_path), workers=2)
+    html = builder.build(data, False, "Catalog")
+    assert builder.stats["rendered"] == 3
+    assert html == generate_html_content(data, False, "light", "Catalog")
+
+
+def test_persona_catalog_from_records(tmp_path):
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "test.json")
+    with open(path) as f:
+        records = json.load(f)
+    data = compact_frame(pd.DataFrame(records))
+    html = CatalogBuilder(str(tmp_path)).build(data, True, "Personas")
+    assert html == generate_html_content(records, True, "light", "Personas")
+
+
+def test_moved_sections_are_renumbered_and_stale_fragments_pruned(tmp_path):
+    data = make_catalog()
+    builder = CatalogBuilder(str(tmp_path))
+    builder.build(data, False, "Catalog")
+    files = set(os.listdir(tmp_path))
+
+    # A second "A" prompt shifts every later row id but changes no other section.
+    added = pd.concat([data, data.iloc[[1]]], ignore_index=True)
+    html = builder.build(added, False, "Catalog")
+    assert builder.stats["rendered"] == 1
+    assert html == generate_html_content(added, False, "light", "Catalog")
+
+    builder.build(data, False, "Catalog")
+    assert builder.stats["rendered"] == 1
+    assert set(os.listdir(tmp_path)) == files
+    assert len(builder.cache.manifest) == 3
+
+
+def test_text_containing_the_id_marker_is_left_alone(tmp_path):
+    data = make_catalog().astype(object)
+    data.loc[1, "PromptText"] = "nul\0byte"
+    html = CatalogBuilder(str(tmp_path)).build(data, False, "Catalog")
+    assert html == generate_html_content(data, False, "light", "Catalog")
+
+
+def test_cli_keeps_a_cache_per_output(tmp_path, monkeypatch, capsys):
+    catalogs = []
+    for name, prompts in [("one", ["Alpha", "Beta"]), ("two", ["Gamma", "Delta"])]:
+        path = str(tmp_path / f"{name}.parquet")
+        pd.DataFrame(
+            {
+                "Categories": ["X"] * 2,
+                "PromptName": prompts,
+                "PromptText": ["text"] * 2,
+                "Model": ["Ministral 8B"] * 2,
+            }
+        ).to_parquet(path)
+        catalogs.append((path, str(tmp_path / f"{name}.html")))
+
+    cache_dir = str(tmp_path / "cache")
+    for path, output in catalogs + catalogs[:1]:
+        argv = ["build_catalog.py", path, "-o", output, "--cache-dir", cache_dir]
+        monkeypatch.setattr("sys.argv", argv)
+        build_catalog.main()
+    lines = capsys.readouterr().out.splitlines()
+    assert "2/2 sections rendered" in lines[0]
+    assert "2/2 sections rendered" in lines[1]
+    assert "0/2 sections rendered" in lines[2]
+    assert sorted(os.listdir(cache_dir)) == ["one", "two"]
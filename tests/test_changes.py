@@ -0,0 +1,71 @@
+import os
+
+import pandas as pd
+import pytest
+from changes import ChangeSet, PatchLog, VersionConflict
+
+
+def test_apply_edits_deletes_and_adds(make_library):
+    changes = ChangeSet.from_editor(
+        {
+            "edited_rows": {0: {"PromptText": "Edited"}, 2: {"PromptName": "C2"}},
+            "added_rows": [{"PromptName": "D", "Categories": "New"}],
+            "deleted_rows": [1],
+        }
+    )
+    assert len(changes) == 4
+    result = changes.apply(make_library(["A", "B", "C"]))
+    assert result["PromptName"].tolist() == ["A", "C2", "D"]
+    assert result["PromptText"].iloc[0] == "Edited"
+    assert result["Categories"].tolist() == ["Cat", "Cat", "New"]
+    assert pd.isna(result["Model"].iloc[2])
+
+
+def test_validate_rejects_unknown_rows_and_columns(make_library):
+    data = make_library(["A"])
+    with pytest.raises(ValueError):
+        ChangeSet(deleted=[1]).validate(data)
+    with pytest.raises(ValueError):
+        ChangeSet(edited={0: {"Missing": 1}}).validate(data)
+
+
+def test_patch_log_versions_and_conflicts(tmp_path):
+    log = PatchLog(str(tmp_path / "library.parquet"))
+    assert log.state() == {"version": 0, "patches": 0}
+    assert log.append(ChangeSet(deleted=[0]), expected_version=0) == 1
+    assert log.append(ChangeSet(added=[{"PromptName": "X"}]), None) == 2
+    with pytest.raises(VersionConflict) as conflict:
+        log.append(ChangeSet(deleted=[1]), expected_version=1)
+    assert (conflict.value.expected, conflict.value.current) == (1, 2)
+    assert [len(c) for c in log.read()] == [1, 1]
+
+    with log.lock():
+        assert log.reset(expected_version=2) == 3
+    assert log.read() == []
+    assert log.state() == {"version": 3, "patches": 0}
+
+
+def test_patch_log_skips_torn_and_uncommitted_lines(tmp_path):
+    log = PatchLog(str(tmp_path / "library.parquet"))
+    log.append(ChangeSet(deleted=[0]), expected_version=0)
+    with open(log.patch_path, "a") as f:
+        f.write('{"version": 2, "deleted": [5]}\n{"version": 3, "del')
+    assert [c.deleted for c in log.read()] == [[0]]
+
+    log.append(ChangeSet(deleted=[1]), expected_version=1)
+    assert [c.deleted for c in log.read()] == [[0], [1]]
+
+
+def test_imports_commit_with_their_change_set(tmp_path, monkeypatch):
+    log = PatchLog(str(tmp_path / "library.parquet"))
+    entry = {"name": "a.csv", "rows": 1}
+    monkeypatch.setattr(os, "replace", lambda *args: 1 / 0)  # crash at commit
+    with pytest.raises(ZeroDivisionError):
+        log.append(ChangeSet(added=[{"PromptName": "X"}]), None, {"k": entry})
+    monkeypatch.undo()
+    assert log.imports() == {} and log.read() == []
+
+    log.append(ChangeSet(added=[{"PromptName": "X"}]), None, {"k": entry})
+    with log.lock():
+        log.reset()
+    assert log.imports() == {"k": {**entry, "version": 1}}
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+import requests
+
+import hedging
+
+POLICY = {"backup": "Ministral 3B", "percentile": 95, "initial_delay": 0.05}
+
+
+@pytest.fixture(autouse=True)
+def fast_policy(monkeypatch):
+    monkeypatch.setitem(hedging.HEDGE_POLICIES, "Ministral 8B", POLICY)
+    hedging.LATENCIES.reset()
+    yield
+    hedging.LATENCIES.reset()
+
+
+def make_attempt(delays, calls, fail=()):
+    def attempt(model, session):
+        calls.append(model)
+        time.sleep(delays[model])
+        if model in fail:
+            raise RuntimeError(f"{model} failed")
+        return [model]
+
+    return attempt
+
+
+def test_slow_primary_is_hedged_and_backup_wins():
+    calls = []
+    before = dict(hedging.HEDGE_STATS)
+    attempt = make_attempt({"Ministral 8B": 1.0, "Ministral 3B": 0.01}, calls)
+    started = time.perf_counter()
+    assert hedging.hedged_call("Ministral 8B", attempt) == ["Ministral 3B"]
+    assert time.perf_counter() - started < 0.5
+    assert calls == ["Ministral 8B", "Ministral 3B"]
+    assert hedging.HEDGE_STATS["backup_wins"] == before["backup_wins"] + 1
+
+
+def test_fast_primary_is_not_hedged():
+    calls = []
+    attempt = make_attempt({"Ministral 8B": 0.0, "Ministral 3B": 0.0}, calls)
+    assert hedging.hedged_call("Ministral 8B", attempt) == ["Ministral 8B"]
+    assert calls == ["Ministral 8B"]
+
+
+def test_failing_primary_falls_back_immediately():
+    calls = []
+    attempt = make_attempt(
+        {"Ministral 8B": 0.0, "Ministral 3B": 0.0}, calls, fail={"Ministral 8B"}
+    )
+    assert hedging.hedged_call("Ministral 8B", attempt) == ["Ministral 3B"]
+
+    attempt = make_attempt(
+        {"Ministral 8B": 0.0, "Ministral 3B": 0.0},
+        [],
+        fail={"Ministral 8B", "Ministral 3B"},
+    )
+    with pytest.raises(RuntimeError, match="Ministral 8B failed"):
+        hedging.hedged_call("Ministral 8B", attempt)
+
+
+def test_hedge_delay_is_learned_from_recent_latencies():
+    assert hedging.hedge_delay("Ministral 8B") == 0.05
+    assert hedging.hedge_delay("Ministral 3B") is None
+    for ms in range(1, 101):
+        hedging.LATENCIES.record("mistralai/ministral-8b", ms / 1000)
+    assert hedging.hedge_delay("Ministral 8B") == pytest.approx(0.09505)
+
+
+def test_losing_request_is_aborted():
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class SlowHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(2.0 if self.path == "/slow" else 0.0)
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    finished = {}
+
+    def attempt(model, session):
+        path = "/slow" if model == "Ministral 8B" else "/fast"
+        try:
+            return session.get(url + path, timeout=10).text
+        except requests.RequestException as e:
+            return e
+        finally:
+            finished[model] = time.perf_counter()
+
+    started = time.perf_counter()
+    try:
+        assert hedging.hedged_call("Ministral 8B", attempt) == "ok"
+        deadline = time.perf_counter() + 1.0
+        while "Ministral 8B" not in finished and time.perf_counter() < deadline:
+            time.sleep(0.01)
+    finally:
+        server.shutdown()
+    assert finished["Ministral 8B"] - started < 1.0  # not the full 2 s
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+from inflight import SingleFlight, payload_key
+
+
+def test_payload_key_ignores_key_order():
+    assert payload_key({"a": 1, "b": [1, 2]}) == payload_key({"b": [1, 2], "a": 1})
+    assert payload_key({"a": 1}) != payload_key({"a": 2})
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    executions = []
+
+    def slow_call():
+        executions.append(1)
+        started.set()
+        release.wait(5)
+        return {"choices": ["ok"]}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("k", slow_call)))
+        for _ in range(5)
+    ]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while flight.stats()["coalesced"] < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(executions) == 1
+    assert results == [{"choices": ["ok"]}] * 5
+    assert flight.stats() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+
+    # Once the call has finished, the next one runs again.
+    flight.do("k", slow_call)
+    assert len(executions) == 2
+
+
+def test_errors_propagate_and_clear_the_registry():
+    flight = SingleFlight()
+    with pytest.raises(RuntimeError):
+        flight.do("k", lambda: (_ for _ in ()).throw(RuntimeError("upstream down")))
+    assert flight.in_flight() == 0
+
+
+def test_leader_mutating_its_result_does_not_reach_followers():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_call():
+        started.set()
+        release.wait(5)
+        return {"choices": ["ok"]}
+
+    def leader():
+        flight.do("k", slow_call)["choices"].append("leader edit")
+
+    results = []
+    threads = [threading.Thread(target=leader)] + [
+        threading.Thread(target=lambda: results.append(flight.do("k", slow_call)))
+        for _ in range(3)
+    ]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while flight.stats()["coalesced"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [{"choices": ["ok"]}] * 3
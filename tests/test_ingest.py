@@ -0,0 +1,146 @@
+import io
+import json
+import zipfile
+
+import pandas as pd
+import pytest
+from ingest import (
+    IngestionPipeline,
+    detect_format,
+    export_parser,
+    ingest_uploads,
+    parse_uploads,
+)
+from utils import PROMPT_SCHEMA
+
+CSV_UPLOAD = (
+    "Letter,Prompt Name,Category,Prompt Text\n"
+    "A, Alpha ,Marketing ,Write an ad.\n"
+    'B,Beta,"SEO,Marketing",Find keywords.\n'
+)
+
+
+def test_pipeline_produces_exactly_prompt_schema():
+    pipeline = IngestionPipeline()
+    result = pipeline.run(io.StringIO(CSV_UPLOAD), format="CSV", model="Ministral 3B")
+
+    assert list(result.columns) == PROMPT_SCHEMA
+    assert result["PromptName"].tolist() == ["Alpha", "Beta"]
+    assert result["Categories"].tolist() == ["Marketing", "SEO, Marketing"]
+    assert result["Model"].tolist() == ["Ministral 3B", "Ministral 3B"]
+    assert set(pipeline.timings) == set(IngestionPipeline.STAGE_NAMES)
+
+
+def test_pipeline_reads_json_by_mime_type():
+    records = [
+        {"Letter": "A", "PromptName": "Alpha", "Categories": "C", "PromptText": "T"}
+    ]
+    result = IngestionPipeline().run(
+        io.BytesIO(json.dumps(records).encode()), format="application/json"
+    )
+    assert result.iloc[0]["PromptName"] == "Alpha"
+
+
+def test_validate_stage_rejects_blank_values():
+    upload = "Letter,Prompt Name,Category,Prompt Text\nA,Alpha,Marketing,  \n"
+    with pytest.raises(ValueError, match="PromptText: 1"):
+        IngestionPipeline().run(io.StringIO(upload), format="CSV")
+
+
+def test_stages_are_pluggable():
+    persisted = []
+
+    def persist(batch, options):
+        persisted.append(batch)
+        return batch
+
+    pipeline = IngestionPipeline(persist=persist)
+    pipeline.run(io.StringIO(CSV_UPLOAD), format="CSV")
+    assert len(persisted[0]) == 2
+
+    frame = pd.DataFrame(
+        {"PromptName": ["X"], "Categories": ["C"], "PromptText": ["T"]}
+    )
+    result = pipeline.with_stage("persist", lambda batch, _: batch).run(
+        frame, start="enrich"
+    )
+    assert result.iloc[0]["Model"] == "Ministral 8B"
+    assert len(persisted) == 1
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError, match="Unsupported upload option"):
+        detect_format("text/plain", "prompts.txt")
+    assert detect_format(None, "Prompts.JSON") == "json"
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, text in members.items():
+            archive.writestr(name, text)
+    return buffer.getvalue()
+
+
+def test_ingest_uploads_merges_zip_members_in_one_write():
+    archive = make_zip(
+        {
+            "team/a.csv": CSV_UPLOAD,
+            "team/b.json": json.dumps(
+                [
+                    {
+                        "Letter": "C",
+                        "PromptName": "Gamma",
+                        "Categories": "C",
+                        "PromptText": "T",
+                    }
+                ]
+            ),
+            "team/broken.csv": "Letter,Name\nA,x\n",
+            "team/readme.txt": "ignored",
+        }
+    )
+    writes = []
+    merged, summary = ingest_uploads(
+        [("prompts.zip", archive)],
+        persist=lambda batch, options: writes.append(batch),
+        max_workers=2,
+    )
+
+    assert len(writes) == 1
+    assert merged["PromptName"].tolist() == ["Alpha", "Beta", "Gamma"]
+    assert summary["File"].tolist() == [
+        "prompts.zip/team/a.csv",
+        "prompts.zip/team/b.json",
+        "prompts.zip/team/broken.csv",
+    ]
+    assert summary["Status"].tolist() == ["ok", "ok", "error"]
+    assert "Missing required columns" in summary["Error"].iloc[2]
+
+
+def test_ingest_uploads_skips_files_in_the_ledger():
+    ledger = {}
+
+    def persist(batch, options):
+        ledger.update(options["imports"])
+
+    uploads = [("a.csv", CSV_UPLOAD.encode()), ("copy.csv", CSV_UPLOAD.encode())]
+    merged, summary = ingest_uploads(uploads, persist=persist, imported=ledger)
+    assert len(merged) == 2
+    assert summary["Status"].tolist() == ["ok", "skipped"]
+    assert [entry["rows"] for entry in ledger.values()] == [2]
+
+    merged, summary = ingest_uploads(uploads, persist=persist, imported=ledger)
+    assert merged.empty
+    assert summary["Status"].tolist() == ["skipped", "skipped"]
+    assert summary["Rows"].tolist() == [2, 2]
+
+
+def test_parse_uploads_with_export_parser_keeps_letter():
+    merged, summary = parse_uploads(
+        [("a.csv", CSV_UPLOAD.encode())],
+        parser=export_parser,
+        upload_option="Option 1",
+    )
+    assert "Letter" in merged.columns
+    assert summary["Rows"].tolist() == [2]
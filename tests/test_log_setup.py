@@ -0,0 +1,77 @@
+import json
+import logging
+
+import log_setup
+
+
+def make_record(msg="boom", lineno=10, created=0.0, level=logging.ERROR):
+    record = logging.makeLogRecord(
+        {"msg": msg, "levelno": level, "levelname": logging.getLevelName(level)}
+    )
+    record.pathname, record.lineno, record.created = "main.py", lineno, created
+    return record
+
+
+def test_json_formatter_writes_one_line_with_extras():
+    record = make_record("bad %s")
+    record.args = ("object",)
+    record.prompt = "P1"
+    entry = json.loads(log_setup.JsonFormatter().format(record))
+    assert entry["msg"] == "bad object"
+    assert entry["level"] == "ERROR"
+    assert entry["prompt"] == "P1"
+
+
+def test_rate_limit_samples_each_call_site_separately():
+    limiter = log_setup.RateLimitFilter(burst=3, period=60, sample_every=5)
+    passed = [limiter.filter(make_record(created=1.0)) for _ in range(13)]
+    assert passed == [True] * 3 + [False] * 4 + [True] + [False] * 4 + [True]
+    assert limiter.dropped == 8
+    assert limiter.filter(make_record(lineno=11, created=1.0))
+
+    # A new window lets records through again and reports what was dropped.
+    limiter.filter(make_record(created=1.0))
+    record = make_record(created=100.0)
+    assert limiter.filter(record) and record.suppressed == 1
+
+
+def test_configure_logging_writes_json_lines_in_the_background(tmp_path):
+    log_setup.shutdown_logging()
+    path = tmp_path / "app.log"
+    handler = log_setup.configure_logging(str(path), max_bytes=10_000)
+    try:
+        assert log_setup.configure_logging(str(path)) is handler
+        for i in range(100):
+            logging.error(f"Validation error: {i}")
+        logging.info("Saved %d rows.", 5)
+    finally:
+        stats = log_setup.log_stats()
+        log_setup.shutdown_logging()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    messages = [line["msg"] for line in lines]
+    assert messages[: log_setup.RATE_LIMIT_BURST] == [
+        f"Validation error: {i}" for i in range(log_setup.RATE_LIMIT_BURST)
+    ]
+    assert "Saved 5 rows." in messages
+    assert stats["rate_limited"] == 100 - log_setup.RATE_LIMIT_BURST
+
+
+def test_forked_pool_workers_still_write_to_the_log(tmp_path):
+    from ingest import parse_uploads
+
+    log_setup.shutdown_logging()
+    path = tmp_path / "app.log"
+    log_setup.configure_logging(str(path))
+    uploads = [
+        (f"{i}.csv", b"Prompt Name,Category,Prompt Text\nA,Cat,Text\n")
+        for i in range(4)
+    ]
+    try:
+        merged, summary = parse_uploads(uploads, max_workers=2)
+    finally:
+        log_setup.shutdown_logging()
+
+    assert summary["Status"].tolist() == ["ok"] * 4
+    messages = [json.loads(line)["msg"] for line in path.read_text().splitlines()]
+    assert sum(m.startswith("Ingestion timings") for m in messages) == 4
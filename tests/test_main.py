@@ -1,9 +1,12 @@
 import io
+import os
 from unittest.mock import patch
 
 import pandas as pd
+import pytest
 from main import (call_ai_api, generate_api_payload, parse_api_response,
                   safe_load_data, upload_and_process_file)
+from utils import compact_frame
 
 
 def test_parse_api_response_with_valid_data():
@@ -68,7 +71,7 @@ def test_safe_load_data_with_valid_file(
     mock_read_parquet.return_value = sample_data
 
     result = safe_load_data()
-    pd.testing.assert_frame_equal(result, sample_data)
+    pd.testing.assert_frame_equal(result, compact_frame(sample_data))
 
 
 # Test 1: Validate `load_data()` Functionality
@@ -88,7 +91,7 @@ def test_load_data_with_existing_parquet(
     mock_read_parquet.return_value = sample_data
 
     result = safe_load_data()
-    pd.testing.assert_frame_equal(result, sample_data)
+    pd.testing.assert_frame_equal(result, compact_frame(sample_data))
 
 
 def test_load_data_with_no_file():
@@ -155,3 +158,178 @@ def test_upload_and_process_file(_, mock_read_csv):  # "_" for unused mock_to_pa
     result = upload_and_process_file(uploaded_file, "CSV")
     assert not result.empty
     assert result.iloc[0]["PromptName"] == "NewPrompt"
+
+
+# Test 5: Parquet layout, column pruning and filtered reads
+def test_pruned_and_filtered_reads(library_files, monkeypatch, make_library):
+    import main
+    import pyarrow.parquet as pq
+
+    base = library_files
+    monkeypatch.setattr(main, "ROW_GROUP_ROWS", 2)
+    library = make_library(
+        ["Essay", "Refactor", "Poem", "Sketch", "Review"],
+        texts=["Write an essay", "Refactor code", "Write a poem",
+               "Draw a sketch", "Review a pull request"],
+        categories=["Writing", "Code", "Writing", "Art", "Code"],
+    )
+    main.save_data_to_parquet(library)
+
+    metadata = pq.ParquetFile(base).metadata
+    assert metadata.row_group(0).column(0).compression == "ZSTD"
+    assert metadata.row_group(0).column(0).statistics.has_min_max
+    assert main.safe_load_data()["Categories"].tolist() == [
+        "Art", "Code", "Code", "Writing", "Writing"]
+
+    def check_reads():
+        catalog = main.safe_load_data(columns=main.CATALOG_COLUMNS)
+        assert list(catalog.columns) == ["Categories", "PromptName"]
+        assert len(catalog) == 5
+        assert main.load_prompt_text("Writing", "Poem") == "Write a poem"
+        assert main.load_prompt_text("Writing", "Missing") is None
+
+    check_reads()  # from the published snapshot
+    with patch("main.load_shared_snapshot") as shared:
+        assert main.load_prompt_text("Code", "Review") == "Review a pull request"
+    shared.assert_not_called()  # filtered reads use Parquet row-group pruning
+    monkeypatch.setattr(main, "load_shared_snapshot", lambda: None)
+    check_reads()  # from Parquet with pyarrow filters
+
+
+# Test 6: Row-level admin saves with version checks
+def test_save_changes_patches_and_compacts(
+    library_files, monkeypatch, make_library
+):
+    import main
+    from changes import ChangeSet, VersionConflict
+
+    base = library_files
+    library = make_library(
+        ["Sketch", "Refactor", "Poem"],
+        texts=["Draw a sketch", "Refactor code", "Write a poem"],
+        categories=["Art", "Code", "Writing"],
+    )
+    main.save_data_to_parquet(library)
+    version, data = main.load_versioned_library()
+    mtime = os.stat(base).st_mtime_ns
+
+    changes = ChangeSet(
+        edited={1: {"PromptText": "Refactor this code"}},
+        added=[{"Categories": "Art", "PromptName": "Paint", "PromptText": "Paint"}],
+        deleted=[2],
+    )
+    new_version = main.save_changes(changes, expected_version=version, base=data)
+    assert new_version == version + 1
+    assert os.stat(base).st_mtime_ns == mtime  # the data file was not rewritten
+
+    data = main.safe_load_data()
+    assert data["PromptName"].tolist() == ["Sketch", "Refactor", "Paint"]
+    assert main.load_prompt_text("Code", "Refactor") == "Refactor this code"
+    with pytest.raises(VersionConflict):
+        main.save_changes(ChangeSet(deleted=[0]), expected_version=version)
+    with pytest.raises(ValueError):
+        main.save_changes(ChangeSet(deleted=[0]))
+
+    monkeypatch.setattr(main, "COMPACT_AFTER", 2)
+    main.save_changes(ChangeSet(deleted=[0]), expected_version=new_version)
+    assert main.patch_log().state()["patches"] == 0
+    assert main.safe_load_data()["PromptName"].tolist() == ["Paint", "Refactor"]
+
+
+# Test 7: Uploads are recorded in the import ledger with their rows
+@pytest.mark.usefixtures("library_files")
+def test_repeated_upload_is_a_no_op():
+    import main
+    from ingest import ingest_uploads
+
+    uploads = [("a.csv", b"Letter,Prompt Name,Category,Prompt Text\nA,One,Cat,Text\n"),
+               ("b.csv", b"Letter,Prompt Name,Category,Prompt Text\nB,Two,Cat,Text\n")]
+
+    for _ in range(3):  # the file stays in the uploader across reruns
+        ingest_uploads(uploads[:1], persist=main.append_to_library,
+                       imported=main.patch_log().imports())
+    ingest_uploads(uploads, persist=main.append_to_library,
+                   imported=main.patch_log().imports())
+
+    assert main.safe_load_data()["PromptName"].tolist() == ["One", "Two"]
+    ledger = main.patch_log().imports()
+    assert sorted(entry["name"] for entry in ledger.values()) == ["a.csv", "b.csv"]
+    assert sorted(entry["version"] for entry in ledger.values()) == [1, 2]
+    with pytest.raises(ValueError):
+        main.append_to_library(main.safe_load_data(), {"imports": ledger})
+
+
+# Test 8: Short generations are topped up with follow-ups for the gap only
+def test_generation_fills_shortfall_with_follow_ups(monkeypatch):
+    import itertools
+    import json
+    import main
+
+    extra = itertools.count()
+
+    def fake_api(payload, key=None):
+        content = payload["messages"][0]["content"]
+        names = ["One", "Two", "one"]  # a duplicate name doesn't count
+        if "more prompts" in content:
+            names = [f"Extra {next(extra)}"]
+        prompts = [{"Letter": "A", "PromptName": name, "Categories": "C",
+                    "PromptText": "T"} for name in names]
+        return {"choices": [{"message": {"content": json.dumps(prompts)}}],
+                "usage": {"total_tokens": 100 if "more" in content else 500}}
+
+    monkeypatch.setattr(main, "FOLLOW_UP_CHUNK", 2)
+    with patch("main.call_ai_api", side_effect=fake_api) as api:
+        generated, usage = main.generate_prompt_batch(
+            "Topic", "Prompt", "Ministral 8B", 6, 500, 0.7)
+
+    assert len({prompt["PromptName"] for prompt in generated}) == 5
+    first_round = api.call_args_list[1:3]
+    # Two chunks of 2: the upstream payloads are identical and untouched, but
+    # their coalescing keys differ so each gets its own request.
+    assert first_round[0].args[0] == first_round[1].args[0]
+    assert "seed" not in first_round[0].args[0]
+    assert len({call.kwargs["key"] for call in first_round}) == 2
+    assert "Do not repeat these prompt names: 'One', 'Two'." in (
+        first_round[0].args[0]["messages"][0]["content"])
+    assert usage == {"requested": 6, "requests": 4, "follow_up_rounds": 2,
+                     "full_tokens": 500, "follow_up_tokens": 300, "received": 5}
+
+    # A model that never produces valid prompts gets a bounded number of tries.
+    empty = {"choices": [{"message": {"content": "[]"}}]}
+    with patch("main.call_ai_api", return_value=empty) as api:
+        generated, usage = main.generate_prompt_batch(
+            "Topic", "Prompt", "Ministral 8B", 3, 500, 0.7)
+    assert generated == [] and usage["follow_up_rounds"] == main.FOLLOW_UP_ROUNDS
+    assert api.call_count == 1 + 2 * main.FOLLOW_UP_ROUNDS
+
+
+# Test 9: A compaction that crashes before resetting the log replays nothing
+@pytest.mark.usefixtures("library_files")
+def test_interrupted_compaction_does_not_replay_patches(monkeypatch, make_library):
+    import main
+    from changes import ChangeSet, PatchLog
+
+    library = make_library(["x", "y"], categories=["B", "A"])
+    main.save_data_to_parquet(library)
+    version = main.library_version()
+    main.save_changes(ChangeSet(added=[{"Categories": "A", "PromptName": "z"}]))
+    main.save_changes(ChangeSet(deleted=[0]), expected_version=version + 1)
+    expected = main.safe_load_data()["PromptName"].tolist()
+    assert expected == ["x", "z"]
+
+    reset = PatchLog.reset
+
+    def crash(self, *args, **kwargs):
+        raise OSError("crashed before the log was reset")
+
+    monkeypatch.setattr(PatchLog, "reset", crash)
+    with pytest.raises(OSError):
+        main.compact_library()
+    monkeypatch.setattr(PatchLog, "reset", reset)
+    monkeypatch.setattr(main, "load_shared_snapshot", lambda: None)
+
+    assert sorted(main.safe_load_data()["PromptName"].tolist()) == ["x", "z"]
+    assert main.patch_log().state()["patches"] == 0
+    new_version = main.save_changes(ChangeSet(added=[{"PromptName": "w"}]))
+    assert new_version == main.base_file_version() + 1
+    assert sorted(main.safe_load_data()["PromptName"].tolist()) == ["w", "x", "z"]
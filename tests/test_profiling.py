@@ -0,0 +1,109 @@
+import marshal
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import profiling
+
+
+@pytest.fixture(autouse=True)
+def reset_state(monkeypatch):
+    monkeypatch.setattr(profiling, "STATE", profiling._State())
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def rerun_page(page):
+    with profiling.rerun(page):
+        busy(0.001)
+
+
+def test_disabled_instrumentation_is_a_shared_no_op():
+    assert profiling.rerun("User Interface") is profiling._NULL
+    assert profiling.phase("load") is profiling._NULL
+    with profiling.rerun("User Interface"):
+        with profiling.phase("load"):
+            pass
+    assert profiling.recent_reruns().empty
+
+
+def test_rerun_records_phases_and_attributes_the_rest_to_render():
+    profiling.set_enabled(True)
+    with profiling.rerun("User Interface"):
+        with profiling.phase("load"):
+            time.sleep(0.02)
+        with profiling.phase("api"):
+            time.sleep(0.01)
+        time.sleep(0.01)
+    rerun = profiling.recent_reruns().iloc[0]
+    assert rerun["page"] == "User Interface"
+    assert rerun["load_ms"] >= 20 and rerun["api_ms"] >= 10
+    assert rerun["render_ms"] >= 10 and rerun["filter_ms"] == 0
+    phases = rerun[[f"{name}_ms" for name in profiling.PHASES]].sum()
+    assert phases == pytest.approx(rerun["total_ms"], abs=0.5)
+
+
+def test_cprofile_covers_only_the_requested_reruns():
+    profiling.set_enabled(True)
+    profiling.request_profile("cprofile", 2)
+    for _ in range(3):
+        with profiling.rerun("User Interface"):
+            busy(0.001)
+    assert profiling.profile_status()["profiled"] == 2
+    assert "busy" in profiling.cprofile_report()
+    stats = marshal.loads(profiling.cprofile_dump())
+    assert any(func[2] == "busy" for func in stats)
+
+
+def test_concurrent_reruns_share_one_cprofile():
+    profiling.set_enabled(True)
+    profiling.request_profile("cprofile", 2)
+    with profiling.rerun("User Interface"):
+        # A second session's rerun starting meanwhile is only timed.
+        other = threading.Thread(target=rerun_page, args=("Admin",))
+        other.start()
+        other.join()
+        assert profiling.profile_status()["remaining"] == 1
+    with profiling.rerun("User Interface"):
+        busy(0.001)
+    assert profiling.profile_status() == {
+        "mode": "cprofile",
+        "remaining": 0,
+        "profiled": 2,
+        "samples": 0,
+    }
+    assert len(profiling.recent_reruns()) == 3
+
+
+def test_sampling_profiler_collects_stacks():
+    profiling.set_enabled(True)
+    profiling.request_profile("sampling", 1)
+    with profiling.rerun("User Interface"):
+        busy(0.1)
+    report = profiling.sampling_report()
+    assert report["function"].str.startswith("busy").any()
+    assert "busy (test_profiling.py" in profiling.sampling_dump()
+
+
+def test_memory_reports():
+    profiling.start_tracemalloc()
+    try:
+        kept = [bytearray(1024) for _ in range(100)]
+        allocators = profiling.top_allocators(limit=5)
+        assert list(allocators.columns) == ["location", "size_kb", "count"]
+        assert allocators["size_kb"].max() >= 100
+        growth = profiling.top_allocators(limit=5, compare=True)
+        assert "size_diff_kb" in growth.columns
+        del kept
+    finally:
+        profiling.stop_tracemalloc()
+
+    usage = profiling.frame_memory(pd.DataFrame({"a": ["x" * 100] * 10, "b": 1}))
+    assert usage["column"].tolist() == ["a", "b"]
+    assert usage.loc[0, "bytes"] > usage.loc[1, "bytes"]
@@ -0,0 +1,102 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from search import SearchIndex, load_index, tokenize
+
+
+@pytest.fixture
+def library(make_library):
+    return make_library(
+        ["Campaign Ideas", "Keyword Research", "Refactor Helper"],
+        texts=[
+            "Brainstorm a social media campaign.",
+            "List long-tail keywords for a blog about gardening.",
+            "Refactor this Python function for readability.",
+        ],
+        categories=["Marketing", "SEO, Marketing", "Coding"],
+    )
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("The Social-Media campaign of 2024") == [
+        "social",
+        "media",
+        "campaign",
+        "2024",
+    ]
+    assert tokenize(None) == []
+
+
+def test_search_ranks_matching_prompt_first(library):
+    index = SearchIndex()
+    index.update(library)
+
+    results = index.search("python refactor")
+    assert [position for position, _ in results] == [2]
+
+    results = index.search("marketing")
+    assert {position for position, _ in results} == {0, 1}
+
+
+def test_update_is_incremental_and_tracks_positions(library):
+    data = library
+    index = SearchIndex()
+    assert index.update(data) == (3, 0)
+
+    reordered = data.iloc[::-1].reset_index(drop=True)
+    assert index.update(reordered) == (0, 0)
+    assert index.search("gardening")[0][0] == 1
+
+    edited = reordered.copy()
+    edited.loc[0, "PromptText"] = "Rewrite this Go function."
+    assert index.update(edited) == (1, 1)
+    assert index.search("python") == []
+    assert index.search("go")[0][0] == 0
+
+
+def test_index_round_trips_through_disk(tmp_path, library):
+    path = str(tmp_path / "index.pkl")
+    index = SearchIndex()
+    index.update(library)
+    index.save(path)
+
+    loaded = load_index(path)
+    assert len(loaded) == 3
+    assert loaded.search("keywords")[0][0] == 1
+
+
+def test_load_index_missing_file_returns_empty(tmp_path):
+    assert len(load_index(str(tmp_path / "missing.pkl"))) == 0
+
+
+def test_removed_documents_are_compacted(tmp_path, library):
+    data = library
+    index = SearchIndex()
+    index.update(data)
+    for i in range(20):
+        edited = data.copy()
+        edited.loc[0, "PromptText"] = f"Brainstorm campaign number {i}."
+        index.update(edited)
+
+    assert len(index) == 3
+    assert len(index._doc_keys) <= 2 * len(index)  # ids of removed docs reclaimed
+    assert index.search("campaign")[0][0] == 0
+    assert index.search("gardening")[0][0] == 1
+
+    path = str(tmp_path / "index.pkl")
+    index.save(path)
+    assert load_index(path).search("refactor")[0][0] == 2
+
+
+def test_concurrent_saves_never_share_a_temp_file(tmp_path, library):
+    path = str(tmp_path / "index.pkl")
+    indexes = [SearchIndex() for _ in range(4)]
+    for index in indexes:
+        index.update(library)
+
+    # Separate processes rebuilding a stale index each write their own copy.
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda index: index.save(path), indexes * 10))
+    assert os.listdir(tmp_path) == ["index.pkl"]
+    assert load_index(path).search("refactor")[0][0] == 2
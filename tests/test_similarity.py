@@ -0,0 +1,84 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from similarity import TfidfMatrix, add_related_column, load_matrix
+
+
+@pytest.fixture
+def library(make_library):
+    return make_library(
+        ["Campaign", "Launch Post", "Refactor", "Unit Tests"],
+        texts=[
+            "Plan a social media campaign for a product launch.",
+            "Write a social media post announcing a product launch.",
+            "Refactor this Python function for readability.",
+            "Write unit tests for this Python function.",
+        ],
+        categories=["Marketing", "Marketing", "Coding", "Coding"],
+    )
+
+
+def test_most_similar_returns_nearest_neighbours(library):
+    data = library
+    matrix = TfidfMatrix()
+    matrix.update(data)
+
+    related = matrix.most_similar([0, 2], data, k=1)
+    assert [pos for pos, _ in related[0]] == [1]
+    assert [pos for pos, _ in related[1]] == [3]
+    assert 0.0 < related[0][0][1] <= 1.0
+
+
+def test_update_appends_only_new_rows(library):
+    data = library
+    matrix = TfidfMatrix()
+    assert matrix.update(data.iloc[:2]) == (2, 0)
+    assert matrix.update(data) == (2, 0)
+    assert matrix.update(data.iloc[1:]) == (0, 1)
+    assert len(matrix) == 3
+
+    related = matrix.most_similar([1], data.iloc[1:], k=1)
+    assert [pos for pos, _ in related[0]] == [2]
+
+
+def test_matrix_round_trips_through_disk(tmp_path, library):
+    path = str(tmp_path / "tfidf.npz")
+    data = library
+    matrix = TfidfMatrix()
+    matrix.update(data)
+    matrix.source_stamp = (1, 2)
+    matrix.save(path)
+
+    loaded = load_matrix(path)
+    assert loaded.source_stamp == (1, 2)
+    assert loaded.most_similar([3], data, k=1) == matrix.most_similar([3], data, k=1)
+
+
+def test_add_related_column_names_similar_records(library):
+    related = add_related_column(library, k=1)
+    assert related["Related"].tolist() == [
+        "Launch Post",
+        "Campaign",
+        "Unit Tests",
+        "Refactor",
+    ]
+
+
+def test_shared_matrix_survives_concurrent_updates_and_saves(tmp_path, library):
+    path = str(tmp_path / "tfidf.npz")
+    matrix = TfidfMatrix()
+    matrix.update(library)
+    edited = library.copy()
+    edited.loc[3, "PromptText"] = "Write integration tests for this Python module."
+
+    def worker(i):
+        matrix.update(edited if i % 2 else library)
+        matrix.save(path)
+        return matrix.most_similar([2], library, k=1)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(worker, range(40)))
+    assert all(len(result) == 1 for result in results)
+    assert os.listdir(tmp_path) == ["tfidf.npz"]
+    assert len(load_matrix(path)) == 4
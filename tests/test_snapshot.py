@@ -0,0 +1,46 @@
+import glob
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from snapshot import current_version, load_snapshot, publish_snapshot, snapshot_path
+
+
+def test_snapshot_round_trips_with_compact_dtypes(tmp_path, make_library):
+    base = str(tmp_path / "prompt_data.parquet")
+    data = make_library(["Alpha", "Beta"])
+
+    assert publish_snapshot(data, base, source_stamp=(1, 2)) == 1
+    version, loaded = load_snapshot(base, source_stamp=(1, 2))
+    assert version == 1
+    pd.testing.assert_frame_equal(loaded, data)
+
+
+def test_new_versions_replace_old_ones(tmp_path, make_library):
+    base = str(tmp_path / "prompt_data.parquet")
+    for i in range(4):
+        publish_snapshot(make_library([f"P{i}"]), base)
+
+    assert current_version(base) == 4
+    assert load_snapshot(base)[1]["PromptName"].tolist() == ["P3"]
+    assert not os.path.exists(snapshot_path(base, 1))
+    assert os.path.exists(snapshot_path(base, 3))
+
+
+def test_snapshot_for_other_data_file_is_ignored(tmp_path, make_library):
+    base = str(tmp_path / "prompt_data.parquet")
+    publish_snapshot(make_library(["Alpha"]), base, source_stamp=(1, 2))
+    assert load_snapshot(base, source_stamp=(3, 4)) is None
+    assert load_snapshot(str(tmp_path / "missing.parquet")) is None
+
+
+def test_concurrent_publishers_get_distinct_versions(tmp_path, make_library):
+    base = str(tmp_path / "prompt_data.parquet")
+    libraries = [make_library([f"P{i}"] * 1000) for i in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        versions = list(pool.map(lambda data: publish_snapshot(data, base), libraries))
+
+    assert sorted(versions) == list(range(1, 9))
+    version, loaded = load_snapshot(base)
+    assert version == 8 and len(loaded) == 1000
+    assert not glob.glob(str(tmp_path / "*.tmp"))
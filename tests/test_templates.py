@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+from templates import PromptTemplate, compile_template
+
+
+def test_template_renders_placeholders_and_keeps_single_braces():
+    template = PromptTemplate('Write about {{ topic }} as JSON {"n": {{n}}}.')
+    assert template.variables == ["topic", "n"]
+    assert template.render(topic="owls", n=3) == 'Write about owls as JSON {"n": 3}.'
+    with pytest.raises(ValueError, match="topic"):
+        template.render(n=3)
+
+
+def test_render_batch_matches_render_for_every_row():
+    template = PromptTemplate("{{count}} prompts on {{topic}} ({{topic}})")
+    variables = pd.DataFrame({"topic": ["owls", "tea"], "count": [3.0, 2.5]})
+    rendered = template.render_batch(variables)
+    assert rendered.tolist() == ["3 prompts on owls (owls)", "2.5 prompts on tea (tea)"]
+
+    records = [{"topic": "owls", "count": 1}]
+    assert template.render_batch(records).tolist() == [template.render(records[0])]
+
+    with pytest.raises(ValueError, match="topic: 1"):
+        template.render_batch(pd.DataFrame({"topic": ["a", None], "count": [1, 2]}))
+    with pytest.raises(ValueError, match="count"):
+        template.render_batch(pd.DataFrame({"topic": ["a"]}))
+
+
+def test_compile_template_caches_by_prompt_id():
+    first = compile_template("prompt-1", "Hi {{name}}")
+    assert compile_template("prompt-1", "Hi {{name}}") is first
+    assert compile_template("prompt-1", "Bye {{name}}").source == "Bye {{name}}"
@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+from utils import (
+    PromptRecord,
+    compact_frame,
+    generate_html_content,
+    iter_records,
+    process_json,
+)
+
+OPTION_1 = "Option 1: [Letter, Prompt Name, Category, Prompt Text]"
+
+
+def make_frame():
+    return pd.DataFrame(
+        {
+            "Letter": ["A", "B"],
+            "PromptName": ["Alpha", "Beta"],
+            "Categories": ["Cat", "Cat"],
+            "PromptText": ["First\nline", None],
+        }
+    )
+
+
+def test_compact_frame_uses_dictionary_and_arrow_dtypes():
+    result = compact_frame(make_frame())
+    assert isinstance(result["Categories"].dtype, pd.CategoricalDtype)
+    assert result["PromptText"].dtype == "string[pyarrow]"
+    assert result["PromptText"].isna().tolist() == [False, True]
+
+
+def test_prompt_record_behaves_like_a_read_only_dict():
+    record = PromptRecord(PromptName="Alpha", PromptText=pd.NA)
+    assert record["PromptName"] == "Alpha"
+    assert record.get("PromptText", "") == ""
+    assert "PromptText" not in record
+    assert record.to_dict() == {"PromptName": "Alpha"}
+    with pytest.raises(AttributeError):
+        record.Extra = "x"
+
+
+def test_iter_records_builds_records_from_frames():
+    records = iter_records(compact_frame(make_frame()))
+    assert [record["PromptName"] for record in records] == ["Alpha", "Beta"]
+    assert records[1].get("PromptText", "") == ""
+
+
+def test_process_json_returns_compact_frame():
+    result = process_json(
+        [{"Letter": "A", "PromptName": "P", "Categories": "C", "PromptText": "T"}],
+        has_image_url=False,
+        upload_option=OPTION_1,
+    )
+    assert list(result.columns) == ["Letter", "PromptName", "Categories", "PromptText"]
+    assert isinstance(result["Letter"].dtype, pd.CategoricalDtype)
+
+
+def test_process_json_rejects_missing_values():
+    with pytest.raises(ValueError, match="Missing value for key 'PromptText'"):
+        process_json(
+            [{"Letter": "A", "PromptName": "P", "Categories": "C"}],
+            has_image_url=False,
+            upload_option=OPTION_1,
+        )
+
+
+def test_generate_html_content_accepts_frames_and_records():
+    frame = compact_frame(make_frame().fillna("Second"))
+    from_frame = generate_html_content(frame, False, "light", "Title")
+    from_records = generate_html_content(
+        frame.astype(object).to_dict(orient="records"), False, "light", "Title"
+    )
+    assert from_frame == from_records
+    assert "First<br>line" in from_frame
+
+
+def test_parallel_render_matches_serial_output():
+    frame = compact_frame(
+        pd.DataFrame(
+            {
+                "Letter": ["b", "A", "B", None, "a", "C"],
+                "PromptName": ["Bee", "Ant", "Bat", "None", "Ape", "Cat"],
+                "Categories": ["X", "Y", "X", "Z", "Y, X", "Z"],
+                "PromptText": ["t1", "t2", "t3", "t4", "t5", "t6"],
+            }
+        )
+    )
+    serial = generate_html_content(frame, False, "light", "Title")
+    assert generate_html_content(frame, False, "light", "Title", workers=2) == serial
+    records = frame.dropna().astype(object).to_dict(orient="records")
+    assert generate_html_content(
+        records, False, "light", "Title", workers=2
+    ) == generate_html_content(records, False, "light", "Title")
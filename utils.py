@@ -1,37 +1,123 @@
 import json
 import random
 import re
-from typing import Any, Dict, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+PROMPT_SCHEMA = ["Categories", "PromptName", "PromptText", "Model"]
+
+# Free text is stored as Arrow-backed strings; low-cardinality columns are
+# dictionary-encoded so each distinct value is held once.
+PROMPT_DTYPES = {
+    "Letter": "category",
+    "PromptName": "string[pyarrow]",
+    "PersonaName": "string[pyarrow]",
+    "Categories": "category",
+    "ImageURL": "string[pyarrow]",
+    "PromptText": "string[pyarrow]",
+    "Model": "category",
+}
+
+
+class PromptRecord:
+    """
+    Lightweight row object for code paths that need one object per prompt.
+    """
+
+    __slots__ = tuple(PROMPT_DTYPES) + ("Related",)
+
+    def __init__(self, **fields: Any):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None)
+        if value is None or value is pd.NA or value != value:
+            return default
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        return self.get(key, "")
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: self.get(name) for name in self.__slots__ if name in self}
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert known prompt columns to their compact dtypes.
+    """
+    dtypes = {
+        col: dtype
+        for col, dtype in PROMPT_DTYPES.items()
+        if col in df.columns and df[col].dtype != dtype
+    }
+    return df.astype(dtypes) if dtypes else df
+
+
+def editable_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Decode dictionary-encoded columns so editors accept new values.
+    """
+    categorical = df.select_dtypes("category").columns
+    return df.astype({col: "string[pyarrow]" for col in categorical})
+
+
+def iter_records(data: Union[pd.DataFrame, Iterable[Any]]) -> List[Any]:
+    """
+    Return row objects for ``data``, building PromptRecords from DataFrames.
+    """
+    if not isinstance(data, pd.DataFrame):
+        return list(data)
+    columns = [col for col in data.columns if col in PromptRecord.__slots__]
+    values = [data[col].tolist() for col in columns]
+    return [PromptRecord(**dict(zip(columns, row))) for row in zip(*values)]
+
+
+def row_fingerprints(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """
+    Return a stable 64-bit content hash for every row of ``df[columns]``.
+    """
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+OPTION_1_COLUMNS = {
+    "Letter": "Letter",
+    "Prompt Name": "PromptName",
+    "Category": "Categories",
+    "Prompt Text": "PromptText",
+}
+OPTION_2_COLUMNS = {
+    "Letter": "Letter",
+    "Persona Name": "PersonaName",
+    "Category": "Categories",
+    "ImageURL": "ImageURL",
+    "Prompt Text": "PromptText",
+}
+
+
+def column_mapping_for(upload_option: str) -> Dict[str, str]:
+    """
+    Return the upload header -> column name mapping for an upload option.
+    """
+    if "Option 1" in upload_option:  # Allow partial matching
+        return OPTION_1_COLUMNS
+    return OPTION_2_COLUMNS
 
 
 def process_csv(
     df: pd.DataFrame, has_image_url: bool, upload_option: str
-) -> List[Dict[str, Any]]:
-    if "Option 1" in upload_option:  # Allow partial matching
-        column_mapping = {
-            "Letter": "Letter",
-            "Prompt Name": "PromptName",
-            "Category": "Categories",
-            "Prompt Text": "PromptText",
-        }
-        required_columns = ["Letter", "PromptName", "Categories", "PromptText"]
-    else:
-        column_mapping = {
-            "Letter": "Letter",
-            "Persona Name": "PersonaName",
-            "Category": "Categories",
-            "ImageURL": "ImageURL",
-            "Prompt Text": "PromptText",
-        }
-        required_columns = [
-            "Letter",
-            "PersonaName",
-            "Categories",
-            "ImageURL",
-            "PromptText",
-        ]
+) -> pd.DataFrame:
+    column_mapping = column_mapping_for(upload_option)
+    required_columns = list(column_mapping.values())
 
     df = df.rename(columns=column_mapping)
 
@@ -40,12 +126,12 @@ def process_csv(
     if missing_columns:
         raise ValueError(f"Missing required columns after renaming: {missing_columns}")
 
-    return df.to_dict(orient="records")
+    return compact_frame(df)
 
 
 def process_json(
     data: List[Dict[str, Any]], has_image_url: bool, upload_option: str
-) -> List[Dict[str, Any]]:
+) -> pd.DataFrame:
     if upload_option == "Option 1: [Letter, Prompt Name, Category, Prompt Text]":
         required_keys = ["Letter", "PromptName", "Categories", "PromptText"]
     else:
@@ -57,26 +143,53 @@ def process_json(
             "PromptText",
         ]
 
-    processed_data = []
-    for item in data:
-        processed_item = {}
-        for key in required_keys:
-            processed_item[key] = item.get(key, "")
-
-        for key in required_keys:
-            if processed_item.get(key, "") == "":
-                raise ValueError(
-                    f"Missing value for key '{key}' in item: {processed_item}"
-                )
+    processed_data = pd.DataFrame.from_records(data, columns=required_keys)
+    missing = processed_data.isna() | (processed_data == "")
+    if missing.to_numpy().any():
+        row, col = np.argwhere(missing.to_numpy())[0]
+        processed_item = processed_data.iloc[row].fillna("").to_dict()
+        raise ValueError(
+            f"Missing value for key '{required_keys[col]}' in item: {processed_item}"
+        )
 
-        processed_data.append(processed_item)
+    return compact_frame(processed_data)
 
-    return processed_data
 
+def group_by_letter(data: List[Any]) -> Tuple[List[str], Dict[str, List[Any]]]:
+    """
+    Return the sorted section letters and the items filed under each letter.
+    """
+    letters = sorted(set(item["Letter"].upper() for item in data if item["Letter"]))
+    data_by_letter = {}
+    for item in data:
+        letter = item["Letter"].upper()
+        if letter not in data_by_letter:
+            data_by_letter[letter] = []
+        data_by_letter[letter].append(item)
+    return letters, data_by_letter
 
-def generate_html_content(
-    data: List[Dict[str, Any]], has_image_url: bool, theme: str, header_title: str
-) -> str:
+
+def letter_groups(data: pd.DataFrame) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """
+    Vectorized group_by_letter for DataFrames: return the sorted section
+    letters and the row positions filed under each letter, in row order.
+    """
+    letter_column = pa.Array.from_pandas(data["Letter"].astype("string[pyarrow]"))
+    if isinstance(letter_column, pa.ChunkedArray):
+        letter_column = letter_column.combine_chunks()
+    encoded = pc.utf8_upper(pc.fill_null(letter_column, "")).dictionary_encode()
+    codes = encoded.indices.to_numpy(zero_copy_only=False)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+    groups = {
+        encoded.dictionary[int(codes[chunk[0]])].as_py(): chunk
+        for chunk in np.split(order, bounds)
+        if len(chunk)
+    }
+    return sorted(letter for letter in groups if letter), groups
+
+
+def render_page_head(header_title: str, has_image_url: bool, letters: List[str]) -> str:
     css_styles = get_css_styles()
     search_column_0 = "Persona Name" if has_image_url else "Letter"
     search_column_2 = 2
@@ -109,7 +222,6 @@ def generate_html_content(
 </div>
 <nav id="navigation">
 """
-    letters = sorted(set(item["Letter"].upper() for item in data if item["Letter"]))
     for letter in letters:
         html_content += f'<a href="#section-{letter}">{letter}</a> '
 
@@ -118,105 +230,139 @@ def generate_html_content(
 </nav>
 <div id="content">
 """
-    data_by_letter = {}
-    for item in data:
-        letter = item["Letter"].upper()
-        if letter not in data_by_letter:
-            data_by_letter[letter] = []
-        data_by_letter[letter].append(item)
+    return html_content
 
-    entry_id = 1
-    categories_dict = {}
 
-    for letter in letters:
-        html_content += (
-            f'<div class="letter-section" id="section-{letter}"><h2>{letter}</h2>\n'
-        )
-        html_content += """
+def render_letter_section(
+    letter: str,
+    items: List[Any],
+    has_image_url: bool,
+    include_related: bool,
+    entry_id: int,
+    id_marker: str = "",
+) -> Tuple[str, Dict[str, List[Dict[str, str]]]]:
+    """
+    Render one letter section whose first row is ``entry-{entry_id}``.
+
+    Returns the HTML and the section's category -> entries map. Row numbers
+    are wrapped in ``id_marker`` so callers can renumber the section later.
+    """
+    categories_dict = {}
+    html_content = (
+        f'<div class="letter-section" id="section-{letter}"><h2>{letter}</h2>\n'
+    )
+    html_content += """
 <table class="table table-bordered table-hover">
 <thead>
 <tr>
 """
-        if has_image_url:
-            headers = [
-                "Persona Name",
-                "Image",
-                "Categories/Tags",
-                "Prompt Text",
-                "Copy Prompt",
-            ]
+    if has_image_url:
+        headers = [
+            "Persona Name",
+            "Image",
+            "Categories/Tags",
+            "Prompt Text",
+            "Copy Prompt",
+        ]
+    else:
+        headers = [
+            "Letter",
+            "Prompt Name",
+            "Categories/Tags",
+            "Prompt Text",
+            "Copy Prompt",
+        ]
+    if include_related:
+        headers.insert(-1, "Related Prompts")
+    for idx, column in enumerate(headers):
+        if column in ["Persona Name", "Prompt Name", "Prompt Text"]:
+            html_content += (
+                f'<th class="sortable" onclick="sortTable(this, {idx})">{column}</th>\n'
+            )
         else:
-            headers = [
-                "Letter",
-                "Prompt Name",
-                "Categories/Tags",
-                "Prompt Text",
-                "Copy Prompt",
-            ]
-        for idx, column in enumerate(headers):
-            if column in ["Persona Name", "Prompt Name", "Prompt Text"]:
-                html_content += f'<th class="sortable" onclick="sortTable(this, {idx})">{column}</th>\n'
-            else:
-                html_content += f"<th>{column}</th>\n"
-        html_content += """
+            html_content += f"<th>{column}</th>\n"
+    html_content += """
 </tr>
 </thead>
 <tbody>
 """
 
-        for item in data_by_letter[letter]:
-            if has_image_url:
-                name_field = item.get("PersonaName", "")
-                letter_field = item.get("Letter", "")
-            else:
-                name_field = item.get("PromptName", "")
-                letter_field = item.get("Letter", "")
-
-            image_url = item.get("ImageURL", "") if has_image_url else ""
-            categories = item.get("Categories", "")
-            prompt_text = item.get("PromptText", "").replace("\n", "<br>")
-            categories_list = [
-                cat.strip() for cat in categories.split(",") if cat.strip()
-            ]
-            for category in categories_list:
-                if category not in categories_dict:
-                    categories_dict[category] = []
-                categories_dict[category].append(
-                    {"id": f"entry-{entry_id}", "name": name_field}
+    for item in items:
+        row_id = f"{id_marker}{entry_id}{id_marker}"
+        if has_image_url:
+            name_field = item.get("PersonaName", "")
+            letter_field = item.get("Letter", "")
+        else:
+            name_field = item.get("PromptName", "")
+            letter_field = item.get("Letter", "")
+
+        image_url = item.get("ImageURL", "") if has_image_url else ""
+        categories = item.get("Categories", "")
+        prompt_text = item.get("PromptText", "").replace("\n", "<br>")
+        categories_list = [cat.strip() for cat in categories.split(",") if cat.strip()]
+        for category in categories_list:
+            if category not in categories_dict:
+                categories_dict[category] = []
+            categories_dict[category].append(
+                {"id": f"entry-{row_id}", "name": name_field}
+            )
+
+        html_content += f"""
+<tr id="entry-{row_id}">
+"""
+        if not has_image_url:
+            html_content += f"    <td>{letter_field}</td>\n"
+        html_content += f"    <td>{name_field}</td>\n"
+        if has_image_url:
+            if image_url:
+                html_content += (
+                    f'    <td><img src="{image_url}" alt="{name_field}"></td>\n'
                 )
+            else:
+                html_content += "    <td></td>\n"
+        html_content += '    <td class="category-tags">'
+        for idx_, category in enumerate(categories_list):
+            html_content += f'<a href="#" onclick="showEntriesByCategory(`{category}`);">{category}</a>'
+            if idx_ != len(categories_list) - 1:
+                html_content += ", "
+        html_content += "</td>\n"
+        html_content += f'    <td class="prompt-text">{prompt_text}</td>\n'
+        if include_related:
+            html_content += (
+                f'    <td class="related-prompts">{item.get("Related", "")}</td>\n'
+            )
+        html_content += f'    <td><button class="btn btn-primary copy-button" onclick="copyText(this)" data-prompt="{row_id}">Copy</button></td>\n'
+        html_content += "</tr>\n"
+
+        entry_id += 1
 
-            html_content += f"""
-<tr id="entry-{entry_id}">
-"""
-            if not has_image_url:
-                html_content += f"    <td>{letter_field}</td>\n"
-            html_content += f"    <td>{name_field}</td>\n"
-            if has_image_url:
-                if image_url:
-                    html_content += (
-                        f'    <td><img src="{image_url}" alt="{name_field}"></td>\n'
-                    )
-                else:
-                    html_content += "    <td></td>\n"
-            html_content += '    <td class="category-tags">'
-            for idx_, category in enumerate(categories_list):
-                html_content += f'<a href="#" onclick="showEntriesByCategory(`{category}`);">{category}</a>'
-                if idx_ != len(categories_list) - 1:
-                    html_content += ", "
-            html_content += "</td>\n"
-            html_content += f'    <td class="prompt-text">{prompt_text}</td>\n'
-            html_content += f'    <td><button class="btn btn-primary copy-button" onclick="copyText(this)" data-prompt="{entry_id}">Copy</button></td>\n'
-            html_content += "</tr>\n"
-
-            entry_id += 1
-
-        html_content += """
+    html_content += """
 </tbody>
 </table>
 </div>
 """
 
-    html_content += """
+    return html_content, categories_dict
+
+
+def merge_categories(
+    categories_dict: Dict[str, List[Dict[str, str]]],
+    section_categories: Dict[str, List[Dict[str, str]]],
+) -> None:
+    """
+    Fold a section's category map into the page map, preserving entry order.
+    """
+    for category, entries in section_categories.items():
+        if category not in categories_dict:
+            categories_dict[category] = []
+        categories_dict[category].extend(entries)
+
+
+def render_page_tail(categories_dict: Dict[str, List[Dict[str, str]]]) -> str:
+    """
+    Render the categories modal and page scripts for the finished category map.
+    """
+    html_content = """
 <div class="modal fade" id="categoriesModal" tabindex="-1" role="dialog" aria-labelledby="categoriesModalLabel" aria-hidden="true">
   <div class="modal-dialog modal-dialog-scrollable" role="document">
     <div class="modal-content">
@@ -379,6 +525,74 @@ document.getElementById('darkModeToggle').addEventListener('click', function() {
     return html_content
 
 
+def render_section_job(job: Tuple) -> Tuple[str, Dict[str, List[Dict[str, str]]]]:
+    """
+    ``render_letter_section`` for process pools, taking the arguments as one
+    tuple with the section's rows as a DataFrame slice or record list.
+    """
+    letter, chunk, has_image_url, include_related, entry_id, id_marker = job
+    return render_letter_section(
+        letter, iter_records(chunk), has_image_url, include_related, entry_id, id_marker
+    )
+
+
+def generate_html_content(
+    data: Union[pd.DataFrame, List[Dict[str, Any]]],
+    has_image_url: bool,
+    theme: str,
+    header_title: str,
+    include_related: bool = False,
+    workers: Optional[int] = None,
+) -> str:
+    """
+    Render the HTML catalog page.
+
+    With ``workers`` > 1, letter sections are rendered concurrently in a
+    process pool. Entry ids are assigned up front from the section sizes and
+    the per-section category maps are merged in letter order, so the output
+    is identical to the serial path.
+    """
+    if workers and workers > 1:
+        if isinstance(data, pd.DataFrame):
+            data = data.reset_index(drop=True)
+            letters, positions = letter_groups(data)
+            chunks = [data.iloc[positions[letter]] for letter in letters]
+        else:
+            letters, data_by_letter = group_by_letter(list(data))
+            chunks = [data_by_letter[letter] for letter in letters]
+        first_ids = np.cumsum([1] + [len(chunk) for chunk in chunks[:-1]])
+        jobs = [
+            (letter, chunk, has_image_url, include_related, int(entry_id), "")
+            for letter, chunk, entry_id in zip(letters, chunks, first_ids)
+        ]
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs) or 1)) as pool:
+            sections = list(pool.map(render_section_job, jobs))
+    else:
+        data = iter_records(data)
+        letters, data_by_letter = group_by_letter(data)
+        sections = []
+        entry_id = 1
+        for letter in letters:
+            sections.append(
+                render_letter_section(
+                    letter,
+                    data_by_letter[letter],
+                    has_image_url,
+                    include_related,
+                    entry_id,
+                )
+            )
+            entry_id += len(data_by_letter[letter])
+
+    html_content = render_page_head(header_title, has_image_url, letters)
+    categories_dict = {}
+    for section, section_categories in sections:
+        html_content += section
+        merge_categories(categories_dict, section_categories)
+    html_content += render_page_tail(categories_dict)
+    return html_content
+
+
 def get_css_styles() -> str:
     css_styles = """
 body {
@@ -536,6 +750,13 @@ AVAILABLE_MODELS = {
     "Ministral 3B": {"id": "mistralai/ministral-3b", "context_tokens": 128000},
 }
 
+# Optional per-model hedging: when a model hasn't answered within the given
+# percentile of its recent latencies (``initial_delay`` seconds until enough
+# calls have been seen), the same request is also sent to ``backup``.
+HEDGE_POLICIES = {
+    "Ministral 8B": {"backup": "Ministral 3B", "percentile": 95, "initial_delay": 2.0},
+}
+
 
 def parse_ai_response(response_text):
     """